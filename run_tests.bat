@@ -103,3 +103,6 @@ python .\txt_obf.py -s 12345 -v 1 -r 0 -t 4 -i .\data\input\readme_in.txt -o .\d
 
 REM: reverse obfuscation and recovery of the original README file without noise/gaps:
 python .\txt_obf.py -v 1 -r 1 -t 4 -i .\data\output\readme_out.txt -o .\data\recovered\readme_rec.txt
+
+REM: benchmark throughput into a scratch file (compare a later run with -b %TEMP%\txt_obf_bench.json):
+python .\txt_obf_bench.py -z 1K,64K -o %TEMP%\txt_obf_bench.json
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2025 James James Johnson. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+###############################################################################
+# Regression tests of the obfuscator "txt_obf.py" (run with
+# "python -m unittest test_txt_obf" or "python -m pytest").
+###############################################################################
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import txt_obf
+
+STR_INPUT_FILE_NAME = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'data', 'input', 'in.txt')
+STR_LONG_INPUT_FILE_NAME = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'data', 'input', 'readme_in.txt')
+
+# Obfuscator types, gaps flags and noise percents of the equivalence tests:
+# deterministic and random types, with and without gaps and noise.
+TPL_EQUIVALENCE_MODES = (
+    (1, 0, 0), (4, 0, 0), (5, 0, 0), (7, 0, 0),
+    (3, 1, 0), (6, 0, 25), (7, 1, 25), (9, 1, 25),
+    )
+
+# Genuine (not obfuscated) texts with symbols of the obfuscator types.
+TPL_GENUINE_TEXTS = (
+    "Привет мир hello\nñandú café naïve résumé\n",
+    "Москва — столица России, город федерального значения и крупнейший "
+    "русскоязычный город в мире.\n",
+    "Η Αθήνα είναι η πρωτεύουσα και μεγαλύτερη πόλη της Ελλάδας.\n",
+    "Zażółć gęślą jaźń. Kraków, Łódź, Wrocław, Poznań i Gdańsk.\n",
+    "Plain ASCII text is never obfuscated.\n",
+    )
+
+
+def read_input_text(input_file_name = STR_INPUT_FILE_NAME) :
+    with open(input_file_name, 'r', encoding='utf-8') as file :
+        return file.read()
+
+
+def obfuscate_file(
+        input_file_name, output_file_name, obfuscator_type_index,
+        reverse_obfuscation_flag = 0, **kwargs) :
+    # Obfuscate (or recover) a file with "obfuscate" and return its output.
+    txt_obf.obfuscate(
+        dict_obfuscator = txt_obf.get_obfuscator(
+            obfuscator_type_index = obfuscator_type_index,
+            reverse_obfuscation_flag = reverse_obfuscation_flag,),
+        input_file_name = input_file_name,
+        output_file_name = output_file_name,
+        reverse_obfuscation_flag = reverse_obfuscation_flag,
+        **kwargs)
+    return read_input_text(input_file_name = output_file_name)
+
+
+class UniversalRecoveryTest(unittest.TestCase) :
+
+    def test_genuine_text_is_not_detected(self) :
+        for str_text in TPL_GENUINE_TEXTS :
+            dict_detection = txt_obf.detect_obfuscation(str_input = str_text)
+            self.assertIsNone(dict_detection['obfuscator_type_index'], str_text)
+            self.assertEqual(dict_detection['tpl_best_types'], ())
+
+    def test_genuine_text_is_passed_through(self) :
+        for str_text in TPL_GENUINE_TEXTS :
+            self.assertEqual(txt_obf.transform_text(
+                str_input = str_text,
+                obfuscator_type_index = txt_obf.INT_UNIVERSAL_TYPE_INDEX,
+                reverse_obfuscation_flag = 1,), str_text)
+
+    def test_obfuscated_text_is_recovered(self) :
+        str_text = read_input_text()
+        for obfuscator_type_index in txt_obf.DICT_OBFUSCATOR_TYPES :
+            for (gaps_insertion_flag, noise_insertion_percent) in (
+                    (0, 0), (1, 0), (0, 25), (1, 25),) :
+                str_output = txt_obf.transform_text(
+                    str_input = str_text,
+                    obfuscator_type_index = obfuscator_type_index,
+                    integer_random_seed = 12345,
+                    gaps_insertion_flag = gaps_insertion_flag,
+                    noise_insertion_percent = noise_insertion_percent,)
+                self.assertEqual(txt_obf.transform_text(
+                    str_input = str_output,
+                    obfuscator_type_index = txt_obf.INT_UNIVERSAL_TYPE_INDEX,
+                    reverse_obfuscation_flag = 1,), str_text,
+                    (obfuscator_type_index, gaps_insertion_flag,
+                     noise_insertion_percent,))
+
+    def test_genuine_file_is_passed_through(self) :
+        str_text = TPL_GENUINE_TEXTS[0]
+        with tempfile.TemporaryDirectory() as str_dir_name :
+            path_input = Path(str_dir_name, 'in.txt')
+            path_output = Path(str_dir_name, 'out.txt')
+            path_input.write_text(str_text, encoding = 'utf-8')
+            txt_obf.obfuscate_batch_file(
+                tpl_task = (str(path_input), str(path_output), None),
+                obfuscator_type_index = txt_obf.INT_UNIVERSAL_TYPE_INDEX,
+                reverse_obfuscation_flag = 1,)
+            self.assertEqual(path_output.read_text(encoding = 'utf-8'), str_text)
+
+
+class ServerRequestTest(unittest.TestCase) :
+
+    def test_parameters_of_wrong_types_are_rejected(self) :
+        for dict_parameters in (
+                {'obfuscator_type_index' : '3'},
+                {'obfuscator_type_index' : True},
+                {'integer_random_seed' : [1]},
+                {'gaps_insertion_flag' : False},
+                {'gaps_insertion_flag' : 2},
+                {'noise_insertion_percent' : 2.5},
+                {'engine' : 'c'},
+                {'rng_scheme' : 1},
+                {'keep_original_percent' : '50'},) :
+            dict_request = {'text' : "hello", 'obfuscator_type_index' : 3}
+            dict_request.update(dict_parameters)
+            with self.assertRaisesRegex(ValueError, "^Request %s " % (
+                    list(dict_parameters)[0])) :
+                txt_obf.parse_request(dict_request = dict_request)
+
+    def test_valid_request(self) :
+        dict_kwargs = txt_obf.parse_request(dict_request = {
+            'operation' : 'recover',
+            'text' : "hello",
+            'obfuscator_type_index' : 0,
+            'gaps_insertion_flag' : 1,
+            'engine' : 'python',})
+        self.assertEqual(dict_kwargs['reverse_obfuscation_flag'], 1)
+        self.assertEqual(txt_obf.transform_text(**dict_kwargs), "hello")
+
+
+class DatasetTest(unittest.TestCase) :
+
+    def test_missing_column_keeps_the_output(self) :
+        with tempfile.TemporaryDirectory() as str_dir_name :
+            path_input = Path(str_dir_name, 'in.csv')
+            path_output = Path(str_dir_name, 'out.csv')
+            path_input.write_text("a,b\nhello,1\n", encoding = 'utf-8')
+            path_output.write_text("KEEP\n", encoding = 'utf-8')
+            with self.assertRaisesRegex(ValueError, "columns not found: zz") :
+                txt_obf.obfuscate_dataset(
+                    obfuscator_type_index = 4,
+                    integer_random_seed = 1,
+                    input_file_name = str(path_input),
+                    output_file_name = str(path_output),
+                    lst_fields = ['zz'],)
+            self.assertEqual(path_output.read_text(encoding = 'utf-8'), "KEEP\n")
+
+    def test_jsonl_lines_without_changes_are_kept(self) :
+        str_input = ('{"a": "hello",  "b": 1}\n'
+                     '{"a": \n'
+                     '{"b": 2}\n'
+                     '{"a": "x", "c": {"d": "yes"}}\n')
+        with tempfile.TemporaryDirectory() as str_dir_name :
+            path_input = Path(str_dir_name, 'in.jsonl')
+            path_output = Path(str_dir_name, 'out.jsonl')
+            path_input.write_text(str_input, encoding = 'utf-8')
+            txt_obf.obfuscate_dataset(
+                obfuscator_type_index = 1,
+                integer_random_seed = 1,
+                input_file_name = str(path_input),
+                output_file_name = str(path_output),
+                lst_fields = ['a', 'a', 'c.d'],)
+            self.assertEqual(path_output.read_text(encoding = 'utf-8'), str_input)
+
+
+class AmbiguousSymbolTest(unittest.TestCase) :
+
+    def test_shared_symbol_is_reported(self) :
+        # "x" replaces both "a" and "b": the reverse obfuscator keeps one.
+        dict_obfuscator = {'aa' : 'aaxx', 'bb' : 'bbxxyy', 'cc' : 'zz'}
+        self.assertEqual(txt_obf.find_ambiguous_symbols(
+            dict_obfuscator = dict_obfuscator), {'x' : 'ab'})
+        # Text "ab" obfuscated as "xx" is recovered as "aa" or "bb".
+        dict_reverse_obfuscator = txt_obf.revert_obfuscator(
+            dict_obfuscator = dict_obfuscator)
+        self.assertIn(dict_reverse_obfuscator['xx'], ('aa', 'bb',))
+
+    def test_obfuscator_types_are_not_ambiguous(self) :
+        for dict_obfuscator in txt_obf.LST_DICT_OBFUSCATORS :
+            self.assertEqual(txt_obf.find_ambiguous_symbols(
+                dict_obfuscator = dict_obfuscator), {})
+
+
+class EquivalenceTest(unittest.TestCase) :
+
+    def setUp(self) :
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.str_output_file_name = os.path.join(
+            self.temporary_directory.name, 'out.txt')
+        self.str_text = read_input_text(input_file_name = STR_LONG_INPUT_FILE_NAME)
+
+    def tearDown(self) :
+        self.temporary_directory.cleanup()
+
+    def test_streamed_output_equals_in_memory_output(self) :
+        for (obfuscator_type_index, gaps_insertion_flag,
+             noise_insertion_percent) in TPL_EQUIVALENCE_MODES :
+            for rng_scheme in txt_obf.TPL_RNG_SCHEMES :
+                str_expected = txt_obf.transform_text(
+                    str_input = self.str_text,
+                    obfuscator_type_index = obfuscator_type_index,
+                    integer_random_seed = 12345,
+                    gaps_insertion_flag = gaps_insertion_flag,
+                    noise_insertion_percent = noise_insertion_percent,
+                    rng_scheme = rng_scheme,)
+                for (chunk_size, mmap_flag) in ((0, 0), (1, 0), (7, 0),
+                                                (1000, 0), (64, 1),) :
+                    self.assertEqual(obfuscate_file(
+                        input_file_name = STR_LONG_INPUT_FILE_NAME,
+                        output_file_name = self.str_output_file_name,
+                        obfuscator_type_index = obfuscator_type_index,
+                        integer_random_seed = 12345,
+                        gaps_insertion_flag = gaps_insertion_flag,
+                        noise_insertion_percent = noise_insertion_percent,
+                        chunk_size = chunk_size,
+                        mmap_flag = mmap_flag,
+                        rng_scheme = rng_scheme,), str_expected,
+                        (obfuscator_type_index, gaps_insertion_flag,
+                         noise_insertion_percent, rng_scheme, chunk_size,
+                         mmap_flag,))
+
+    def test_parallel_output_does_not_depend_on_jobs(self) :
+        for (obfuscator_type_index, gaps_insertion_flag,
+             noise_insertion_percent) in TPL_EQUIVALENCE_MODES[2:] :
+            for rng_scheme in txt_obf.TPL_RNG_SCHEMES :
+                lst_outputs = [obfuscate_file(
+                    input_file_name = STR_LONG_INPUT_FILE_NAME,
+                    output_file_name = self.str_output_file_name,
+                    obfuscator_type_index = obfuscator_type_index,
+                    integer_random_seed = 12345,
+                    gaps_insertion_flag = gaps_insertion_flag,
+                    noise_insertion_percent = noise_insertion_percent,
+                    chunk_size = 500,
+                    jobs = jobs,
+                    rng_scheme = rng_scheme,) for jobs in (1, 2, 3,)]
+                self.assertEqual(len(set(lst_outputs)), 1, (
+                    obfuscator_type_index, gaps_insertion_flag,
+                    noise_insertion_percent, rng_scheme,))
+                if rng_scheme == 'counter' :
+                    # Parallel chunks draw by position: no chunk seeds.
+                    self.assertEqual(lst_outputs[0], txt_obf.transform_text(
+                        str_input = self.str_text,
+                        obfuscator_type_index = obfuscator_type_index,
+                        integer_random_seed = 12345,
+                        gaps_insertion_flag = gaps_insertion_flag,
+                        noise_insertion_percent = noise_insertion_percent,
+                        rng_scheme = rng_scheme,))
+
+    def test_incremental_output_equals_full_output(self) :
+        str_input_file_name = os.path.join(
+            self.temporary_directory.name, 'growing.txt')
+        bytes_text = Path(STR_LONG_INPUT_FILE_NAME).read_bytes()
+        lst_offsets = [0, len(bytes_text) // 3, len(bytes_text) // 3 + 1,
+                       len(bytes_text) * 2 // 3, len(bytes_text),]
+        for rng_scheme in ('sequential', 'counter',) :
+            for (obfuscator_type_index, gaps_insertion_flag,
+                    noise_insertion_percent) in TPL_EQUIVALENCE_MODES :
+                str_expected_text = obfuscate_file(
+                    input_file_name = STR_LONG_INPUT_FILE_NAME,
+                    output_file_name = self.str_output_file_name,
+                    obfuscator_type_index = obfuscator_type_index,
+                    integer_random_seed = 12345,
+                    gaps_insertion_flag = gaps_insertion_flag,
+                    noise_insertion_percent = noise_insertion_percent,
+                    rng_scheme = rng_scheme,)
+                str_incremental_file_name = os.path.join(
+                    self.temporary_directory.name, 'incremental.txt')
+                Path(str_input_file_name).write_bytes(b'')
+                for (int_start, int_end) in zip(lst_offsets, lst_offsets[1:]) :
+                    with open(str_input_file_name, 'ab') as file_input :
+                        file_input.write(bytes_text[int_start:int_end])
+                    txt_obf.obfuscate_incremental(
+                        dict_obfuscator = txt_obf.get_obfuscator(
+                            obfuscator_type_index),
+                        integer_random_seed = 12345,
+                        input_file_name = str_input_file_name,
+                        output_file_name = str_incremental_file_name,
+                        gaps_insertion_flag = gaps_insertion_flag,
+                        noise_insertion_percent = noise_insertion_percent,
+                        rng_scheme = rng_scheme,)
+                self.assertEqual(
+                    Path(str_incremental_file_name).read_text(encoding = 'utf-8'),
+                    str_expected_text,
+                    (rng_scheme, obfuscator_type_index, gaps_insertion_flag,
+                     noise_insertion_percent,))
+                os.remove(str_incremental_file_name)
+                os.remove(str_incremental_file_name +
+                          txt_obf.STR_INCREMENTAL_STATE_SUFFIX)
+
+    def test_recovery_round_trip(self) :
+        str_recovered_file_name = os.path.join(
+            self.temporary_directory.name, 'recovered.txt')
+        for obfuscator_type_index in txt_obf.DICT_OBFUSCATOR_TYPES :
+            for (gaps_insertion_flag, noise_insertion_percent) in (
+                    (0, 0), (1, 0), (0, 25), (1, 25),) :
+                obfuscate_file(
+                    input_file_name = STR_LONG_INPUT_FILE_NAME,
+                    output_file_name = self.str_output_file_name,
+                    obfuscator_type_index = obfuscator_type_index,
+                    integer_random_seed = 12345,
+                    gaps_insertion_flag = gaps_insertion_flag,
+                    noise_insertion_percent = noise_insertion_percent,)
+                for chunk_size in (0, 7,) :
+                    self.assertEqual(obfuscate_file(
+                        input_file_name = self.str_output_file_name,
+                        output_file_name = str_recovered_file_name,
+                        obfuscator_type_index = obfuscator_type_index,
+                        reverse_obfuscation_flag = 1,
+                        integer_random_seed = None,
+                        gaps_insertion_flag = gaps_insertion_flag,
+                        chunk_size = chunk_size,), self.str_text,
+                        (obfuscator_type_index, gaps_insertion_flag,
+                         noise_insertion_percent, chunk_size,))
+
+
+if __name__ == '__main__' :
+    unittest.main()
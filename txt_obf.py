@@ -130,10 +130,36 @@ Zero-Width No-Break Space (U+FEFF):
 
 
 import argparse
+import asyncio
+import codecs
+import contextlib
+import csv
+import glob
+import hashlib
+import io
+import json
+import marshal
+import math
+import mmap
+import os
+import shutil
+import signal
+import stat
+import sys
+import tempfile
+import time
+import unicodedata
+from collections import Counter, deque
+from functools import lru_cache, partial
 from pathlib import Path
-from random import seed, choice, random
+from queue import Queue
+from threading import Event, Lock, Thread
+from random import Random, seed, choice, random
 from datetime import datetime
 
+# NumPy is optional and imported on first use (see "load_numpy").
+np = None
+
 
 ###############################################################################
 # Typing special characters for the input file (see zero-width spaces below):
@@ -753,6 +779,158 @@ DICT_OBFUSCATOR_TYPES = {
     10 : '10. Deterministic full replacement with paired "Mathematical Monospace" symbols.',
 }
 
+LST_DICT_OBFUSCATORS = [
+    DICT_OBFUSCATOR_DETER_FULL_SPACES,
+    DICT_OBFUSCATOR_RANDOM_FULL_SPACES,
+    DICT_OBFUSCATOR_RANDOM_PARTIAL_SPACES,
+    #
+    DICT_OBFUSCATOR_DETER_FULL,
+    DICT_OBFUSCATOR_RANDOM_FULL,
+    DICT_OBFUSCATOR_RANDOM_PARTIAL,
+    DICT_OBFUSCATOR_RANDOM_ALL,
+    #
+    DICT_OBFUSCATOR_DETER_FULL_FONT_FULLWIDTH_FORM,
+    DICT_OBFUSCATOR_DETER_FULL_FONT_MATH_SAN_SERIF,
+    DICT_OBFUSCATOR_DETER_FULL_FONT_MATH_MONOSPACE,
+    ]
+
+# Substitution engines for random obfuscators:
+#   "python" - one "random.choice" per character of the substitution
+#   generator;
+#   "numpy" - vectorized candidate sampling over the whole text.
+TPL_ENGINES = ('python', 'numpy',)
+
+# Stages consuming random numbers, each with its own generator.
+TPL_RANDOM_STAGES = ('gaps', 'noise', 'substitution',)
+
+# Random number schemes:
+#   "sequential" - one generator per stage, seeded with the seed and the
+#   stage name, consuming its sequence in text order (see
+#   "create_random_generators");
+#   "counter" - every draw is a hash of (seed, stage, character position,
+#   draw index), so any part of a text is obfuscated identically on its own
+#   (see "CounterRandom").
+TPL_RNG_SCHEMES = ('sequential', 'counter',)
+
+# Draws per character position and stage of the counter scheme, and the
+# constants of the "SplitMix64" hash.
+INT_COUNTER_DRAWS = 16
+INT_MASK64 = (1 << 64) - 1
+INT_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+INT_MIX64_MULTIPLIER_1 = 0xBF58476D1CE4E5B9
+INT_MIX64_MULTIPLIER_2 = 0x94D049BB133111EB
+FLT_UNIFORM_SCALE = 2. ** -53
+
+# Compiled tables by the identity of their obfuscator dictionary. The
+# dictionary is stored next to its tables, so that its id cannot be reused.
+DICT_COMPILED_TABLES = {}
+
+# Default number of characters (bytes for memory-mapped input and the
+# standard input) per chunk for streaming and parallel obfuscation.
+INT_DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Input or output file name of the standard input or output.
+STR_STDIO = '-'
+
+# Obfuscator dictionary of a chunk worker process (see "init_chunk_worker").
+DICT_CHUNK_WORKER = {}
+
+# Persisted cache of compiled tables and validations next to the bytecode
+# of this module, invalidated when the version below or the modification
+# time or size of this file change. An empty file name disables it.
+INT_TABLE_CACHE_VERSION = 2
+STR_TABLE_CACHE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '__pycache__',
+    'txt_obf.tables-v%d.marshal' % INT_TABLE_CACHE_VERSION)
+
+# Server (see "serve"): operations and request parameters, texts answered in
+# the event loop instead of the worker pool (characters), requests in
+# flight per connection, and the maximum size of a request line (bytes).
+TPL_SERVE_OPERATIONS = ('obfuscate', 'recover',)
+TPL_SERVE_PARAMETERS = (
+    'obfuscator_type_index',
+    'integer_random_seed',
+    'gaps_insertion_flag',
+    'noise_insertion_percent',
+    'engine',
+    'rng_scheme',
+    )
+INT_SERVE_INLINE_SIZE = 1 << 12
+INT_SERVE_MAX_PENDING = 16
+INT_SERVE_MAX_REQUEST_SIZE = 1 << 26
+
+# Datasets (see "obfuscate_dataset"): record formats by file extension, and
+# records per worker task.
+DICT_DATASET_FORMATS = {
+    '.jsonl' : 'jsonl',
+    '.ndjson' : 'jsonl',
+    '.csv' : 'csv',
+    }
+TPL_DATASET_FORMATS = ('jsonl', 'csv',)
+INT_DATASET_BATCH_SIZE = 1 << 10
+
+# Output cache (see "get_output_cache_key"): version of the keys, default
+# size limit (bytes), and the part of the limit left by an eviction.
+INT_OUTPUT_CACHE_VERSION = 1
+INT_DEFAULT_OUTPUT_CACHE_SIZE = 1 << 30
+FLT_OUTPUT_CACHE_EVICTION_RATIO = 0.9
+
+# Bytes in the output caches as counted by this process, by directory.
+DICT_OUTPUT_CACHE_SIZES = {}
+
+# Incremental obfuscation (see "obfuscate_incremental"): version of the
+# state, suffix of the state file next to the output file, and the bytes
+# before the processed input offset checked for changes of the input.
+INT_INCREMENTAL_STATE_VERSION = 1
+STR_INCREMENTAL_STATE_SUFFIX = '.state'
+INT_INCREMENTAL_FINGERPRINT_SIZE = 1 << 12
+
+# Watch mode (see "watch"): name of the status file in the output
+# directory.
+STR_WATCH_STATUS_FILE = '.txt_obf_status.json'
+
+# Compiled tables persisted in the cache: dictionaries of built-in types
+# only (NumPy candidate arrays are compiled in every process), and only the
+# fixed tables of the obfuscator types (not those of candidate weights).
+TPL_PERSISTED_TABLES = (
+    'compile_translation_table',
+    'compile_reverse_table',
+    'compile_detection_table',
+    'compile_alias_tables',
+    'compile_obfuscator_digest',
+    'compile_ascii_replacements',
+    )
+
+# Persisted tables loaded from the cache file (see "load_table_cache").
+DICT_TABLE_CACHE = {}
+
+# Cache keys (obfuscator type index, reverse obfuscation flag) of the
+# obfuscator dictionaries by their identity (see "get_obfuscator").
+DICT_OBFUSCATOR_CACHE_KEYS = {
+    id(dict_obfuscator) : (i, 0,)
+    for (i, dict_obfuscator) in enumerate(LST_DICT_OBFUSCATORS, 1)}
+
+# Obfuscator type index of the universal recovery of text obfuscated with
+# any type (see "revert_all_obfuscators" and "detect_obfuscation").
+INT_UNIVERSAL_TYPE_INDEX = 0
+STR_UNIVERSAL_TYPE = "0. Universal recovery of text obfuscated with any type, passing text without detected obfuscation through unchanged (with -r 1 only)."
+
+# Number and size (bytes) of evenly spaced windows sampled from the input to
+# detect the obfuscator type, gaps and noise.
+INT_SAMPLE_WINDOWS = 16
+INT_SAMPLE_WINDOW_SIZE = 1 << 12
+
+# Log-likelihood of a symbol which the obfuscator type cannot produce.
+FLT_DETECTION_PENALTY = math.log(1e-9)
+
+# Log-likelihood of a symbol in genuine (not obfuscated) text, and of a
+# symbol of a script whose other letters (produced by no obfuscator type)
+# are also in the text, e.g. Cyrillic or accented Latin text. An obfuscator
+# type is detected only if it beats genuine text by the margin.
+FLT_GENUINE_SYMBOL_SCORE = math.log(1e-2)
+FLT_GENUINE_SCRIPT_SCORE = math.log(0.5)
+FLT_DETECTION_MARGIN = math.log(10)
+
 '''
 # Relative frequency in the English language (text):
 # https://en.wikipedia.org/wiki/Letter_frequency
@@ -863,30 +1041,58 @@ if False :
     print("W\uFFA0W") # HALFWIDTH HANGUL FILLER
 
 
+# Zero-width noise characters inserted between letters.
+TPL_STR_NOISE = (
+    '\uFEFF', # ZERO WIDTH NO-BREAK SPACE
+    '\u180E', # MONGOLIAN VOWEL SEPARATOR (zero width)
+    '\u200D', # "ZERO WIDTH JOINER"
+    )
+
+# Characters not treated as letters when inserting noise.
+SET_NON_ALPHA = {
+    '\u2800', # "BRAILLE PATTERN BLANK": "isalpha" is False
+    '\u200A', # "HAIR SPACE": "isalpha" is False
+    '\u3164', # "HANGUL FILLER": "isalpha" is True
+    }
+
+# Triplets replacing spaces when inserting gaps.
+TPL_STR_ALT_SPACES = (
+    '\u2800\uFFA0\uFFA0', # "BRAILLE PATTERN BLANK" + "HALFWIDTH HANGUL FILLER" + "HALFWIDTH HANGUL FILLER"
+    '\uFFA0\u2800\uFFA0', # "HALFWIDTH HANGUL FILLER" + "BRAILLE PATTERN BLANK" + "HALFWIDTH HANGUL FILLER"
+    '\uFFA0\uFFA0\u2800', # "HALFWIDTH HANGUL FILLER" + "HALFWIDTH HANGUL FILLER" + "BRAILLE PATTERN BLANK"
+    #
+    '\u200A\uFFA0\uFFA0', # "HAIR SPACE" + "HALFWIDTH HANGUL FILLER" + "HALFWIDTH HANGUL FILLER"
+    '\uFFA0\u200A\uFFA0', # "HALFWIDTH HANGUL FILLER" + "HAIR SPACE" + "HALFWIDTH HANGUL FILLER"
+    '\uFFA0\uFFA0\u200A', # "HALFWIDTH HANGUL FILLER" + "HALFWIDTH HANGUL FILLER" + "HAIR SPACE"
+    )
+
+STR_GAP = '\uFFA0' # "HALFWIDTH HANGUL FILLER"
+STR_NEWLINE_GAP = '\u3164' # "HANGUL FILLER"
+STR_ORIG_SPACE = '\u0020' # "SPACE" width 260
+STR_ORIG_NEWLINE = '\u000A' # "NEW LINE"
+
+
 def add_noise(
         str_input,
-        tpl_str_noise = (
-            '\uFEFF', # ZERO WIDTH NO-BREAK SPACE
-            '\u180E', # MONGOLIAN VOWEL SEPARATOR (zero width)
-            '\u200D', # "ZERO WIDTH JOINER"
-            ),
-        set_non_alpha = {
-            '\u2800', # "BRAILLE PATTERN BLANK": "isalpha" is False
-            '\u200A', # "HAIR SPACE": "isalpha" is False
-            '\u3164', # "HANGUL FILLER": "isalpha" is True
-            },
-        str_gap = '\uFFA0', # "HALFWIDTH HANGUL FILLER"
-        noise_insertion_percent = 0) :
+        tpl_str_noise = TPL_STR_NOISE,
+        set_non_alpha = SET_NON_ALPHA,
+        str_gap = STR_GAP,
+        noise_insertion_percent = 0,
+        str_next = '', # The character following "str_input", if any.
+        random_generator = None) :
 
     if len(tpl_str_noise) > 0 and noise_insertion_percent > 0 :
+        func_choice = choice if random_generator is None else random_generator.choice
+        func_random = random if random_generator is None else random_generator.random
         flt_noise_insertion_prob = noise_insertion_percent / 100.
+        str_text = str_input + str_next
         str_output = ''.join('%s%s' % (
-            str_input[i], choice(tpl_str_noise)
-            if (((str_input[i].isalpha() and str_input[i] not in set_non_alpha)
-                 or str_input[i] == str_gap) and
-                (i + 1) < len(str_input) and
-                (str_input[i+1].isalpha() and str_input[i+1] not in set_non_alpha) and
-                random() <= flt_noise_insertion_prob) else '')
+            str_text[i], func_choice(tpl_str_noise)
+            if (((str_text[i].isalpha() and str_text[i] not in set_non_alpha)
+                 or str_text[i] == str_gap) and
+                (i + 1) < len(str_text) and
+                (str_text[i+1].isalpha() and str_text[i+1] not in set_non_alpha) and
+                func_random() <= flt_noise_insertion_prob) else '')
             for i in range(len(str_input)))
     else :
         str_output = str_input
@@ -895,11 +1101,7 @@ def add_noise(
 
 def remove_noise(
         str_input,
-        tpl_str_noise = (
-            '\uFEFF', # ZERO WIDTH NO-BREAK SPACE
-            '\u180E', # MONGOLIAN VOWEL SEPARATOR (zero width)
-            '\u200D', # "ZERO WIDTH JOINER"
-            ),
+        tpl_str_noise = TPL_STR_NOISE,
         ) :
     str_output = str_input
     if len(tpl_str_noise) > 0 :
@@ -911,52 +1113,41 @@ def remove_noise(
 
 def add_gaps(
         str_input,
-        tpl_str_alt_spaces = (
-            '\u2800\uFFA0\uFFA0', # "BRAILLE PATTERN BLANK" + "HALFWIDTH HANGUL FILLER" + "HALFWIDTH HANGUL FILLER"
-            '\uFFA0\u2800\uFFA0', # "HALFWIDTH HANGUL FILLER" + "BRAILLE PATTERN BLANK" + "HALFWIDTH HANGUL FILLER"
-            '\uFFA0\uFFA0\u2800', # "HALFWIDTH HANGUL FILLER" + "HALFWIDTH HANGUL FILLER" + "BRAILLE PATTERN BLANK"
-            #
-            '\u200A\uFFA0\uFFA0', # "HAIR SPACE" + "HALFWIDTH HANGUL FILLER" + "HALFWIDTH HANGUL FILLER"
-            '\uFFA0\u200A\uFFA0', # "HALFWIDTH HANGUL FILLER" + "HAIR SPACE" + "HALFWIDTH HANGUL FILLER"
-            '\uFFA0\uFFA0\u200A', # "HALFWIDTH HANGUL FILLER" + "HALFWIDTH HANGUL FILLER" + "HAIR SPACE"
-            ),
-        str_gap = '\uFFA0', # "HALFWIDTH HANGUL FILLER"
-        str_orig_space = '\u0020', # "SPACE" width 260
-        str_newline_gap = '\u3164', # "HANGUL FILLER"
-        str_orig_newline = '\u000A', # "NEW LINE"
+        tpl_str_alt_spaces = TPL_STR_ALT_SPACES,
+        str_gap = STR_GAP,
+        str_orig_space = STR_ORIG_SPACE,
+        str_newline_gap = STR_NEWLINE_GAP,
+        str_orig_newline = STR_ORIG_NEWLINE,
+        str_next = '', # The character following "str_input", if any.
+        random_generator = None,
         ) :
-    str_output = str_input
+    func_choice = choice if random_generator is None else random_generator.choice
+    str_output = str_input + str_next
     str_newline_with_gap = str_newline_gap + str_orig_newline
     str_output = ''.join((
         str_newline_with_gap # "HANGUL FILLER" + "NEW LINE"
         if str_output[i] == str_orig_newline # "NEW LINE"
         else str_output[i]) for i in range(len(str_output)))
+    # Only characters of "str_input" are emitted; "str_next" is a lookahead.
+    int_output_length = len(str_input) + str_input.count(str_orig_newline)
     str_output = ''.join('%s%s' % (
-        (choice(tpl_str_alt_spaces) if (
+        (func_choice(tpl_str_alt_spaces) if (
             str_output[i] == str_orig_space)
             else str_output[i]),
         (str_gap if (not str_output[i].isspace() and
                      (i + 1) < len(str_output) and
                      not str_output[i + 1].isspace() and
                      str_output[i + 1] != str_newline_gap) else ''))
-        for i in range(len(str_output)))
+        for i in range(int_output_length))
     return str_output
 
 
 def remove_gaps(
         str_input,
-        tpl_str_alt_spaces = (
-            '\u2800\uFFA0\uFFA0', # "BRAILLE PATTERN BLANK" + "HALFWIDTH HANGUL FILLER" + "HALFWIDTH HANGUL FILLER"
-            '\uFFA0\u2800\uFFA0', # "HALFWIDTH HANGUL FILLER" + "BRAILLE PATTERN BLANK" + "HALFWIDTH HANGUL FILLER"
-            '\uFFA0\uFFA0\u2800', # "HALFWIDTH HANGUL FILLER" + "HALFWIDTH HANGUL FILLER" + "BRAILLE PATTERN BLANK"
-            #
-            '\u200A\uFFA0\uFFA0', # "HAIR SPACE" + "HALFWIDTH HANGUL FILLER" + "HALFWIDTH HANGUL FILLER"
-            '\uFFA0\u200A\uFFA0', # "HALFWIDTH HANGUL FILLER" + "HAIR SPACE" + "HALFWIDTH HANGUL FILLER"
-            '\uFFA0\uFFA0\u200A', # "HALFWIDTH HANGUL FILLER" + "HALFWIDTH HANGUL FILLER" + "HAIR SPACE"
-            ),
-        str_gap = '\uFFA0', # "HALFWIDTH HANGUL FILLER"
-        str_orig_space = '\u0020', # "SPACE" width 260
-        str_newline_gap = '\u3164', # "HANGUL FILLER"
+        tpl_str_alt_spaces = TPL_STR_ALT_SPACES,
+        str_gap = STR_GAP,
+        str_orig_space = STR_ORIG_SPACE,
+        str_newline_gap = STR_NEWLINE_GAP,
         ) :
     set_str_alt_spaces = set("".join(tpl_str_alt_spaces))
     set_str_alt_spaces.remove(str_gap)
@@ -971,51 +1162,1861 @@ def remove_gaps(
     return str_output
 
 
-def obfuscate(
+def add_gaps_and_noise(
+        str_input,
+        tpl_str_alt_spaces = TPL_STR_ALT_SPACES,
+        tpl_str_noise = TPL_STR_NOISE,
+        set_non_alpha = SET_NON_ALPHA,
+        str_gap = STR_GAP,
+        str_orig_space = STR_ORIG_SPACE,
+        str_newline_gap = STR_NEWLINE_GAP,
+        str_orig_newline = STR_ORIG_NEWLINE,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        str_next = '', # The character following "str_input"; not a space with gaps.
+        func_substitute = None, # Optional substitution of each output character.
+        dict_random_generators = None,
+        int_offset = None) : # Position of "str_input" for "CounterRandom" generators.
+    # Single pass equivalent to "add_gaps", then "add_noise", then the
+    # substitution of every output character. Each input character is
+    # classified once and its gap, noise and substitute characters are
+    # emitted into one buffer. The stages draw from their own generators in
+    # the same order as the separate functions, so the output is identical.
+    # With "int_offset", the counter-based generators are moved to the
+    # position of each input character before its draws.
+    if dict_random_generators is None :
+        func_gaps_choice = func_noise_choice = choice
+        func_noise_random = random
+    else :
+        func_gaps_choice = dict_random_generators['gaps'].choice
+        func_noise_choice = dict_random_generators['noise'].choice
+        func_noise_random = dict_random_generators['noise'].random
+    noise_flag = len(tpl_str_noise) > 0 and noise_insertion_percent > 0
+    lst_counter_generators = []
+    if int_offset is not None :
+        lst_counter_generators = list(dict_random_generators.values())
+    elif not gaps_insertion_flag and func_substitute is None :
+        # Noise alone is already a single pass.
+        return add_noise(
+            str_input = str_input,
+            tpl_str_noise = tpl_str_noise,
+            set_non_alpha = set_non_alpha,
+            str_gap = str_gap,
+            noise_insertion_percent = noise_insertion_percent,
+            str_next = str_next,
+            random_generator = (None if dict_random_generators is None
+                                else dict_random_generators['noise']),)
+    flt_noise_insertion_prob = noise_insertion_percent / 100.
+    str_newline_with_gap = str_newline_gap + str_orig_newline
+    str_text = str_input + str_next
+    int_length = len(str_input)
+    lst_output = []
+    func_append = lst_output.append
+    # Noise class of each distinct character, computed once: True if noise
+    # may be inserted next to it (letters and the gap).
+    dict_classes = {str_gap : True}
+    str_pending = None # Random replacement of the next space with gaps.
+    for i in range(int_length) :
+        for random_generator in lst_counter_generators :
+            random_generator.seek(int_offset + i)
+        str_char = str_text[i]
+        str_following = str_text[i + 1] if (i + 1) < len(str_text) else ''
+        if gaps_insertion_flag :
+            if str_char == str_orig_space :
+                str_group = (func_gaps_choice(tpl_str_alt_spaces)
+                             if str_pending is None else str_pending)
+                str_pending = None
+            elif str_char == str_orig_newline :
+                str_group = str_newline_with_gap
+            elif (str_following and not str_char.isspace() and
+                  not str_following.isspace() and
+                  str_following != str_newline_gap) :
+                str_group = str_char + str_gap
+            else :
+                str_group = str_char
+            if str_following == str_orig_space and (i + 1) < int_length :
+                str_pending = func_gaps_choice(tpl_str_alt_spaces)
+                str_following = str_pending[0]
+            elif str_following == str_orig_newline :
+                str_following = str_newline_gap
+        else :
+            str_group = str_char
+        if not noise_flag :
+            if func_substitute is None :
+                func_append(str_group)
+            else :
+                for str_char in str_group :
+                    func_append(func_substitute(str_char))
+            continue
+        int_last = len(str_group) - 1
+        for j in range(int_last + 1) :
+            str_char = str_group[j]
+            func_append(str_char if func_substitute is None
+                        else func_substitute(str_char))
+            str_after = str_group[j + 1] if j < int_last else str_following
+            if not str_after :
+                continue
+            bool_char = dict_classes.get(str_char)
+            if bool_char is None :
+                bool_char = dict_classes[str_char] = (
+                    str_char.isalpha() and str_char not in set_non_alpha)
+            if not bool_char :
+                continue
+            bool_after = dict_classes.get(str_after)
+            if bool_after is None :
+                bool_after = dict_classes[str_after] = (
+                    str_after.isalpha() and str_after not in set_non_alpha)
+            if bool_after and func_noise_random() <= flt_noise_insertion_prob :
+                str_noise = func_noise_choice(tpl_str_noise)
+                func_append(str_noise if func_substitute is None
+                            else func_substitute(str_noise))
+    return ''.join(lst_output)
+
+
+def compile_translation_table(dict_obfuscator) :
+    # Compile an obfuscator with doubled-character keys and values into a
+    # codepoint-keyed table for "str.translate". Returns None if any
+    # character has more than one candidate (random obfuscators).
+    dict_translation_table = {}
+    for (key, value) in dict_obfuscator.items() :
+        if len(set(value)) != 1 :
+            return None
+        dict_translation_table[ord(key[0])] = value[0]
+    return dict_translation_table
+
+
+def compile_reverse_table(dict_obfuscator, gaps_insertion_flag = 0) :
+    # Compose "remove_gaps" (optional), "remove_noise" and the reverse
+    # obfuscator "dict_obfuscator" into one codepoint-keyed table, which
+    # maps alternate spaces to spaces, deletes gap and noise characters, and
+    # maps look-alike symbols back in a single "str.translate" pass. The
+    # empty reverse obfuscator (no obfuscation detected) changes nothing.
+    if not dict_obfuscator :
+        return {}
+    dict_translation_table = compile_translation_table(
+        dict_obfuscator = dict_obfuscator)
+    set_chars = set(chr(x) for x in dict_translation_table.keys())
+    set_chars.update(''.join(TPL_STR_ALT_SPACES))
+    set_chars.update((STR_GAP, STR_NEWLINE_GAP,))
+    set_chars.update(TPL_STR_NOISE)
+    dict_reverse_table = {}
+    for str_char in set_chars :
+        str_output = str_char
+        if gaps_insertion_flag :
+            str_output = remove_gaps(str_input = str_output,)
+        str_output = remove_noise(str_input = str_output,)
+        str_output = str_output.translate(dict_translation_table)
+        dict_reverse_table[ord(str_char)] = str_output if str_output else None
+    return dict_reverse_table
+
+
+def compile_candidate_arrays(dict_obfuscator) :
+    # Compile a random obfuscator into flat NumPy arrays: per-codepoint
+    # offsets and counts into one array of candidate codepoints. Codepoints
+    # without an entry have zero candidates and are left unchanged.
+    int_table_size = max(ord(key[0]) for key in dict_obfuscator.keys()) + 1
+    arr_offsets = np.zeros(int_table_size, dtype = np.int64)
+    arr_counts = np.zeros(int_table_size, dtype = np.int64)
+    lst_candidates = []
+    for (key, value) in dict_obfuscator.items() :
+        str_candidates = value[::2] # Values are sequences of doubled symbols.
+        arr_offsets[ord(key[0])] = len(lst_candidates)
+        arr_counts[ord(key[0])] = len(str_candidates)
+        lst_candidates.extend(ord(x) for x in str_candidates)
+    arr_candidates = np.array(lst_candidates, dtype = np.uint32)
+    return (arr_offsets, arr_counts, arr_candidates)
+
+
+def substitute_numpy(str_input, tpl_candidate_arrays, generator) :
+    # Replace every character having candidates with one of them, drawing all
+    # candidate indices with a single vectorized call of the generator.
+    # Alias arrays (see "compile_alias_arrays") draw weighted candidates.
+    (arr_offsets, arr_counts, arr_candidates) = tpl_candidate_arrays[:3]
+    arr_codepoints = np.frombuffer(
+        str_input.encode('utf-32-le'), dtype = np.uint32).copy()
+    arr_positions = np.flatnonzero(arr_codepoints < len(arr_counts))
+    arr_positions = arr_positions[
+        arr_counts[arr_codepoints[arr_positions]] > 0]
+    arr_keys = arr_codepoints[arr_positions]
+    if len(tpl_candidate_arrays) > 3 :
+        arr_codepoints[arr_positions] = choose_alias_numpy(
+            tpl_alias_arrays = tpl_candidate_arrays,
+            arr_keys = arr_keys,
+            arr_uniforms = generator.random(len(arr_positions)),)
+        return arr_codepoints.tobytes().decode('utf-32-le')
+    arr_choices = (generator.random(len(arr_positions)) *
+                   arr_counts[arr_keys]).astype(np.int64)
+    arr_codepoints[arr_positions] = arr_candidates[
+        arr_offsets[arr_keys] + arr_choices]
+    return arr_codepoints.tobytes().decode('utf-32-le')
+
+
+def load_numpy() :
+    # Import NumPy on first use: it dominates the startup time otherwise.
+    global np
+    if np is None :
+        try :
+            import numpy as np
+        except ImportError :
+            raise ImportError("NumPy is required for the numpy engine.")
+    return np
+
+
+def get_table_cache_stamp() :
+    # Version and modification time and size of the source of the tables.
+    stat_source = os.stat(__file__)
+    return (INT_TABLE_CACHE_VERSION, stat_source.st_mtime_ns,
+            stat_source.st_size,)
+
+
+def load_table_cache() :
+    # Load the persisted tables once per process. A missing, unreadable or
+    # stale cache file is treated as empty.
+    if 'dict_tables' not in DICT_TABLE_CACHE :
+        dict_tables = {}
+        if STR_TABLE_CACHE_FILE :
+            try :
+                with open(STR_TABLE_CACHE_FILE, 'rb') as file :
+                    (tpl_stamp, dict_cached_tables) = marshal.load(file)
+                if tpl_stamp == get_table_cache_stamp() :
+                    dict_tables = dict_cached_tables
+            except (OSError, EOFError, ValueError, TypeError) :
+                pass
+        DICT_TABLE_CACHE['dict_tables'] = dict_tables
+    return DICT_TABLE_CACHE['dict_tables']
+
+
+def store_table_cache(tpl_cache_key, table) :
+    # Add a table to the persisted cache, replacing the cache file
+    # atomically through a temporary file unique to the call, so that
+    # concurrent processes and threads do not clash. An unwritable cache is
+    # ignored.
+    dict_tables = load_table_cache()
+    dict_tables[tpl_cache_key] = table
+    if not STR_TABLE_CACHE_FILE :
+        return
+    str_temp_file_name = None
+    try :
+        os.makedirs(os.path.dirname(STR_TABLE_CACHE_FILE), exist_ok = True)
+        (int_temp_file, str_temp_file_name) = tempfile.mkstemp(
+            dir = os.path.dirname(STR_TABLE_CACHE_FILE),
+            prefix = os.path.basename(STR_TABLE_CACHE_FILE) + '.',
+            suffix = '.tmp')
+        with open(int_temp_file, 'wb') as file :
+            marshal.dump((get_table_cache_stamp(), dict_tables), file)
+        os.replace(str_temp_file_name, STR_TABLE_CACHE_FILE)
+    except OSError :
+        if str_temp_file_name is not None and os.path.exists(str_temp_file_name) :
+            os.remove(str_temp_file_name)
+
+
+def mix64(int_value) :
+    # "SplitMix64" finalizer of a 64-bit integer.
+    int_value = ((int_value ^ (int_value >> 30)) * INT_MIX64_MULTIPLIER_1) & INT_MASK64
+    int_value = ((int_value ^ (int_value >> 27)) * INT_MIX64_MULTIPLIER_2) & INT_MASK64
+    return int_value ^ (int_value >> 31)
+
+
+class CounterRandom :
+    # Counter-based generator of the "counter" scheme: draw k at position i
+    # is the hash of the stage key and the counter i * INT_COUNTER_DRAWS + k,
+    # independent of all other draws and of the "random" module. Provides
+    # the "random" and "choice" methods used by the stages.
+
+    def __init__(self, integer_random_seed, str_stage) :
+        self.int_key = derive_random_seed(
+            integer_random_seed = integer_random_seed,
+            str_key = str_stage,)
+        self._int_counter = 0
+
+    def seek(self, int_position) :
+        self._int_counter = int_position * INT_COUNTER_DRAWS
+
+    def random(self) :
+        int_state = (self.int_key + (self._int_counter + 1) *
+                     INT_GOLDEN_GAMMA) & INT_MASK64
+        self._int_counter += 1
+        return (mix64(int_state) >> 11) * FLT_UNIFORM_SCALE
+
+    def choice(self, seq) :
+        return seq[int(self.random() * len(seq))]
+
+
+def counter_uniforms_numpy(int_key, arr_positions) :
+    # Vectorized first draws of a "CounterRandom" at the given positions.
+    arr_values = (np.uint64(int_key) + (
+        arr_positions.astype(np.uint64) * np.uint64(INT_COUNTER_DRAWS) +
+        np.uint64(1)) * np.uint64(INT_GOLDEN_GAMMA))
+    arr_values = (arr_values ^ (arr_values >> np.uint64(30))) * np.uint64(
+        INT_MIX64_MULTIPLIER_1)
+    arr_values = (arr_values ^ (arr_values >> np.uint64(27))) * np.uint64(
+        INT_MIX64_MULTIPLIER_2)
+    arr_values = arr_values ^ (arr_values >> np.uint64(31))
+    return (arr_values >> np.uint64(11)).astype(np.float64) * FLT_UNIFORM_SCALE
+
+
+def substitute_counter(
+        str_input, dict_obfuscator, random_generator, int_offset,
+        dict_alias_tables = None) :
+    # Replace every character having candidates with the candidate of the
+    # first draw at its position ("int_offset" is the position of
+    # "str_input" in the text), from the alias tables if given.
+    lst_output = []
+    for (i, str_char) in enumerate(str_input) :
+        if dict_alias_tables is not None :
+            tpl_alias_table = dict_alias_tables.get(str_char + str_char)
+            if tpl_alias_table is None :
+                lst_output.append(str_char)
+            else :
+                random_generator.seek(int_offset + i)
+                lst_output.append(choose_alias(
+                    random_generator = random_generator,
+                    tpl_alias_table = tpl_alias_table,))
+            continue
+        str_candidates = dict_obfuscator.get(str_char + str_char)
+        if str_candidates is None :
+            lst_output.append(str_char)
+        else :
+            random_generator.seek(int_offset + i)
+            lst_output.append(random_generator.choice(str_candidates))
+    return ''.join(lst_output)
+
+
+def substitute_counter_numpy(str_input, tpl_candidate_arrays, int_key, int_offset) :
+    # Vectorized "substitute_counter". Candidate strings are doubled, so
+    # the doubled index of "choice" halves to the same candidate. Alias
+    # arrays (see "compile_alias_arrays") draw weighted candidates.
+    (arr_offsets, arr_counts, arr_candidates) = tpl_candidate_arrays[:3]
+    arr_codepoints = np.frombuffer(
+        str_input.encode('utf-32-le'), dtype = np.uint32).copy()
+    arr_positions = np.flatnonzero(arr_codepoints < len(arr_counts))
+    arr_positions = arr_positions[
+        arr_counts[arr_codepoints[arr_positions]] > 0]
+    arr_keys = arr_codepoints[arr_positions]
+    if len(tpl_candidate_arrays) > 3 :
+        arr_codepoints[arr_positions] = choose_alias_numpy(
+            tpl_alias_arrays = tpl_candidate_arrays,
+            arr_keys = arr_keys,
+            arr_uniforms = counter_uniforms_numpy(
+                int_key = int_key, arr_positions = arr_positions + int_offset),)
+        return arr_codepoints.tobytes().decode('utf-32-le')
+    arr_choices = (counter_uniforms_numpy(
+        int_key = int_key, arr_positions = arr_positions + int_offset) *
+        (2 * arr_counts[arr_keys])).astype(np.int64) // 2
+    arr_codepoints[arr_positions] = arr_candidates[
+        arr_offsets[arr_keys] + arr_choices]
+    return arr_codepoints.tobytes().decode('utf-32-le')
+
+
+def build_alias_table(lst_weights) :
+    # Vose's alias method: split the weights into as many equal columns as
+    # there are candidates. Column i keeps candidate i with the probability
+    # "tpl_probabilities[i]" and otherwise gives "tpl_aliases[i]", so a draw
+    # costs one uniform number whatever the number of candidates.
+    int_count = len(lst_weights)
+    flt_total = sum(lst_weights)
+    lst_scaled = [x * int_count / flt_total for x in lst_weights]
+    lst_probabilities = [1.] * int_count
+    lst_aliases = list(range(int_count))
+    lst_small = [i for (i, x) in enumerate(lst_scaled) if x < 1.]
+    lst_large = [i for (i, x) in enumerate(lst_scaled) if x >= 1.]
+    while lst_small and lst_large :
+        int_small = lst_small.pop()
+        int_large = lst_large[-1]
+        lst_probabilities[int_small] = lst_scaled[int_small]
+        lst_aliases[int_small] = int_large
+        lst_scaled[int_large] -= 1. - lst_scaled[int_small]
+        if lst_scaled[int_large] < 1. :
+            lst_small.append(lst_large.pop())
+    # Columns left over (rounding errors) keep their candidate.
+    return (tuple(lst_probabilities), tuple(lst_aliases))
+
+
+def get_lookalike_rank(str_original, str_candidate) :
+    # Sort key of the look-alikes of a character, closest first: fewer marks
+    # added to the base letter (combining marks of the canonical
+    # decomposition, or a hook, stroke, etc. named "... WITH ..."), then the
+    # base letter named like the original (e.g. "CYRILLIC SMALL LETTER A"
+    # before "GREEK SMALL LETTER ALPHA" for "a"). The obfuscators list
+    # candidates roughly by codepoint, not by likeness.
+    def get_letter_name(str_char) :
+        return unicodedata.name(str_char, '').partition(' LETTER ')[2]
+
+    str_decomposed = unicodedata.normalize('NFD', str_candidate)
+    (str_base_name, str_with, str_marks) = get_letter_name(
+        str_decomposed[0]).partition(' WITH ')
+    return (sum(1 for x in str_decomposed[1:] if unicodedata.combining(x)) +
+            (1 if str_with else 0),
+            str_base_name != get_letter_name(str_original))
+
+
+def compile_alias_tables(dict_obfuscator, candidate_weights) :
+    # Compile an obfuscator into alias tables of weighted candidates, with
+    # the doubled-character keys of the obfuscator. "candidate_weights" is
+    # (keep_original_percent, lookalike_decay): the look-alikes (candidates
+    # other than the original character) are weighted by "lookalike_decay"
+    # to the power of their rank (see "get_lookalike_rank"). The original
+    # character gets exactly "keep_original_percent" if not None, and
+    # otherwise its probability of the uniform choice.
+    (keep_original_percent, lookalike_decay) = candidate_weights
+    dict_alias_tables = {}
+    for (key, value) in dict_obfuscator.items() :
+        str_original = key[0]
+        # Values are sequences of doubled symbols.
+        lst_candidates = list(value[::2])
+        if keep_original_percent is not None :
+            flt_keep_percent = keep_original_percent
+        else :
+            flt_keep_percent = (100. * lst_candidates.count(str_original) /
+                                len(lst_candidates))
+        lst_candidates = sorted(
+            (x for x in lst_candidates if x != str_original),
+            key = lambda x : get_lookalike_rank(
+                str_original = str_original, str_candidate = x))
+        lst_weights = [lookalike_decay ** i for i in range(len(lst_candidates))]
+        if lst_weights :
+            flt_total = sum(lst_weights)
+            lst_weights = [x * (100 - flt_keep_percent) / flt_total
+                           for x in lst_weights]
+        if flt_keep_percent > 0 or not lst_candidates :
+            lst_candidates.append(str_original)
+            lst_weights.append(flt_keep_percent or 1)
+        dict_alias_tables[key] = (''.join(lst_candidates),) + build_alias_table(
+            lst_weights = lst_weights)
+    return dict_alias_tables
+
+
+def compile_alias_arrays(dict_obfuscator, candidate_weights) :
+    # Compile the alias tables into flat NumPy arrays: per-codepoint offsets
+    # and counts into arrays of candidate codepoints, keep probabilities and
+    # (absolute) alias indices.
+    dict_alias_tables = get_compiled_table(
+        func_compile = compile_alias_tables,
+        dict_obfuscator = dict_obfuscator,
+        candidate_weights = candidate_weights,)
+    int_table_size = max(ord(key[0]) for key in dict_alias_tables.keys()) + 1
+    arr_offsets = np.zeros(int_table_size, dtype = np.int64)
+    arr_counts = np.zeros(int_table_size, dtype = np.int64)
+    lst_candidates = []
+    lst_probabilities = []
+    lst_aliases = []
+    for (key, (str_candidates, tpl_probabilities, tpl_aliases)) in (
+            dict_alias_tables.items()) :
+        arr_offsets[ord(key[0])] = len(lst_candidates)
+        arr_counts[ord(key[0])] = len(str_candidates)
+        lst_aliases.extend(len(lst_candidates) + x for x in tpl_aliases)
+        lst_candidates.extend(ord(x) for x in str_candidates)
+        lst_probabilities.extend(tpl_probabilities)
+    return (arr_offsets, arr_counts, np.array(lst_candidates, dtype = np.uint32),
+            np.array(lst_probabilities, dtype = np.float64),
+            np.array(lst_aliases, dtype = np.int64))
+
+
+def choose_alias(random_generator, tpl_alias_table) :
+    # Draw a candidate from an alias table with one uniform number: its
+    # integer part selects the column and its fraction the candidate or the
+    # alias of the column.
+    (str_candidates, tpl_probabilities, tpl_aliases) = tpl_alias_table
+    flt_scaled = random_generator.random() * len(str_candidates)
+    int_column = int(flt_scaled)
+    if flt_scaled - int_column < tpl_probabilities[int_column] :
+        return str_candidates[int_column]
+    return str_candidates[tpl_aliases[int_column]]
+
+
+def choose_alias_numpy(tpl_alias_arrays, arr_keys, arr_uniforms) :
+    # Vectorized "choose_alias" for the codepoints "arr_keys".
+    (arr_offsets, arr_counts, arr_candidates,
+     arr_probabilities, arr_aliases) = tpl_alias_arrays
+    arr_scaled = arr_uniforms * arr_counts[arr_keys]
+    arr_columns = arr_scaled.astype(np.int64)
+    arr_indices = arr_offsets[arr_keys] + arr_columns
+    arr_indices = np.where(
+        arr_scaled - arr_columns < arr_probabilities[arr_indices],
+        arr_indices, arr_aliases[arr_indices])
+    return arr_candidates[arr_indices]
+
+
+def get_candidate_weights(keep_original_percent = None, lookalike_decay = None) :
+    # Return the "candidate_weights" of "compile_alias_tables", or None for
+    # uniform choices among the candidates (the default obfuscation).
+    if keep_original_percent is None and lookalike_decay is None :
+        return None
+    if keep_original_percent is not None and not 0 <= keep_original_percent <= 100 :
+        raise ValueError("Keep original percent must be between 0 and 100.")
+    if lookalike_decay is not None and not 0 < lookalike_decay <= 1 :
+        raise ValueError("Look-alike decay must be in range (0; 1].")
+    return (keep_original_percent,
+            1. if lookalike_decay is None else float(lookalike_decay),)
+
+
+def compile_ascii_replacements(
+        dict_obfuscator, gaps_insertion_flag = 0, reverse_obfuscation_flag = 0) :
+    # Compile the translation (or reverse) table of a deterministic
+    # obfuscator into (byte, UTF-8 output) pairs of the ASCII characters it
+    # changes, for a chain of "bytes.replace" over ASCII input. Outputs
+    # consist of non-ASCII bytes only (or are empty), so no replacement
+    # changes the output of another one. Returns None otherwise.
+    if reverse_obfuscation_flag :
+        dict_translation_table = get_compiled_table(
+            func_compile = compile_reverse_table,
+            dict_obfuscator = dict_obfuscator,
+            gaps_insertion_flag = gaps_insertion_flag,)
+    else :
+        dict_translation_table = get_compiled_table(
+            func_compile = compile_translation_table,
+            dict_obfuscator = dict_obfuscator)
+    if dict_translation_table is None :
+        return None
+    lst_replacements = []
+    for int_byte in range(0x80) :
+        str_output = dict_translation_table.get(int_byte, chr(int_byte))
+        if str_output == chr(int_byte) :
+            continue
+        bytes_output = (str_output or '').encode('utf-8')
+        if not all(x >= 0x80 for x in bytes_output) :
+            return None
+        lst_replacements.append((bytes((int_byte,)), bytes_output))
+    return tuple(lst_replacements)
+
+
+def get_compiled_table(func_compile, dict_obfuscator, **kwargs) :
+    # Compile "dict_obfuscator" with "func_compile" once per process. Tables
+    # of the obfuscator types are also persisted across processes.
+    tpl_key = (func_compile.__name__, id(dict_obfuscator),
+               tuple(sorted(kwargs.items())))
+    if tpl_key not in DICT_COMPILED_TABLES :
+        tpl_cache_key = None
+        if (func_compile.__name__ in TPL_PERSISTED_TABLES and
+                id(dict_obfuscator) in DICT_OBFUSCATOR_CACHE_KEYS and
+                kwargs.get('candidate_weights') is None) :
+            tpl_cache_key = ((func_compile.__name__,) +
+                             DICT_OBFUSCATOR_CACHE_KEYS[id(dict_obfuscator)] +
+                             tuple(sorted(kwargs.items())))
+        if tpl_cache_key is not None and tpl_cache_key in load_table_cache() :
+            table = load_table_cache()[tpl_cache_key]
+        else :
+            table = func_compile(dict_obfuscator = dict_obfuscator, **kwargs)
+            if tpl_cache_key is not None :
+                store_table_cache(tpl_cache_key = tpl_cache_key, table = table)
+        DICT_COMPILED_TABLES[tpl_key] = (dict_obfuscator, table)
+    return DICT_COMPILED_TABLES[tpl_key][1]
+
+
+def create_random_generators(integer_random_seed, rng_scheme = 'sequential') :
+    # Each random stage gets its own generator derived from the seed, so that
+    # every stage consumes its random sequence in text order no matter how
+    # the text is split into chunks.
+    if integer_random_seed is None :
+        integer_random_seed = datetime.now().timestamp()
+    if rng_scheme == 'counter' :
+        return {str_stage : CounterRandom(
+                    integer_random_seed = integer_random_seed,
+                    str_stage = str_stage,)
+                for str_stage in TPL_RANDOM_STAGES}
+    return {str_stage : Random('%s:%s' % (integer_random_seed, str_stage))
+            for str_stage in TPL_RANDOM_STAGES}
+
+
+def create_candidate_chooser(dict_obfuscator, random_generator, candidate_weights = None) :
+    # Return a function replacing one character with one of its candidates,
+    # chosen uniformly or, with "candidate_weights", from its alias table.
+    if candidate_weights is None :
+        return lambda x : random_generator.choice(dict_obfuscator.get(x + x, x))
+    dict_alias_tables = get_compiled_table(
+        func_compile = compile_alias_tables,
+        dict_obfuscator = dict_obfuscator,
+        candidate_weights = candidate_weights,)
+    return lambda x : (choose_alias(
+        random_generator = random_generator,
+        tpl_alias_table = dict_alias_tables[x + x])
+        if x + x in dict_alias_tables else x)
+
+
+def create_substitution(
+        dict_obfuscator, random_generator, engine = 'python',
+        candidate_weights = None) :
+    # Return a function replacing characters of a text (chunk) with their
+    # candidates from "dict_obfuscator", weighted by "candidate_weights" (see
+    # "compile_alias_tables") if given.
+    if candidate_weights is not None :
+        if engine == 'numpy' :
+            load_numpy()
+            tpl_alias_arrays = get_compiled_table(
+                func_compile = compile_alias_arrays,
+                dict_obfuscator = dict_obfuscator,
+                candidate_weights = candidate_weights,)
+            generator = np.random.default_rng(random_generator.getrandbits(128))
+            return lambda str_input : substitute_numpy(
+                str_input = str_input,
+                tpl_candidate_arrays = tpl_alias_arrays,
+                generator = generator,)
+        func_choose = create_candidate_chooser(
+            dict_obfuscator = dict_obfuscator,
+            random_generator = random_generator,
+            candidate_weights = candidate_weights,)
+        return lambda str_input : ''.join(map(func_choose, str_input))
+    dict_translation_table = get_compiled_table(
+        func_compile = compile_translation_table,
+        dict_obfuscator = dict_obfuscator)
+    if dict_translation_table is not None :
+        # Deterministic and reverse obfuscators have a single candidate per
+        # character, so the whole text is mapped at once without "choice".
+        return lambda str_input : str_input.translate(dict_translation_table)
+    if engine == 'numpy' :
+        load_numpy()
+        tpl_candidate_arrays = get_compiled_table(
+            func_compile = compile_candidate_arrays,
+            dict_obfuscator = dict_obfuscator)
+        generator = np.random.default_rng(random_generator.getrandbits(128))
+        return lambda str_input : substitute_numpy(
+            str_input = str_input,
+            tpl_candidate_arrays = tpl_candidate_arrays,
+            generator = generator,)
+    return lambda str_input : ''.join(tuple(map(lambda x : random_generator.choice(
+        dict_obfuscator.get(x + x, x)), str_input)))
+
+
+def create_counter_substitution(
+        dict_obfuscator, random_generator, engine = 'python',
+        candidate_weights = None) :
+    # Return a function replacing characters of a text (chunk) at a position
+    # with their candidates drawn by a "CounterRandom" generator. Both
+    # engines give identical output.
+    if engine == 'numpy' :
+        load_numpy()
+        if candidate_weights is None :
+            tpl_candidate_arrays = get_compiled_table(
+                func_compile = compile_candidate_arrays,
+                dict_obfuscator = dict_obfuscator)
+        else :
+            tpl_candidate_arrays = get_compiled_table(
+                func_compile = compile_alias_arrays,
+                dict_obfuscator = dict_obfuscator,
+                candidate_weights = candidate_weights,)
+        return lambda str_input, int_offset : substitute_counter_numpy(
+            str_input = str_input,
+            tpl_candidate_arrays = tpl_candidate_arrays,
+            int_key = random_generator.int_key,
+            int_offset = int_offset,)
+    dict_alias_tables = None
+    if candidate_weights is not None :
+        dict_alias_tables = get_compiled_table(
+            func_compile = compile_alias_tables,
+            dict_obfuscator = dict_obfuscator,
+            candidate_weights = candidate_weights,)
+    return lambda str_input, int_offset : substitute_counter(
+        str_input = str_input,
+        dict_obfuscator = dict_obfuscator,
+        random_generator = random_generator,
+        int_offset = int_offset,
+        dict_alias_tables = dict_alias_tables,)
+
+
+def create_pipeline(
+        dict_obfuscator,
+        dict_random_generators,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        reverse_obfuscation_flag = 0,
+        engine = 'python',
+        rng_scheme = 'sequential',
+        int_offset = 0,
+        candidate_weights = None) :
+    # Return the list of stages as (name, function, lookahead flag) tuples.
+    # Stage functions take the text and the character following it
+    # ("str_next"). With the counter scheme, the stages keep track of the
+    # position of the text passed to them, starting at "int_offset".
+    # "candidate_weights" (see "compile_alias_tables") weight the forward
+    # substitution, also of deterministic obfuscators.
+    lst_stages = []
+    counter_flag = rng_scheme == 'counter'
+    random_flag = candidate_weights is not None or get_compiled_table(
+        func_compile = compile_translation_table,
+        dict_obfuscator = dict_obfuscator) is None
+    lst_offset = [int_offset]
+    if reverse_obfuscation_flag :
+        # Removing gaps and noise and the reverse obfuscation are composed
+        # into one table.
+        dict_reverse_table = get_compiled_table(
+            func_compile = compile_reverse_table,
+            dict_obfuscator = dict_obfuscator,
+            gaps_insertion_flag = 1 if gaps_insertion_flag else 0,)
+        lst_stages.append(('recovery', lambda str_input, str_next :
+            str_input.translate(dict_reverse_table), False))
+        return lst_stages
+    elif gaps_insertion_flag or noise_insertion_percent > 0 :
+        # Adding gaps and noise must be done before obfuscation. Both are
+        # fused into one pass, together with the per-character random
+        # substitution of the python engine (of both engines with the
+        # counter scheme: only the fused pass knows the input positions).
+        func_substitute = None
+        if (engine == 'python' or counter_flag) and random_flag :
+            func_substitute = create_candidate_chooser(
+                dict_obfuscator = dict_obfuscator,
+                random_generator = dict_random_generators['substitution'],
+                candidate_weights = candidate_weights,)
+        lst_stage_names = []
+        if gaps_insertion_flag :
+            lst_stage_names.append('gaps')
+        if noise_insertion_percent > 0 :
+            lst_stage_names.append('noise')
+        if func_substitute is not None :
+            lst_stage_names.append('substitution')
+        str_stage = '+'.join(lst_stage_names)
+
+        def func_gaps_and_noise(str_input, str_next) :
+            str_output = add_gaps_and_noise(
+                str_input = str_input,
+                gaps_insertion_flag = gaps_insertion_flag,
+                noise_insertion_percent = noise_insertion_percent,
+                str_next = str_next,
+                func_substitute = func_substitute,
+                dict_random_generators = dict_random_generators,
+                int_offset = lst_offset[0] if counter_flag else None,)
+            lst_offset[0] += len(str_input)
+            return str_output
+
+        lst_stages.append((str_stage, func_gaps_and_noise, True))
+        if func_substitute is not None :
+            return lst_stages
+    elif counter_flag and random_flag :
+        func_counter_substitution = create_counter_substitution(
+            dict_obfuscator = dict_obfuscator,
+            random_generator = dict_random_generators['substitution'],
+            engine = engine,
+            candidate_weights = candidate_weights,)
+
+        def func_substitution_at_offset(str_input, str_next) :
+            str_output = func_counter_substitution(str_input, lst_offset[0])
+            lst_offset[0] += len(str_input)
+            return str_output
+
+        lst_stages.append(('substitution', func_substitution_at_offset, False))
+        return lst_stages
+
+    # Obfuscation:
+    func_substitution = create_substitution(
+        dict_obfuscator = dict_obfuscator,
+        random_generator = dict_random_generators['substitution'],
+        engine = engine,
+        candidate_weights = candidate_weights,)
+    lst_stages.append(('substitution', lambda str_input, str_next :
+        func_substitution(str_input), False))
+    return lst_stages
+
+
+def apply_pipeline(str_input, lst_stages) :
+    # Run the stages of the pipeline over a whole text.
+    str_output = str_input
+    for (str_stage, func_stage, lookahead_flag) in lst_stages :
+        str_output = func_stage(str_output, '')
+    return str_output
+
+
+def stream_with_lookahead(iter_str_chunks, func_stage) :
+    # Apply "func_stage" to a stream of text chunks. The last non-space
+    # character of each chunk and any spaces after it are held back, so the
+    # character following each processed part is known and is never a space
+    # (with gaps, the replacement of a space is random).
+    str_pending = ''
+    for str_chunk in iter_str_chunks :
+        str_text = str_pending + str_chunk
+        int_end = len(str_text.rstrip(' ')) - 1
+        if int_end > 0 :
+            yield func_stage(str_text[:int_end], str_text[int_end])
+            str_pending = str_text[int_end:]
+        else :
+            str_pending = str_text
+    if str_pending :
+        yield func_stage(str_pending, '')
+
+
+def stream_pipeline(iter_str_chunks, lst_stages) :
+    # Chain the stages of the pipeline over a stream of text chunks.
+    for (str_stage, func_stage, lookahead_flag) in lst_stages :
+        if lookahead_flag :
+            iter_str_chunks = stream_with_lookahead(
+                iter_str_chunks = iter_str_chunks,
+                func_stage = func_stage,)
+        else :
+            iter_str_chunks = map(
+                lambda str_chunk, func_stage = func_stage : func_stage(
+                    str_chunk, ''), iter_str_chunks)
+    return iter_str_chunks
+
+
+def time_stages(lst_stages, dict_stage_seconds) :
+    # Wrap the stages of the pipeline to accumulate their wall time by name.
+
+    def time_stage(str_stage, func_stage) :
+        def func_timed_stage(str_input, str_next) :
+            flt_start = time.perf_counter()
+            str_output = func_stage(str_input, str_next)
+            dict_stage_seconds[str_stage] = (
+                dict_stage_seconds.get(str_stage, 0.) +
+                time.perf_counter() - flt_start)
+            return str_output
+        return func_timed_stage
+
+    return [(str_stage, time_stage(str_stage, func_stage), lookahead_flag)
+            for (str_stage, func_stage, lookahead_flag) in lst_stages]
+
+
+def time_chunks(iter_str_chunks, dict_stage_seconds, counter_chars) :
+    # Accumulate the time spent reading a stream of text chunks and count
+    # their characters.
+    iterator_chunks = iter(iter_str_chunks)
+    while True :
+        flt_start = time.perf_counter()
+        str_chunk = next(iterator_chunks, None)
+        dict_stage_seconds['read'] += time.perf_counter() - flt_start
+        if str_chunk is None :
+            return
+        counter_chars.update(str_chunk)
+        yield str_chunk
+
+
+def summarize_stats(
+        dict_stage_seconds,
+        counter_input,
+        counter_output,
+        dict_obfuscator,
+        gaps_insertion_flag = 0,
+        reverse_obfuscation_flag = 0) :
+    # Estimate the counters from the characters of the input and the output,
+    # not from the operations of the stages: only the substitution removes
+    # the characters replaced by the obfuscator (except spaces replaced by
+    # gaps), and gap and noise characters are only inserted (or only removed
+    # by recovery). Characters of the input which the stages also produce
+    # offset the counts, hence the "estimated_" prefix of their keys.
+    dict_substitutions = {}
+    for key in dict_obfuscator.keys() :
+        if (gaps_insertion_flag and not reverse_obfuscation_flag and
+                key[0] == STR_ORIG_SPACE) :
+            continue
+        int_count = counter_input[key[0]] - counter_output[key[0]]
+        if int_count > 0 :
+            dict_substitutions[key[0]] = int_count
+    int_noise_chars = sum(counter_output[x] - counter_input[x]
+                          for x in TPL_STR_NOISE)
+    int_gap_chars = sum(counter_output[x] - counter_input[x]
+                        for x in (STR_GAP, STR_NEWLINE_GAP,))
+    return {
+        'stage_seconds' : dict(dict_stage_seconds),
+        'chars_in' : sum(counter_input.values()),
+        'chars_out' : sum(counter_output.values()),
+        'estimated_substitutions_total' : sum(dict_substitutions.values()),
+        'estimated_substitutions' : dict_substitutions,
+        'estimated_noise_chars_inserted' : max(int_noise_chars, 0),
+        'estimated_noise_chars_removed' : max(-int_noise_chars, 0),
+        'estimated_gap_chars_inserted' : max(int_gap_chars, 0),
+        'estimated_gap_chars_removed' : max(-int_gap_chars, 0),
+        }
+
+
+def decode_blocks(iter_bytes_blocks) :
+    # Decode UTF-8 byte blocks incrementally, so sequences straddling blocks
+    # are decoded correctly. Newlines are translated the same way as for
+    # text files.
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder('utf-8')(), translate = True)
+    for bytes_block in iter_bytes_blocks :
+        str_chunk = decoder.decode(bytes_block)
+        if str_chunk :
+            yield str_chunk
+    str_chunk = decoder.decode(b'', final = True)
+    if str_chunk :
+        yield str_chunk
+
+
+def read_blocks(input_file_name, chunk_size, mmap_flag = 0) :
+    # Yield the input bytes in blocks of up to "chunk_size" bytes. A
+    # memory-mapped input is read in windows without copying the whole
+    # file. The standard input ("-") yields as soon as bytes are available,
+    # so a pipeline is not held up by a partial buffer.
+    if input_file_name == STR_STDIO :
+        yield from iter(partial(sys.stdin.buffer.read1, chunk_size), b'')
+    elif mmap_flag :
+        with open(input_file_name, 'rb') as file :
+            if os.fstat(file.fileno()).st_size == 0 :
+                return
+            with mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as mm :
+                for i in range(0, len(mm), chunk_size) :
+                    yield mm[i : i + chunk_size]
+    else :
+        with open(input_file_name, 'rb') as file :
+            yield from iter(partial(file.read, chunk_size), b'')
+
+
+def read_chunks(input_file_name, chunk_size, mmap_flag = 0) :
+    # Yield the input text in chunks (see "read_blocks"), decoded
+    # incrementally from the standard input and a memory-mapped input.
+    if input_file_name == STR_STDIO or mmap_flag :
+        yield from decode_blocks(
+            iter_bytes_blocks = read_blocks(
+                input_file_name = input_file_name,
+                chunk_size = chunk_size,
+                mmap_flag = mmap_flag,))
+    else :
+        with open(input_file_name, 'r', encoding='utf-8') as file :
+            str_chunk = file.read(chunk_size)
+            while str_chunk :
+                yield str_chunk
+                str_chunk = file.read(chunk_size)
+
+
+def open_input(input_file_name, newline = None) :
+    # Open the input text file, or the standard input for "-" (which is not
+    # closed on exit).
+    if input_file_name == STR_STDIO :
+        return open(sys.stdin.fileno(), "r", encoding='utf-8',
+                    newline = newline, closefd = False)
+    return open(input_file_name, "r", encoding='utf-8', newline = newline)
+
+
+def get_output_size_bound(
+        dict_obfuscator,
+        int_input_size,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        reverse_obfuscation_flag = 0) :
+    # Upper bound of the UTF-8 output size for an input of "int_input_size"
+    # bytes. Recovery only shortens the text. Obfuscation replaces a
+    # character with a candidate (or a space with alternate spaces), and
+    # adds at most a gap and a noise character after it; the worst case is
+    # an ASCII input.
+    if reverse_obfuscation_flag :
+        return int_input_size
+    int_char_size = max(len(x.encode('utf-8'))
+                        for value in dict_obfuscator.values() for x in value)
+    if gaps_insertion_flag :
+        int_char_size = max(int_char_size, max(
+            len(x.encode('utf-8')) for x in TPL_STR_ALT_SPACES),
+            len((STR_NEWLINE_GAP + STR_ORIG_NEWLINE).encode('utf-8')))
+        int_char_size += len(STR_GAP.encode('utf-8'))
+    if noise_insertion_percent > 0 :
+        int_char_size += max(len(x.encode('utf-8')) for x in TPL_STR_NOISE)
+    return int_input_size * int_char_size
+
+
+def get_output_mmap_size(
+        dict_obfuscator, input_file_name, output_file_name,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        reverse_obfuscation_flag = 0,
+        mmap_flag = 0) :
+    # The size to preallocate for a memory-mapped output file (see
+    # "open_output"), or None to write the output file as usual.
+    if not mmap_flag or output_file_name == STR_STDIO :
+        return None
+    return get_output_size_bound(
+        dict_obfuscator = dict_obfuscator,
+        int_input_size = (0 if input_file_name == STR_STDIO
+                          else os.path.getsize(input_file_name)),
+        gaps_insertion_flag = gaps_insertion_flag,
+        noise_insertion_percent = noise_insertion_percent,
+        reverse_obfuscation_flag = reverse_obfuscation_flag,)
+
+
+class MmapWriter :
+    # File-like writer of text (encoded to UTF-8, with "\n" written as
+    # "os.linesep") or bytes straight into a memory-mapped output file. The
+    # file is preallocated (sparse) with "int_size" bytes, grown by doubling
+    # if needed, and truncated to the bytes written on close, so the output
+    # is never held in memory as a whole.
+
+    def __init__(self, output_file_name, int_size) :
+        self._file = open(output_file_name, 'w+b')
+        self._int_position = 0
+        self._int_size = max(int_size, mmap.PAGESIZE)
+        self._file.truncate(self._int_size)
+        self._mm = mmap.mmap(self._file.fileno(), self._int_size)
+
+    def write(self, data) :
+        if isinstance(data, str) :
+            if os.linesep != '\n' :
+                data = data.replace('\n', os.linesep)
+            data = data.encode('utf-8')
+        int_end = self._int_position + len(data)
+        if int_end > self._int_size :
+            self._mm.close()
+            self._int_size = max(int_end, 2 * self._int_size)
+            self._file.truncate(self._int_size)
+            self._mm = mmap.mmap(self._file.fileno(), self._int_size)
+        self._mm[self._int_position : int_end] = data
+        self._int_position = int_end
+        return len(data)
+
+    def flush(self) :
+        self._mm.flush()
+
+    def close(self) :
+        if self._file.closed :
+            return
+        self._mm.close()
+        self._file.truncate(self._int_position)
+        self._file.close()
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, *args) :
+        self.close()
+
+
+def open_output(output_file_name, newline = None, binary_flag = 0, int_mmap_size = None) :
+    # Open the output text (or binary) file, or the standard output for "-"
+    # (which is not closed on exit). With "int_mmap_size", a file is written
+    # through a memory map of (initially) that many bytes (see "MmapWriter").
+    if int_mmap_size is not None and output_file_name != STR_STDIO :
+        return MmapWriter(output_file_name = output_file_name, int_size = int_mmap_size)
+    if binary_flag :
+        if output_file_name == STR_STDIO :
+            sys.stdout.flush()
+            return open(sys.stdout.fileno(), "wb", closefd = False)
+        return open(output_file_name, "wb")
+    if output_file_name == STR_STDIO :
+        sys.stdout.flush()
+        return open(sys.stdout.fileno(), "w", encoding='utf-8',
+                    newline = newline, closefd = False)
+    return open(output_file_name, "w", encoding='utf-8', newline = newline)
+
+
+def translate_blocks(iter_bytes_blocks, dict_translation_table, tpl_ascii_replacements) :
+    # Translate UTF-8 byte blocks with a codepoint-keyed table into UTF-8
+    # byte blocks. ASCII blocks (most of them for most texts) are never
+    # decoded: their bytes are replaced with "tpl_ascii_replacements" (see
+    # "compile_ascii_replacements"). Other blocks are decoded incrementally
+    # and translated as text. Newlines are translated as for text files:
+    # "\r\n" and "\r" are read as "\n", which is written as "os.linesep".
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    bytes_linesep = os.linesep.encode('ascii')
+    bytes_carry = b''
+    for bytes_block in iter_bytes_blocks :
+        if bytes_carry :
+            bytes_block = bytes_carry + bytes_block
+            bytes_carry = b''
+        if bytes_block.endswith(b'\r') :
+            # The "\n" of a "\r\n" may start the next block.
+            (bytes_block, bytes_carry) = (bytes_block[:-1], b'\r')
+        if b'\r' in bytes_block :
+            bytes_block = bytes_block.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        if bytes_block.isascii() and not decoder.getstate()[0] :
+            for (bytes_input, bytes_output) in tpl_ascii_replacements :
+                bytes_block = bytes_block.replace(bytes_input, bytes_output)
+        else :
+            bytes_block = decoder.decode(bytes_block).translate(
+                dict_translation_table).encode('utf-8')
+        if bytes_linesep != b'\n' :
+            bytes_block = bytes_block.replace(b'\n', bytes_linesep)
+        if bytes_block :
+            yield bytes_block
+    bytes_block = (decoder.decode(b'\n' if bytes_carry else b'', final = True).translate(
+        dict_translation_table).encode('utf-8'))
+    if bytes_block :
+        yield bytes_block.replace(b'\n', bytes_linesep)
+
+
+def read_safe_chunks(iter_str_chunks, chunk_size) :
+    # Regroup a stream of text into (chunk index, chunk, next character,
+    # chunk position) tuples of "chunk_size" characters. A chunk is never
+    # followed by a space: the replacement of a space with gaps is random, so
+    # the following character must be known to obfuscate a chunk by itself.
+    int_chunk_index = 0
+    int_offset = 0
+    str_buffer = ''
+    for str_block in iter_str_chunks :
+        str_buffer += str_block
+        while len(str_buffer) > chunk_size :
+            int_end = chunk_size
+            while int_end < len(str_buffer) and str_buffer[int_end] == ' ' :
+                int_end += 1
+            if int_end >= len(str_buffer) :
+                break
+            yield (int_chunk_index, str_buffer[:int_end], str_buffer[int_end],
+                   int_offset)
+            int_chunk_index += 1
+            int_offset += int_end
+            str_buffer = str_buffer[int_end:]
+    if str_buffer :
+        yield (int_chunk_index, str_buffer, '', int_offset)
+
+
+def init_chunk_worker(dict_obfuscator, engine) :
+    # Keep the obfuscator and its compiled tables once per worker process.
+    DICT_CHUNK_WORKER['dict_obfuscator'] = dict_obfuscator
+    create_substitution(
+        dict_obfuscator = dict_obfuscator,
+        random_generator = Random(),
+        engine = engine,)
+
+
+def obfuscate_chunk(
+        tpl_task,
+        integer_random_seed,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        reverse_obfuscation_flag = 0,
+        engine = 'python',
+        rng_scheme = 'sequential',
+        stats_flag = 0,
+        candidate_weights = None) :
+    # Obfuscate one chunk with randomness derived from (seed, chunk index),
+    # or from (seed, character position) with the counter scheme, which
+    # gives the same output as a single pass over the whole text.
+    # Return the chunk and the wall time of its stages (if "stats_flag").
+    (int_chunk_index, str_chunk, str_next, int_offset) = tpl_task
+    if rng_scheme != 'counter' :
+        integer_random_seed = derive_random_seed(
+            integer_random_seed = integer_random_seed,
+            str_key = int_chunk_index,)
+    lst_stages = create_pipeline(
+        dict_obfuscator = DICT_CHUNK_WORKER['dict_obfuscator'],
+        dict_random_generators = create_random_generators(
+            integer_random_seed = integer_random_seed,
+            rng_scheme = rng_scheme,),
+        gaps_insertion_flag = gaps_insertion_flag,
+        noise_insertion_percent = noise_insertion_percent,
+        reverse_obfuscation_flag = reverse_obfuscation_flag,
+        engine = engine,
+        rng_scheme = rng_scheme,
+        int_offset = int_offset,
+        candidate_weights = candidate_weights,)
+    dict_stage_seconds = {}
+    if stats_flag :
+        lst_stages = time_stages(
+            lst_stages = lst_stages,
+            dict_stage_seconds = dict_stage_seconds,)
+    int_last_lookahead = max([i for (i, (str_stage, func_stage, lookahead_flag))
+                              in enumerate(lst_stages) if lookahead_flag],
+                             default = -1)
+    for (i, (str_stage, func_stage, lookahead_flag)) in enumerate(lst_stages) :
+        str_next_output = ''
+        if str_next and i < int_last_lookahead :
+            # The next chunk starts with a non-space character, whose
+            # leading output does not depend on randomness or lookahead.
+            str_next_output = func_stage(str_next, '')[:1]
+        str_chunk = func_stage(str_chunk, str_next)
+        str_next = str_next_output
+    return (str_chunk, dict_stage_seconds)
+
+
+def obfuscate_parallel(
         dict_obfuscator, integer_random_seed,
         input_file_name, output_file_name,
         gaps_insertion_flag = 0,
         noise_insertion_percent = 0,
-        verbosity_flag = 0,
-        reverse_obfuscation_flag = 0) :
+        reverse_obfuscation_flag = 0,
+        engine = 'python',
+        chunk_size = 0,
+        jobs = None,
+        mmap_flag = 0,
+        rng_scheme = 'sequential',
+        dict_stats = None,
+        candidate_weights = None) :
+    # Split the input into chunks at safe boundaries and obfuscate them on a
+    # process pool. Reader and writer threads overlap with the computation
+    # through bounded queues, and the output is stitched in chunk order.
+    # It is identical for any number of jobs with the same seed (and to the
+    # output of a single process with the counter scheme). Stage times
+    # are collected into "dict_stats" (if given) and summed over workers.
+    from concurrent.futures import ProcessPoolExecutor
 
     if integer_random_seed is None :
-        seed(datetime.now().timestamp())
+        integer_random_seed = datetime.now().timestamp()
+    if chunk_size <= 0 :
+        chunk_size = INT_DEFAULT_CHUNK_SIZE
+    jobs = jobs if jobs else (os.cpu_count() or 1)
+    with ProcessPoolExecutor(
+            max_workers = jobs,
+            initializer = init_chunk_worker,
+            initargs = (dict_obfuscator, engine,)) as executor :
+        int_queue_size = 2 * jobs
+        queue_tasks = Queue(maxsize = int_queue_size)
+        queue_results = Queue(maxsize = int_queue_size)
+        event_stop = Event()
+        lst_errors = []
+
+        def read_tasks() :
+            try :
+                iter_str_chunks = read_chunks(
+                    input_file_name = input_file_name,
+                    chunk_size = chunk_size,
+                    mmap_flag = mmap_flag,)
+                if dict_stats is not None :
+                    iter_str_chunks = time_chunks(
+                        iter_str_chunks = iter_str_chunks,
+                        dict_stage_seconds = dict_stats['stage_seconds'],
+                        counter_chars = dict_stats['counter_input'],)
+                for tpl_task in read_safe_chunks(
+                        iter_str_chunks = iter_str_chunks,
+                        chunk_size = chunk_size,) :
+                    if event_stop.is_set() :
+                        break
+                    queue_tasks.put(tpl_task)
+            except BaseException as exception :
+                lst_errors.append(exception)
+            finally :
+                queue_tasks.put(None)
+
+        def write_results() :
+            try :
+                with open_output(
+                        output_file_name = output_file_name,
+                        int_mmap_size = get_output_mmap_size(
+                            dict_obfuscator = dict_obfuscator,
+                            input_file_name = input_file_name,
+                            output_file_name = output_file_name,
+                            gaps_insertion_flag = gaps_insertion_flag,
+                            noise_insertion_percent = noise_insertion_percent,
+                            reverse_obfuscation_flag = reverse_obfuscation_flag,
+                            mmap_flag = mmap_flag,),) as file_output :
+                    future = queue_results.get()
+                    while future is not None :
+                        (str_chunk, dict_stage_seconds) = future.result()
+                        if dict_stats is not None :
+                            for (str_stage, flt_seconds) in dict_stage_seconds.items() :
+                                dict_stats['stage_seconds'][str_stage] = (
+                                    dict_stats['stage_seconds'].get(str_stage, 0.) +
+                                    flt_seconds)
+                            dict_stats['counter_output'].update(str_chunk)
+                            flt_start = time.perf_counter()
+                        file_output.write(str_chunk)
+                        if output_file_name == STR_STDIO :
+                            file_output.flush()
+                        if dict_stats is not None :
+                            dict_stats['stage_seconds']['write'] += (
+                                time.perf_counter() - flt_start)
+                        future = queue_results.get()
+            except BaseException as exception :
+                lst_errors.append(exception)
+                event_stop.set()
+                while queue_results.get() is not None :
+                    pass
+
+        func_task = partial(
+            obfuscate_chunk,
+            integer_random_seed = integer_random_seed,
+            gaps_insertion_flag = gaps_insertion_flag,
+            noise_insertion_percent = noise_insertion_percent,
+            reverse_obfuscation_flag = reverse_obfuscation_flag,
+            engine = engine,
+            rng_scheme = rng_scheme,
+            stats_flag = 1 if dict_stats is not None else 0,
+            candidate_weights = candidate_weights,)
+        thread_reader = Thread(target = read_tasks, daemon = True)
+        thread_writer = Thread(target = write_results, daemon = True)
+        thread_reader.start()
+        thread_writer.start()
+        tpl_task = queue_tasks.get()
+        while tpl_task is not None :
+            if not event_stop.is_set() :
+                queue_results.put(executor.submit(func_task, tpl_task))
+            tpl_task = queue_tasks.get()
+        queue_results.put(None)
+        thread_writer.join()
+        thread_reader.join()
+    if lst_errors :
+        raise lst_errors[0]
+
+
+def compile_obfuscator_digest(dict_obfuscator) :
+    # Hash of the contents of an obfuscator, which identifies its tables.
+    return hashlib.sha256(json.dumps(
+        dict_obfuscator, sort_keys = True).encode('utf-8')).hexdigest()
+
+
+def is_random_obfuscation(
+        dict_obfuscator,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        reverse_obfuscation_flag = 0,
+        candidate_weights = None) :
+    # Whether the output depends on the seed.
+    return not reverse_obfuscation_flag and bool(
+        gaps_insertion_flag or noise_insertion_percent > 0 or
+        candidate_weights is not None or get_compiled_table(
+            func_compile = compile_translation_table,
+            dict_obfuscator = dict_obfuscator) is None)
+
+
+def get_output_cache_key(
+        dict_obfuscator, integer_random_seed, input_file_name,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        reverse_obfuscation_flag = 0,
+        engine = 'python',
+        chunk_size = 0,
+        jobs = None,
+        rng_scheme = 'sequential',
+        candidate_weights = None) :
+    # Return the hash of the input contents and of every parameter the
+    # output depends on, or None if the output is not reproducible (random
+    # obfuscation without a seed, or the standard input or output). The
+    # program version (see "get_table_cache_stamp") is part of the key.
+    if input_file_name == STR_STDIO :
+        return None
+    random_flag = is_random_obfuscation(
+        dict_obfuscator = dict_obfuscator,
+        gaps_insertion_flag = gaps_insertion_flag,
+        noise_insertion_percent = noise_insertion_percent,
+        reverse_obfuscation_flag = reverse_obfuscation_flag,
+        candidate_weights = candidate_weights,)
+    if random_flag and integer_random_seed is None :
+        return None
+    lst_parameters = [
+        INT_OUTPUT_CACHE_VERSION,
+        get_table_cache_stamp(),
+        get_compiled_table(
+            func_compile = compile_obfuscator_digest,
+            dict_obfuscator = dict_obfuscator),
+        1 if reverse_obfuscation_flag else 0,
+        1 if gaps_insertion_flag else 0,
+        ]
+    if random_flag :
+        # Chunks of parallel runs have seeds derived from their index
+        # (except with the counter scheme), so the output depends on the
+        # chunk size.
+        lst_parameters.extend((
+            integer_random_seed, noise_insertion_percent, engine, rng_scheme,
+            candidate_weights,
+            (chunk_size if chunk_size > 0 else INT_DEFAULT_CHUNK_SIZE)
+            if jobs is not None and rng_scheme != 'counter' else None,))
+    hash_key = hashlib.sha256(repr(lst_parameters).encode('utf-8'))
+    with open(input_file_name, 'rb') as file :
+        for bytes_block in iter(partial(file.read, INT_DEFAULT_CHUNK_SIZE), b'') :
+            hash_key.update(bytes_block)
+    return hash_key.hexdigest()
+
+
+def get_output_cache_file_name(output_cache_dir_name, str_cache_key) :
+    return os.path.join(output_cache_dir_name, str_cache_key[:2], str_cache_key[2:])
+
+
+def fetch_output_cache(output_cache_dir_name, str_cache_key, output_file_name) :
+    # Copy the cached output to a new output file (never a link: the output
+    # file can be modified without changing the entry), and mark the entry
+    # as recently used. Return False on a cache miss.
+    str_cache_file_name = get_output_cache_file_name(
+        output_cache_dir_name = output_cache_dir_name,
+        str_cache_key = str_cache_key,)
+    try :
+        os.utime(str_cache_file_name)
+    except OSError :
+        return False
+    if os.path.lexists(output_file_name) :
+        os.remove(output_file_name)
+    shutil.copyfile(str_cache_file_name, output_file_name)
+    return True
+
+
+def store_output_cache(
+        output_cache_dir_name, str_cache_key, output_file_name,
+        output_cache_size = INT_DEFAULT_OUTPUT_CACHE_SIZE) :
+    # Copy the output file into the cache (atomically and read-only), and
+    # evict the least recently used entries when the cache grows over
+    # "output_cache_size" bytes. An unwritable cache is ignored.
+    str_cache_file_name = get_output_cache_file_name(
+        output_cache_dir_name = output_cache_dir_name,
+        str_cache_key = str_cache_key,)
+    str_temp_file_name = '%s.%d.tmp' % (str_cache_file_name, os.getpid())
+    try :
+        os.makedirs(os.path.dirname(str_cache_file_name), exist_ok = True)
+        shutil.copyfile(output_file_name, str_temp_file_name)
+        os.chmod(str_temp_file_name, 0o444)
+        os.replace(str_temp_file_name, str_cache_file_name)
+    except OSError :
+        if os.path.exists(str_temp_file_name) :
+            os.remove(str_temp_file_name)
+        return
+    if output_cache_dir_name not in DICT_OUTPUT_CACHE_SIZES :
+        DICT_OUTPUT_CACHE_SIZES[output_cache_dir_name] = get_output_cache_report(
+            output_cache_dir_name = output_cache_dir_name)['bytes']
     else :
-        seed(a = integer_random_seed)
+        DICT_OUTPUT_CACHE_SIZES[output_cache_dir_name] += os.path.getsize(
+            str_cache_file_name)
+    if DICT_OUTPUT_CACHE_SIZES[output_cache_dir_name] > output_cache_size :
+        DICT_OUTPUT_CACHE_SIZES[output_cache_dir_name] = evict_output_cache(
+            output_cache_dir_name = output_cache_dir_name,
+            int_target_size = int(output_cache_size *
+                                  FLT_OUTPUT_CACHE_EVICTION_RATIO),)
 
-    with open(input_file_name, 'r', encoding='utf-8') as file :
-        str_input = file.read()
 
-    str_output = str_input
-    if gaps_insertion_flag :
-        # Adding/removing gaps must be done before obfuscation.
+def list_output_cache(output_cache_dir_name) :
+    # Return the (last use time, size, file name) of the cache entries.
+    lst_entries = []
+    if not os.path.isdir(output_cache_dir_name) :
+        return lst_entries
+    for entry_dir in os.scandir(output_cache_dir_name) :
+        if entry_dir.is_dir() and len(entry_dir.name) == 2 :
+            for entry in os.scandir(entry_dir.path) :
+                if entry.is_file() and not entry.name.endswith('.tmp') :
+                    stat_entry = entry.stat()
+                    lst_entries.append((stat_entry.st_mtime_ns,
+                                        stat_entry.st_size, entry.path))
+    return lst_entries
+
+
+def evict_output_cache(output_cache_dir_name, int_target_size) :
+    # Remove the least recently used entries until the cache holds at most
+    # "int_target_size" bytes. Return the size of the cache.
+    lst_entries = sorted(list_output_cache(
+        output_cache_dir_name = output_cache_dir_name))
+    int_size = sum(x[1] for x in lst_entries)
+    for (int_mtime, int_entry_size, str_file_name) in lst_entries :
+        if int_size <= int_target_size :
+            break
+        try :
+            os.remove(str_file_name)
+        except OSError :
+            continue
+        int_size -= int_entry_size
+    return int_size
+
+
+def get_output_cache_report(output_cache_dir_name) :
+    lst_entries = list_output_cache(output_cache_dir_name = output_cache_dir_name)
+    return {
+        'entries' : len(lst_entries),
+        'bytes' : sum(x[1] for x in lst_entries),
+        }
+
+
+def obfuscate(
+        dict_obfuscator, integer_random_seed,
+        input_file_name, output_file_name,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        verbosity_flag = 0,
+        reverse_obfuscation_flag = 0,
+        engine = 'python',
+        chunk_size = 0,
+        jobs = None,
+        mmap_flag = 0,
+        stats_flag = 0,
+        stats_callback = None,
+        rng_scheme = 'sequential',
+        candidate_weights = None,
+        output_cache_dir_name = None,
+        output_cache_size = INT_DEFAULT_OUTPUT_CACHE_SIZE) :
+    # With "stats_flag" or "stats_callback", per-stage wall times and
+    # character counters are collected (see "summarize_stats"), passed to
+    # "stats_callback" and returned. "candidate_weights" (see
+    # "get_candidate_weights") weight the choices among the candidates.
+    # With "output_cache_dir_name", reproducible outputs are cached by the
+    # hash of the input and the parameters (see "get_output_cache_key"),
+    # and a cached output is copied to the output file without any work.
+
+    str_cache_key = None
+    if output_cache_dir_name is not None and output_file_name != STR_STDIO :
+        flt_start = time.perf_counter()
+        str_cache_key = get_output_cache_key(
+            dict_obfuscator = dict_obfuscator,
+            integer_random_seed = integer_random_seed,
+            input_file_name = input_file_name,
+            gaps_insertion_flag = gaps_insertion_flag,
+            noise_insertion_percent = noise_insertion_percent,
+            reverse_obfuscation_flag = reverse_obfuscation_flag,
+            engine = engine,
+            chunk_size = chunk_size,
+            jobs = jobs,
+            rng_scheme = rng_scheme,
+            candidate_weights = candidate_weights,)
+        if str_cache_key is not None and fetch_output_cache(
+                output_cache_dir_name = output_cache_dir_name,
+                str_cache_key = str_cache_key,
+                output_file_name = output_file_name,) :
+            if verbosity_flag == 1 :
+                print("Output cache hit: " + output_file_name)
+            if not stats_flag and stats_callback is None :
+                return None
+            dict_stats = {
+                'stage_seconds' : {'cache' : time.perf_counter() - flt_start,},
+                'output_cache' : 'hit',
+                }
+            if stats_callback is not None :
+                stats_callback(dict_stats)
+            return dict_stats
+        if str_cache_key is not None and os.path.lexists(output_file_name) :
+            # Replace, not write through, an output file hard linked to a
+            # cache entry (by earlier versions).
+            os.remove(output_file_name)
+
+    dict_stats = None
+    if stats_flag or stats_callback is not None :
+        dict_stats = {
+            'stage_seconds' : {'read' : 0., 'write' : 0.,},
+            'counter_input' : Counter(),
+            'counter_output' : Counter(),
+            }
+
+    # Deterministic translation of a single process (without statistics or
+    # traces of the text) runs on bytes: see "translate_blocks".
+    tpl_ascii_replacements = None
+    if (jobs is None and dict_stats is None and verbosity_flag != 1 and
+            not is_random_obfuscation(
+                dict_obfuscator = dict_obfuscator,
+                gaps_insertion_flag = gaps_insertion_flag,
+                noise_insertion_percent = noise_insertion_percent,
+                reverse_obfuscation_flag = reverse_obfuscation_flag,
+                candidate_weights = candidate_weights,)) :
+        tpl_ascii_replacements = get_compiled_table(
+            func_compile = compile_ascii_replacements,
+            dict_obfuscator = dict_obfuscator,
+            gaps_insertion_flag = (1 if gaps_insertion_flag and
+                                   reverse_obfuscation_flag else 0),
+            reverse_obfuscation_flag = 1 if reverse_obfuscation_flag else 0,)
+
+    int_mmap_size = get_output_mmap_size(
+        dict_obfuscator = dict_obfuscator,
+        input_file_name = input_file_name,
+        output_file_name = output_file_name,
+        gaps_insertion_flag = gaps_insertion_flag,
+        noise_insertion_percent = noise_insertion_percent,
+        reverse_obfuscation_flag = reverse_obfuscation_flag,
+        mmap_flag = mmap_flag,)
+
+    if tpl_ascii_replacements is not None :
         if reverse_obfuscation_flag :
-            str_output = remove_gaps(str_input = str_output,)
+            dict_translation_table = get_compiled_table(
+                func_compile = compile_reverse_table,
+                dict_obfuscator = dict_obfuscator,
+                gaps_insertion_flag = 1 if gaps_insertion_flag else 0,)
         else :
-            str_output = add_gaps(str_input = str_output,)
+            dict_translation_table = get_compiled_table(
+                func_compile = compile_translation_table,
+                dict_obfuscator = dict_obfuscator)
+        with open_output(output_file_name = output_file_name,
+                         binary_flag = 1,
+                         int_mmap_size = int_mmap_size,) as file_output :
+            for bytes_block in translate_blocks(
+                    iter_bytes_blocks = read_blocks(
+                        input_file_name = input_file_name,
+                        chunk_size = (chunk_size if chunk_size > 0
+                                      else INT_DEFAULT_CHUNK_SIZE),
+                        mmap_flag = mmap_flag,),
+                    dict_translation_table = dict_translation_table,
+                    tpl_ascii_replacements = tpl_ascii_replacements,) :
+                file_output.write(bytes_block)
+                if output_file_name == STR_STDIO :
+                    file_output.flush()
+    elif jobs is not None :
+        obfuscate_parallel(
+            dict_obfuscator = dict_obfuscator,
+            integer_random_seed = integer_random_seed,
+            input_file_name = input_file_name,
+            output_file_name = output_file_name,
+            gaps_insertion_flag = gaps_insertion_flag,
+            noise_insertion_percent = noise_insertion_percent,
+            reverse_obfuscation_flag = reverse_obfuscation_flag,
+            engine = engine,
+            chunk_size = chunk_size,
+            jobs = jobs,
+            mmap_flag = mmap_flag,
+            rng_scheme = rng_scheme,
+            dict_stats = dict_stats,
+            candidate_weights = candidate_weights,)
+    else :
+        lst_stages = create_pipeline(
+            dict_obfuscator = dict_obfuscator,
+            dict_random_generators = create_random_generators(
+                integer_random_seed = integer_random_seed,
+                rng_scheme = rng_scheme,),
+            gaps_insertion_flag = gaps_insertion_flag,
+            noise_insertion_percent = noise_insertion_percent,
+            reverse_obfuscation_flag = reverse_obfuscation_flag,
+            engine = engine,
+            rng_scheme = rng_scheme,
+            candidate_weights = candidate_weights,)
+        if dict_stats is not None :
+            lst_stages = time_stages(
+                lst_stages = lst_stages,
+                dict_stage_seconds = dict_stats['stage_seconds'],)
 
-    if reverse_obfuscation_flag :
-            str_output = remove_noise(str_input = str_output,)
-    elif noise_insertion_percent > 0 :
-        # Adding noise must be done before obfuscation.
-        str_output = add_noise(
-            str_input = str_output,
-            noise_insertion_percent = noise_insertion_percent,)
+        if (chunk_size > 0 or mmap_flag or
+                STR_STDIO in (input_file_name, output_file_name,)) :
+            # Streaming: read, transform and write blocks of "chunk_size"
+            # characters. The output is identical to the in-memory path.
+            iter_str_chunks = read_chunks(
+                input_file_name = input_file_name,
+                chunk_size = (chunk_size if chunk_size > 0
+                              else INT_DEFAULT_CHUNK_SIZE),
+                mmap_flag = mmap_flag,)
+            if dict_stats is not None :
+                iter_str_chunks = time_chunks(
+                    iter_str_chunks = iter_str_chunks,
+                    dict_stage_seconds = dict_stats['stage_seconds'],
+                    counter_chars = dict_stats['counter_input'],)
+            with open_output(output_file_name = output_file_name,
+                             int_mmap_size = int_mmap_size,) as file_output :
+                for str_chunk in stream_pipeline(
+                        iter_str_chunks = iter_str_chunks,
+                        lst_stages = lst_stages,) :
+                    if dict_stats is not None :
+                        dict_stats['counter_output'].update(str_chunk)
+                        flt_start = time.perf_counter()
+                    file_output.write(str_chunk)
+                    if output_file_name == STR_STDIO :
+                        file_output.flush()
+                    if dict_stats is not None :
+                        dict_stats['stage_seconds']['write'] += (
+                            time.perf_counter() - flt_start)
+        else :
+            flt_start = time.perf_counter()
+            with open(input_file_name, 'r', encoding='utf-8') as file :
+                str_input = file.read()
+            flt_read_seconds = time.perf_counter() - flt_start
 
-    # Obfuscation:
-    str_output = ''.join(tuple(map(lambda x : choice(
-        dict_obfuscator.get(x + x, x)), str_output)))
+            str_output = apply_pipeline(str_input = str_input, lst_stages = lst_stages)
 
-    if verbosity_flag == 1 :
-        print("Input file:\n")
-        print(str_input)
-        print("Output file:\n")
-        print(str_output)
-        print()
+            if verbosity_flag == 1 :
+                print("Input file:\n")
+                print(str_input)
+                print("Output file:\n")
+                print(str_output)
+                print()
+
+            flt_start = time.perf_counter()
+            with open(output_file_name, "w", encoding='utf-8') as file :
+                file.write(str_output)
+            if dict_stats is not None :
+                dict_stats['stage_seconds']['read'] = flt_read_seconds
+                dict_stats['stage_seconds']['write'] = (
+                    time.perf_counter() - flt_start)
+                dict_stats['counter_input'].update(str_input)
+                dict_stats['counter_output'].update(str_output)
 
-    with open(output_file_name, "w", encoding='utf-8') as file :
-        file.write(str_output)
+    if str_cache_key is not None :
+        store_output_cache(
+            output_cache_dir_name = output_cache_dir_name,
+            str_cache_key = str_cache_key,
+            output_file_name = output_file_name,
+            output_cache_size = output_cache_size,)
+    if dict_stats is None :
+        return None
+    dict_stats = summarize_stats(
+        dict_stage_seconds = dict_stats['stage_seconds'],
+        counter_input = dict_stats['counter_input'],
+        counter_output = dict_stats['counter_output'],
+        dict_obfuscator = dict_obfuscator,
+        gaps_insertion_flag = gaps_insertion_flag,
+        reverse_obfuscation_flag = reverse_obfuscation_flag,)
+    if output_cache_dir_name is not None :
+        dict_stats['output_cache'] = 'miss' if str_cache_key else 'bypass'
+    if stats_callback is not None :
+        stats_callback(dict_stats)
+    return dict_stats
+
+
+def get_incremental_key(
+        dict_obfuscator,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        reverse_obfuscation_flag = 0,
+        engine = 'python',
+        rng_scheme = 'sequential',
+        candidate_weights = None) :
+    # Hash of every parameter but the seed the output of an incremental
+    # obfuscation depends on (see "get_output_cache_key").
+    lst_parameters = [
+        INT_INCREMENTAL_STATE_VERSION,
+        get_table_cache_stamp(),
+        get_compiled_table(
+            func_compile = compile_obfuscator_digest,
+            dict_obfuscator = dict_obfuscator),
+        1 if reverse_obfuscation_flag else 0,
+        1 if gaps_insertion_flag else 0,
+        noise_insertion_percent, engine, rng_scheme, candidate_weights,
+        ]
+    return hashlib.sha256(repr(lst_parameters).encode('utf-8')).hexdigest()
+
+
+def get_input_fingerprint(input_file_name, int_offset) :
+    # Hash of the input bytes just before "int_offset".
+    with open(input_file_name, 'rb') as file :
+        file.seek(max(0, int_offset - INT_INCREMENTAL_FINGERPRINT_SIZE))
+        return hashlib.sha256(file.read(min(
+            int_offset, INT_INCREMENTAL_FINGERPRINT_SIZE))).hexdigest()
+
+
+def load_incremental_state(state_file_name, str_key, input_file_name, output_file_name) :
+    # Return the state of the previous incremental run, or None if there is
+    # none, or the parameters, the end of the processed input (see
+    # "get_input_fingerprint") or the committed output changed since (the
+    # output is then rebuilt from the start).
+    try :
+        with open(state_file_name, 'r', encoding='utf-8') as file :
+            dict_state = json.load(file)
+    except (OSError, ValueError) :
+        return None
+    if (not isinstance(dict_state, dict) or
+            dict_state.get('key') != str_key or
+            not os.path.isfile(output_file_name) or
+            os.path.getsize(output_file_name) < dict_state['output_offset'] or
+            os.path.getsize(input_file_name) < dict_state['input_offset'] or
+            get_input_fingerprint(
+                input_file_name = input_file_name,
+                int_offset = dict_state['input_offset'],) !=
+            dict_state['input_fingerprint']) :
+        return None
+    return dict_state
+
+
+def store_json_file(file_name, data) :
+    # Replace a JSON (state or status) file atomically.
+    str_temp_file_name = '%s.%d.tmp' % (file_name, os.getpid())
+    with open(str_temp_file_name, 'w', encoding='utf-8') as file :
+        json.dump(data, file)
+    os.replace(str_temp_file_name, file_name)
+
+
+def obfuscate_incremental(
+        dict_obfuscator, integer_random_seed,
+        input_file_name, output_file_name,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        verbosity_flag = 0,
+        reverse_obfuscation_flag = 0,
+        engine = 'python',
+        chunk_size = 0,
+        rng_scheme = 'sequential',
+        candidate_weights = None) :
+    # Obfuscate only the input appended since the previous run, and append
+    # its output to the output file, which stays identical to the output of
+    # a full run with the same seed. The state file next to the output (see
+    # "STR_INCREMENTAL_STATE_SUFFIX") holds the seed, the processed input
+    # offset, the input characters held back for the lookahead of gaps and
+    # noise (see "stream_with_lookahead"), the random generator states (the
+    # position with the counter scheme) and the committed output offset.
+    # The held back characters are also written, as a provisional output
+    # tail truncated by the next run. A trailing carriage return, which may
+    # start a Windows newline, and an incomplete UTF-8 sequence are left
+    # unprocessed. Return the processed input offset and the output size.
+    if STR_STDIO in (input_file_name, output_file_name,) :
+        raise ValueError("Incremental obfuscation requires input and output files.")
+    random_flag = is_random_obfuscation(
+        dict_obfuscator = dict_obfuscator,
+        gaps_insertion_flag = gaps_insertion_flag,
+        noise_insertion_percent = noise_insertion_percent,
+        reverse_obfuscation_flag = reverse_obfuscation_flag,
+        candidate_weights = candidate_weights,)
+    if random_flag and engine == 'numpy' and rng_scheme != 'counter' :
+        # The NumPy generator of the sequential scheme cannot be resumed.
+        raise ValueError("Incremental random obfuscation with the numpy engine "
+                         "requires the counter random number scheme.")
+    state_file_name = output_file_name + STR_INCREMENTAL_STATE_SUFFIX
+    str_key = get_incremental_key(
+        dict_obfuscator = dict_obfuscator,
+        gaps_insertion_flag = gaps_insertion_flag,
+        noise_insertion_percent = noise_insertion_percent,
+        reverse_obfuscation_flag = reverse_obfuscation_flag,
+        engine = engine,
+        rng_scheme = rng_scheme,
+        candidate_weights = candidate_weights,)
+    dict_state = load_incremental_state(
+        state_file_name = state_file_name,
+        str_key = str_key,
+        input_file_name = input_file_name,
+        output_file_name = output_file_name,)
+    if dict_state is not None and integer_random_seed not in (
+            None, dict_state['integer_random_seed'],) :
+        dict_state = None
+    if dict_state is None :
+        if verbosity_flag == 1 :
+            print("Incremental state reset: " + state_file_name)
+        dict_state = {
+            'key' : str_key,
+            # An integer seed, so that a full run (-s) can reproduce it.
+            'integer_random_seed' : (int(datetime.now().timestamp() * 1e6)
+                                     if integer_random_seed is None
+                                     else integer_random_seed),
+            'input_offset' : 0,
+            'input_pending' : '',
+            'position' : 0,
+            'random_states' : None,
+            'output_offset' : 0,
+            }
+
+    dict_random_generators = create_random_generators(
+        integer_random_seed = dict_state['integer_random_seed'],
+        rng_scheme = rng_scheme,)
+    if rng_scheme != 'counter' and dict_state['random_states'] is not None :
+        for (str_stage, lst_random_state) in dict_state['random_states'].items() :
+            dict_random_generators[str_stage].setstate((
+                lst_random_state[0], tuple(lst_random_state[1]),
+                lst_random_state[2],))
+    lst_stages = create_pipeline(
+        dict_obfuscator = dict_obfuscator,
+        dict_random_generators = dict_random_generators,
+        gaps_insertion_flag = gaps_insertion_flag,
+        noise_insertion_percent = noise_insertion_percent,
+        reverse_obfuscation_flag = reverse_obfuscation_flag,
+        engine = engine,
+        rng_scheme = rng_scheme,
+        int_offset = dict_state['position'],
+        candidate_weights = candidate_weights,)
+
+    def func_pipeline(str_input, str_next) :
+        # Only the first stage (gaps and noise) looks ahead.
+        for (str_stage, func_stage, lookahead_flag) in lst_stages :
+            str_input = func_stage(str_input, str_next if lookahead_flag else '')
+        return str_input
+
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder('utf-8')(), translate = True)
+    str_pending = dict_state['input_pending']
+    int_position = dict_state['position']
+    int_input_end = dict_state['input_offset']
+    with open(input_file_name, 'rb') as file_input, open(
+            output_file_name, 'r+b' if dict_state['output_offset'] else 'wb'
+            ) as file_output :
+        file_input.seek(dict_state['input_offset'])
+        file_output.seek(dict_state['output_offset'])
+        file_output.truncate()
+
+        def func_write(str_output) :
+            if os.linesep != '\n' :
+                str_output = str_output.replace('\n', os.linesep)
+            file_output.write(str_output.encode('utf-8'))
+
+        for bytes_block in iter(partial(file_input.read, (
+                chunk_size if chunk_size > 0 else INT_DEFAULT_CHUNK_SIZE)), b'') :
+            int_input_end += len(bytes_block)
+            str_text = str_pending + decoder.decode(bytes_block)
+            int_end = len(str_text.rstrip(' ')) - 1
+            if int_end > 0 :
+                func_write(func_pipeline(str_text[:int_end], str_text[int_end]))
+                int_position += int_end
+                str_pending = str_text[int_end:]
+            else :
+                str_pending = str_text
+        (bytes_undecoded, int_flags) = decoder.getstate()
+        int_input_end -= len(bytes_undecoded) + (int_flags & 1)
+        file_output.flush()
+        dict_state.update({
+            'input_offset' : int_input_end,
+            'input_fingerprint' : get_input_fingerprint(
+                input_file_name = input_file_name,
+                int_offset = int_input_end,),
+            'input_pending' : str_pending,
+            'position' : int_position,
+            'random_states' : None if rng_scheme == 'counter' else {
+                str_stage : random_generator.getstate()
+                for (str_stage, random_generator) in
+                dict_random_generators.items()},
+            'output_offset' : file_output.tell(),
+            })
+        store_json_file(file_name = state_file_name, data = dict_state)
+        # Provisional tail: the held back characters are final at the end of
+        # the input, and a pending carriage return is a newline.
+        str_pending += '\n' if int_flags & 1 else ''
+        if str_pending :
+            func_write(func_pipeline(str_pending, ''))
+        if verbosity_flag == 1 :
+            print("Input offset: %d. Output offset: %d." % (
+                int_input_end, file_output.tell()))
+        return {'input_offset' : int_input_end, 'output_offset' : file_output.tell()}
 
 
 def revert_obfuscator(dict_obfuscator) :
@@ -1026,53 +3027,1693 @@ def revert_obfuscator(dict_obfuscator) :
     return dict_reverse_obfuscator
 
 
+def find_ambiguous_symbols(dict_obfuscator) :
+    # Return the symbols that are candidates of more than one original
+    # character, with these characters. "revert_obfuscator" keeps only the
+    # last one, so the others are silently recovered wrong.
+    dict_originals = {}
+    for (key, value) in dict_obfuscator.items() :
+        for str_symbol in set(value[::2]) :
+            dict_originals.setdefault(str_symbol, set()).add(key[0])
+    return {str_symbol : ''.join(sorted(set_originals))
+            for (str_symbol, set_originals) in dict_originals.items()
+            if len(set_originals) > 1}
+
+
+def revert_all_obfuscators(tpl_type_indices = None) :
+    # Union of the reverse obfuscators of all types (or of the given types).
+    # No look-alike symbol is shared by types with different original
+    # characters; "Basic Latin" candidates (partial replacement keeping the
+    # original) are left as is.
+    dict_reverse_obfuscator = {}
+    if tpl_type_indices is None :
+        tpl_type_indices = tuple(DICT_OBFUSCATOR_TYPES)
+    for obfuscator_type_index in tpl_type_indices :
+        dict_obfuscator = LST_DICT_OBFUSCATORS[obfuscator_type_index - 1]
+        validate_obfuscator(dict_obfuscator = dict_obfuscator)
+        for (k, v) in revert_obfuscator(
+                dict_obfuscator = dict_obfuscator).items() :
+            if ord(k[0]) > 0x7F :
+                dict_reverse_obfuscator.setdefault(k, v)
+    return dict_reverse_obfuscator
+
+
+def compile_detection_table(dict_obfuscator) :
+    # Log-likelihood of each character produced or replaced by the
+    # obfuscator: candidates are chosen uniformly, and an original character
+    # which is not among its own candidates cannot remain in the output.
+    dict_detection_table = {}
+    for (key, value) in dict_obfuscator.items() :
+        set_candidates = set(value[::2])
+        for str_candidate in set_candidates :
+            dict_detection_table[str_candidate] = -math.log(len(set_candidates))
+    for key in dict_obfuscator.keys() :
+        dict_detection_table.setdefault(key[0], FLT_DETECTION_PENALTY)
+    return dict_detection_table
+
+
+def read_sample(
+        input_file_name,
+        sample_windows = INT_SAMPLE_WINDOWS,
+        window_size = INT_SAMPLE_WINDOW_SIZE) :
+    # Read evenly spaced windows of the input file (the whole file if it is
+    # small). Characters cut at the window edges are dropped.
+    with open(input_file_name, 'rb') as file :
+        int_file_size = os.fstat(file.fileno()).st_size
+        if int_file_size <= sample_windows * window_size :
+            return file.read().decode('utf-8', errors = 'ignore')
+        lst_windows = []
+        for i in range(sample_windows) :
+            file.seek(i * (int_file_size - window_size) // (sample_windows - 1))
+            lst_windows.append(
+                file.read(window_size).decode('utf-8', errors = 'ignore'))
+    return '\n'.join(lst_windows)
+
+
+class PrefixedReader(io.RawIOBase) :
+    # Raw reader of "bytes_prefix" followed by the rest of the buffered
+    # reader "file_input", to put bytes read ahead back in front of it.
+
+    def __init__(self, bytes_prefix, file_input) :
+        self._bytes_prefix = bytes_prefix
+        self._file_input = file_input
+
+    def readable(self) :
+        return True
+
+    def readinto(self, buffer) :
+        if self._bytes_prefix :
+            int_size = min(len(buffer), len(self._bytes_prefix))
+            buffer[:int_size] = self._bytes_prefix[:int_size]
+            self._bytes_prefix = self._bytes_prefix[int_size:]
+            return int_size
+        return self._file_input.readinto1(buffer)
+
+
+def peek_stdin(int_size = INT_SAMPLE_WINDOWS * INT_SAMPLE_WINDOW_SIZE) :
+    # Read up to "int_size" bytes of the standard input ahead (waiting for
+    # them or the end of the input) and return them decoded, as a sample of
+    # the text. The bytes are chained back in front of "sys.stdin", so that
+    # the input is read from its start.
+    lst_blocks = []
+    int_read = 0
+    while int_read < int_size :
+        bytes_block = sys.stdin.buffer.read1(int_size - int_read)
+        if not bytes_block :
+            break
+        lst_blocks.append(bytes_block)
+        int_read += len(bytes_block)
+    bytes_prefix = b''.join(lst_blocks)
+    sys.stdin = io.TextIOWrapper(
+        io.BufferedReader(PrefixedReader(
+            bytes_prefix = bytes_prefix,
+            file_input = sys.stdin.buffer,)),
+        encoding = 'utf-8',)
+    return bytes_prefix.decode('utf-8', errors = 'ignore')
+
+
+def detect_obfuscation(str_input) :
+    return score_obfuscation(counter_chars = Counter(str_input))
+
+
+def get_script(str_char) :
+    # First word of the Unicode name, e.g. "LATIN", "CYRILLIC" or "GREEK".
+    return unicodedata.name(str_char, '').partition(' ')[0]
+
+
+def score_obfuscation(counter_chars) :
+    # Score every obfuscator type by the log-likelihood of the characters of
+    # the text (sample) and detect gaps and noise. Ties go to the lower type
+    # index, e.g. types replacing spaces only cannot be told apart when gaps
+    # replaced all spaces. Genuine text is scored too (with gap and noise
+    # characters as evidence against it): if no type beats it by
+    # FLT_DETECTION_MARGIN, no obfuscation is detected ("tpl_best_types" is
+    # empty and the type index is None).
+    counter_chars = Counter(counter_chars)
+    gaps_insertion_flag = 1 if (counter_chars[STR_GAP] +
+                                counter_chars[STR_NEWLINE_GAP]) > 0 else 0
+    noise_insertion_flag = 1 if any(
+        counter_chars[x] > 0 for x in TPL_STR_NOISE) else 0
+    flt_genuine_score = FLT_DETECTION_PENALTY * sum(
+        counter_chars[x] for x in set(TPL_STR_NOISE) | {STR_GAP, STR_NEWLINE_GAP})
+    if gaps_insertion_flag :
+        # Spaces were replaced by gaps before obfuscation.
+        for str_char in set(''.join(TPL_STR_ALT_SPACES)) | {STR_ORIG_SPACE} :
+            del counter_chars[str_char]
+    lst_detection_tables = [get_compiled_table(
+        func_compile = compile_detection_table,
+        dict_obfuscator = dict_obfuscator,)
+        for dict_obfuscator in LST_DICT_OBFUSCATORS]
+    set_symbols = set().union(*(
+        x.keys() for x in lst_detection_tables)) - set(
+            chr(x) for x in range(0x80))
+    dict_scores = {}
+    for (i, dict_detection_table) in enumerate(lst_detection_tables, 1) :
+        dict_scores[i] = sum(
+            int_count * dict_detection_table.get(
+                str_char, FLT_DETECTION_PENALTY if str_char in set_symbols
+                else 0.)
+            for (str_char, int_count) in counter_chars.items())
+    set_genuine_scripts = set(
+        get_script(str_char) for str_char in counter_chars
+        if ord(str_char) >= 0x80 and str_char.isalpha() and
+        str_char not in set_symbols)
+    for (str_char, int_count) in counter_chars.items() :
+        if str_char in set_symbols and str_char not in TPL_STR_NOISE :
+            flt_genuine_score += int_count * (
+                FLT_GENUINE_SCRIPT_SCORE
+                if get_script(str_char) in set_genuine_scripts
+                else FLT_GENUINE_SYMBOL_SCORE)
+    flt_best_score = max(dict_scores.values())
+    if flt_best_score < flt_genuine_score + FLT_DETECTION_MARGIN :
+        return {
+            'obfuscator_type_index' : None,
+            'tpl_best_types' : (),
+            'gaps_insertion_flag' : 0,
+            'noise_insertion_flag' : 0,
+            'dict_scores' : dict_scores,
+            'flt_genuine_score' : flt_genuine_score,
+            }
+    return {
+        'obfuscator_type_index' : max(
+            dict_scores, key = lambda x : (dict_scores[x], -x)),
+        # All types with the best score: more than one if inconclusive.
+        'tpl_best_types' : tuple(i for i in sorted(dict_scores)
+                                 if dict_scores[i] == flt_best_score),
+        'gaps_insertion_flag' : gaps_insertion_flag,
+        'noise_insertion_flag' : noise_insertion_flag,
+        'dict_scores' : dict_scores,
+        'flt_genuine_score' : flt_genuine_score,
+        }
+
+
+@lru_cache(maxsize = None)
+def get_recovery_obfuscator(tpl_type_indices) :
+    # Reverse obfuscator of the detected type (see "score_obfuscation"). An
+    # inconclusive detection falls back to the union of the reverse
+    # obfuscators of the tied types, which also maps genuine characters
+    # that are symbols of other types (e.g. "LATIN SMALL LETTER N WITH
+    # TILDE" of type 7 is recovered as "n"). Without any detected type, the
+    # empty reverse obfuscator passes the text through unchanged (see
+    # "compile_reverse_table").
+    if not tpl_type_indices :
+        return {}
+    if len(tpl_type_indices) == 1 :
+        return get_obfuscator(
+            obfuscator_type_index = tpl_type_indices[0],
+            reverse_obfuscation_flag = 1,)
+    if len(tpl_type_indices) == len(DICT_OBFUSCATOR_TYPES) :
+        return get_obfuscator(
+            obfuscator_type_index = INT_UNIVERSAL_TYPE_INDEX,
+            reverse_obfuscation_flag = 1,)
+    return revert_all_obfuscators(tpl_type_indices = tpl_type_indices)
+
+
+@lru_cache(maxsize = None)
+def get_obfuscator(obfuscator_type_index, reverse_obfuscation_flag = 0) :
+    # Validate (and revert) the obfuscator of the given type once per process
+    # (validation once per change of the source, see "load_table_cache": its
+    # messages are stored and printed again from the cache).
+    if obfuscator_type_index == INT_UNIVERSAL_TYPE_INDEX :
+        if reverse_obfuscation_flag == 0 :
+            raise ValueError(
+                "Universal obfuscator type is for reverse obfuscation only.")
+        dict_obfuscator = revert_all_obfuscators()
+    else :
+        dict_obfuscator = LST_DICT_OBFUSCATORS[obfuscator_type_index - 1]
+        tpl_cache_key = ('validate_obfuscator', obfuscator_type_index,)
+        if tpl_cache_key not in load_table_cache() :
+            with io.StringIO() as file_messages :
+                with contextlib.redirect_stdout(file_messages) :
+                    validate_obfuscator(dict_obfuscator = dict_obfuscator)
+                store_table_cache(tpl_cache_key = tpl_cache_key,
+                                  table = file_messages.getvalue())
+        if load_table_cache()[tpl_cache_key] :
+            print(load_table_cache()[tpl_cache_key], end = '')
+        if reverse_obfuscation_flag != 0 :
+            dict_obfuscator = revert_obfuscator(dict_obfuscator = dict_obfuscator)
+    DICT_OBFUSCATOR_CACHE_KEYS[id(dict_obfuscator)] = (
+        obfuscator_type_index, 1 if reverse_obfuscation_flag else 0,)
+    return dict_obfuscator
+
+
+class Obfuscator :
+    # Reusable obfuscator of one type for text in memory. Forward and reverse
+    # tables are compiled once per process. Every "obfuscate_text" call draws
+    # its own seed from the private generator of the instance, so calls are
+    # safe from many threads and reproducible in call order for a fixed seed.
+    # A call gives the output of "transform_text" with the seed drawn.
+
+    def __init__(
+            self,
+            obfuscator_type_index,
+            integer_random_seed = None,
+            gaps_insertion_flag = 0,
+            noise_insertion_percent = 0,
+            engine = 'python',
+            rng_scheme = 'sequential',
+            keep_original_percent = None,
+            lookalike_decay = None) :
+        if not 1 <= obfuscator_type_index <= len(DICT_OBFUSCATOR_TYPES) :
+            raise ValueError("Obfuscator type index must be between 1 and %d." %
+                             len(DICT_OBFUSCATOR_TYPES))
+        if engine not in TPL_ENGINES :
+            raise ValueError("Engine must be one of: " + ", ".join(TPL_ENGINES) + ".")
+        if rng_scheme not in TPL_RNG_SCHEMES :
+            raise ValueError("Random number scheme must be one of: " +
+                             ", ".join(TPL_RNG_SCHEMES) + ".")
+        self.obfuscator_type_index = obfuscator_type_index
+        self.gaps_insertion_flag = gaps_insertion_flag
+        self.noise_insertion_percent = noise_insertion_percent
+        self.engine = engine
+        self.rng_scheme = rng_scheme
+        self.candidate_weights = get_candidate_weights(
+            keep_original_percent = keep_original_percent,
+            lookalike_decay = lookalike_decay,)
+        self.dict_obfuscator = get_obfuscator(
+            obfuscator_type_index = obfuscator_type_index,
+            reverse_obfuscation_flag = 0,)
+        self.dict_reverse_obfuscator = get_obfuscator(
+            obfuscator_type_index = obfuscator_type_index,
+            reverse_obfuscation_flag = 1,)
+        if integer_random_seed is None :
+            integer_random_seed = datetime.now().timestamp()
+        self._random_generator = Random(integer_random_seed)
+        self._lock = Lock()
+        # Compile the forward tables; the reverse pipeline has no randomness
+        # and is shared by all calls.
+        warm_worker(
+            obfuscator_type_index = obfuscator_type_index,
+            reverse_obfuscation_flag = 0,
+            engine = engine,
+            candidate_weights = self.candidate_weights,)
+        self._lst_reverse_stages = create_pipeline(
+            dict_obfuscator = self.dict_reverse_obfuscator,
+            dict_random_generators = dict.fromkeys(TPL_RANDOM_STAGES, Random(0)),
+            gaps_insertion_flag = gaps_insertion_flag,
+            reverse_obfuscation_flag = 1,)
+
+    def obfuscate_text(self, str_input) :
+        with self._lock :
+            integer_random_seed = self._random_generator.getrandbits(64)
+        dict_random_generators = create_random_generators(
+            integer_random_seed = integer_random_seed,
+            rng_scheme = self.rng_scheme,)
+        return apply_pipeline(
+            str_input = str_input,
+            lst_stages = create_pipeline(
+                dict_obfuscator = self.dict_obfuscator,
+                dict_random_generators = dict_random_generators,
+                gaps_insertion_flag = self.gaps_insertion_flag,
+                noise_insertion_percent = self.noise_insertion_percent,
+                reverse_obfuscation_flag = 0,
+                engine = self.engine,
+                rng_scheme = self.rng_scheme,
+                candidate_weights = self.candidate_weights,),)
+
+    def recover_text(self, str_input) :
+        return apply_pipeline(
+            str_input = str_input,
+            lst_stages = self._lst_reverse_stages,)
+
+
+def derive_random_seed(integer_random_seed, str_key) :
+    # Derive a reproducible seed from the base seed and a key, e.g. a file
+    # path, independent of the order in which the work is scheduled.
+    bytes_digest = hashlib.sha256(
+        ('%s:%s' % (integer_random_seed, str_key)).encode('utf-8')).digest()
+    return int.from_bytes(bytes_digest[:8], 'big')
+
+
+def is_batch_input(input_file_name) :
+    # A directory, a glob pattern or a manifest file name prefixed with "@".
+    return (input_file_name.startswith('@') or
+            Path(input_file_name).is_dir() or
+            (not Path(input_file_name).is_file() and
+             any(x in input_file_name for x in '*?[')))
+
+
+def list_batch_files(input_file_name, output_dir_name) :
+    # Expand the batch input into (input, output, key) tuples. Output files
+    # mirror the input paths relative to the directory, the non-pattern
+    # part of the glob, or the manifest. Manifest lines hold an input path
+    # and optionally a tab-separated output path relative to the output
+    # directory. The key (relative path) is used to derive per-file seeds.
+    lst_pairs = []
+    if input_file_name.startswith('@') :
+        path_manifest = Path(input_file_name[1:])
+        with open(path_manifest, 'r', encoding='utf-8') as file :
+            for str_line in file :
+                lst_fields = str_line.rstrip('\r\n').split('\t')
+                if lst_fields[0].strip() and not lst_fields[0].startswith('#') :
+                    path_input = path_manifest.parent / lst_fields[0]
+                    if len(lst_fields) > 1 and lst_fields[1] :
+                        path_relative = Path(lst_fields[1])
+                    else :
+                        path_relative = Path(lst_fields[0])
+                        if path_relative.is_absolute() :
+                            path_relative = Path(path_relative.name)
+                    lst_pairs.append((path_input, path_relative))
+    else :
+        if Path(input_file_name).is_dir() :
+            path_base = Path(input_file_name)
+            lst_inputs = sorted(x for x in path_base.rglob('*') if x.is_file())
+        else :
+            lst_parts = Path(input_file_name).parts
+            int_static = 0
+            while (int_static < len(lst_parts) - 1 and
+                   not any(x in lst_parts[int_static] for x in '*?[')) :
+                int_static += 1
+            path_base = Path(*lst_parts[:int_static]) if int_static else Path('.')
+            lst_inputs = sorted(
+                Path(x) for x in glob.glob(input_file_name, recursive = True)
+                if Path(x).is_file())
+        lst_pairs = [(x, x.relative_to(path_base)) for x in lst_inputs]
+    return [(str(path_input), str(Path(output_dir_name) / path_relative),
+             path_relative.as_posix())
+            for (path_input, path_relative) in lst_pairs]
+
+
+def warm_worker(
+        obfuscator_type_index, reverse_obfuscation_flag, engine,
+        candidate_weights = None) :
+    # Build, validate and compile the tables once per worker process.
+    create_substitution(
+        dict_obfuscator = get_obfuscator(
+            obfuscator_type_index = obfuscator_type_index,
+            reverse_obfuscation_flag = reverse_obfuscation_flag,),
+        random_generator = Random(),
+        engine = engine,
+        candidate_weights = (None if reverse_obfuscation_flag
+                             else candidate_weights),)
+
+
+def obfuscate_batch_file(
+        tpl_task,
+        obfuscator_type_index,
+        reverse_obfuscation_flag = 0,
+        **kwargs) :
+    (input_file_name, output_file_name, integer_random_seed) = tpl_task
+    if obfuscator_type_index == INT_UNIVERSAL_TYPE_INDEX :
+        dict_detection = detect_obfuscation(str_input = read_sample(
+            input_file_name = input_file_name))
+        if dict_detection['gaps_insertion_flag'] :
+            kwargs['gaps_insertion_flag'] = 1
+        dict_obfuscator = get_recovery_obfuscator(
+            tpl_type_indices = dict_detection['tpl_best_types'])
+    else :
+        dict_obfuscator = get_obfuscator(
+            obfuscator_type_index = obfuscator_type_index,
+            reverse_obfuscation_flag = reverse_obfuscation_flag,)
+    dict_stats = obfuscate(
+        dict_obfuscator = dict_obfuscator,
+        integer_random_seed = integer_random_seed,
+        input_file_name = input_file_name,
+        output_file_name = output_file_name,
+        reverse_obfuscation_flag = reverse_obfuscation_flag,
+        **kwargs)
+    return (input_file_name, dict_stats)
+
+
+def obfuscate_batch(
+        obfuscator_type_index,
+        integer_random_seed,
+        input_file_name,
+        output_dir_name,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        verbosity_flag = 0,
+        reverse_obfuscation_flag = 0,
+        engine = 'python',
+        chunk_size = 0,
+        jobs = None,
+        mmap_flag = 0,
+        stats_flag = 0,
+        rng_scheme = 'sequential',
+        candidate_weights = None,
+        output_cache_dir_name = None,
+        output_cache_size = INT_DEFAULT_OUTPUT_CACHE_SIZE) :
+    # Return the statistics of the files by input file name (if
+    # "stats_flag").
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if integer_random_seed is None :
+        if is_random_obfuscation(
+                dict_obfuscator = get_obfuscator(
+                    obfuscator_type_index = obfuscator_type_index,
+                    reverse_obfuscation_flag = reverse_obfuscation_flag,),
+                gaps_insertion_flag = gaps_insertion_flag,
+                noise_insertion_percent = noise_insertion_percent,
+                reverse_obfuscation_flag = reverse_obfuscation_flag,
+                candidate_weights = candidate_weights,) :
+            # Seeds derived from the current time are never reproduced.
+            output_cache_dir_name = None
+        integer_random_seed = datetime.now().timestamp()
+    lst_tasks = []
+    for (str_input, str_output, str_key) in list_batch_files(
+            input_file_name = input_file_name,
+            output_dir_name = output_dir_name,) :
+        if Path(str_output).is_dir() :
+            raise FileExistsError(
+                "Output text file name is the directory name: " + str_output)
+        Path(str_output).parent.mkdir(parents = True, exist_ok = True)
+        lst_tasks.append((str_input, str_output, derive_random_seed(
+            integer_random_seed = integer_random_seed, str_key = str_key)))
+
+    func_task = partial(
+        obfuscate_batch_file,
+        obfuscator_type_index = obfuscator_type_index,
+        reverse_obfuscation_flag = reverse_obfuscation_flag,
+        gaps_insertion_flag = gaps_insertion_flag,
+        noise_insertion_percent = noise_insertion_percent,
+        engine = engine,
+        chunk_size = chunk_size,
+        mmap_flag = mmap_flag,
+        stats_flag = stats_flag,
+        rng_scheme = rng_scheme,
+        candidate_weights = candidate_weights,
+        output_cache_dir_name = output_cache_dir_name,
+        output_cache_size = output_cache_size,)
+    lst_failures = []
+    dict_file_stats = {}
+    with ProcessPoolExecutor(
+            max_workers = jobs,
+            initializer = warm_worker,
+            initargs = (obfuscator_type_index, reverse_obfuscation_flag,
+                        engine, candidate_weights,)) as executor :
+        dict_futures = {executor.submit(func_task, tpl_task) : tpl_task[0]
+                        for tpl_task in lst_tasks}
+        for future in as_completed(dict_futures) :
+            if future.exception() is not None :
+                lst_failures.append(dict_futures[future])
+                print("Failed: " + dict_futures[future] + ": " +
+                      str(future.exception()))
+            else :
+                if stats_flag :
+                    dict_file_stats[dict_futures[future]] = future.result()[1]
+                if verbosity_flag == 1 :
+                    print("Done: " + dict_futures[future])
+    if verbosity_flag == 1 :
+        print("Files processed: %d. Failed: %d." % (
+            len(lst_tasks), len(lst_failures)))
+    if lst_failures :
+        raise RuntimeError("%d of %d files failed." % (
+            len(lst_failures), len(lst_tasks)))
+    return dict_file_stats if stats_flag else None
+
+
+def init_watch_worker(*initargs) :
+    # Worker processes of "watch" leave interrupts to the daemon, which
+    # shuts the pool down, and are terminated silently by a SIGTERM sent to
+    # the whole process group.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    warm_worker(*initargs)
+
+
+def obfuscate_watch_file(tpl_task, **kwargs) :
+    # Obfuscate a file of the watched directory (see "obfuscate_batch_file")
+    # into a temporary file renamed to the output file, so the output file
+    # appears complete or not at all.
+    (input_file_name, output_file_name, integer_random_seed) = tpl_task
+    str_temp_file_name = '%s.%d.tmp' % (output_file_name, os.getpid())
+    try :
+        obfuscate_batch_file(
+            tpl_task = (input_file_name, str_temp_file_name, integer_random_seed),
+            **kwargs)
+        os.replace(str_temp_file_name, output_file_name)
+    finally :
+        if os.path.lexists(str_temp_file_name) :
+            os.remove(str_temp_file_name)
+    return input_file_name
+
+
+def watch(
+        obfuscator_type_index,
+        integer_random_seed,
+        input_dir_name,
+        output_dir_name,
+        watch_interval = 1.,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        verbosity_flag = 0,
+        reverse_obfuscation_flag = 0,
+        engine = 'python',
+        chunk_size = 0,
+        jobs = None,
+        mmap_flag = 0,
+        rng_scheme = 'sequential',
+        candidate_weights = None,
+        output_cache_dir_name = None,
+        output_cache_size = INT_DEFAULT_OUTPUT_CACHE_SIZE) :
+    # Poll the input directory every "watch_interval" seconds until
+    # interrupted, and obfuscate new and changed files into the mirrored
+    # output directory (see "list_batch_files") on a pool of "jobs" warm
+    # worker processes, with at most two files per worker in flight. A file
+    # is submitted once its size and modification time did not change over
+    # a polling interval, i.e. it is no longer being written. The status of
+    # every file ("done" or "failed", with its size and modification time,
+    # and the error) is kept in the status file of the output directory
+    # (see "STR_WATCH_STATUS_FILE"), replaced atomically after every change,
+    # so that processed files are skipped after a restart. Failed files are
+    # retried when they change. A crashed worker (e.g. killed out of memory)
+    # fails the files in flight, and the pool is replaced.
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    from concurrent.futures.process import BrokenProcessPool
+
+    path_input = Path(input_dir_name).resolve()
+    path_output = Path(output_dir_name).resolve()
+    if path_output == path_input or path_input in path_output.parents :
+        raise ValueError(
+            "Output directory cannot be inside the watched input directory.")
+    path_output.mkdir(parents = True, exist_ok = True)
+    status_file_name = os.path.join(output_dir_name, STR_WATCH_STATUS_FILE)
+    try :
+        with open(status_file_name, 'r', encoding='utf-8') as file :
+            dict_status = json.load(file)
+    except (OSError, ValueError) :
+        dict_status = {}
+    if integer_random_seed is None :
+        if is_random_obfuscation(
+                dict_obfuscator = get_obfuscator(
+                    obfuscator_type_index = obfuscator_type_index,
+                    reverse_obfuscation_flag = reverse_obfuscation_flag,),
+                gaps_insertion_flag = gaps_insertion_flag,
+                noise_insertion_percent = noise_insertion_percent,
+                reverse_obfuscation_flag = reverse_obfuscation_flag,
+                candidate_weights = candidate_weights,) :
+            # Seeds derived from the current time are never reproduced.
+            output_cache_dir_name = None
+        integer_random_seed = datetime.now().timestamp()
+
+    func_task = partial(
+        obfuscate_watch_file,
+        obfuscator_type_index = obfuscator_type_index,
+        reverse_obfuscation_flag = reverse_obfuscation_flag,
+        gaps_insertion_flag = gaps_insertion_flag,
+        noise_insertion_percent = noise_insertion_percent,
+        engine = engine,
+        chunk_size = chunk_size,
+        mmap_flag = mmap_flag,
+        rng_scheme = rng_scheme,
+        candidate_weights = candidate_weights,
+        output_cache_dir_name = output_cache_dir_name,
+        output_cache_size = output_cache_size,)
+    int_max_pending = 2 * (jobs or os.cpu_count() or 1)
+    # Signatures of files seen changed at the last poll, files ready to be
+    # submitted, and the files being processed by their futures.
+    dict_changed = {}
+    deque_ready = deque()
+    dict_futures = {}
+    # A service manager stops the daemon like an interrupt.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    if verbosity_flag == 1 :
+        print("Watching: %s -> %s" % (input_dir_name, output_dir_name,),
+              flush = True)
+    func_create_executor = partial(
+        ProcessPoolExecutor,
+        max_workers = jobs,
+        initializer = init_watch_worker,
+        initargs = (obfuscator_type_index, reverse_obfuscation_flag,
+                    engine, candidate_weights,))
+    executor = func_create_executor()
+    try :
+        flt_next_poll = 0.
+        while True :
+            if time.monotonic() >= flt_next_poll :
+                flt_next_poll = time.monotonic() + watch_interval
+                set_busy = set(x[0] for x in deque_ready)
+                set_busy.update(x[0] for x in dict_futures.values())
+                set_keys = set()
+                for (str_input, str_output, str_key) in list_batch_files(
+                        input_file_name = input_dir_name,
+                        output_dir_name = output_dir_name,) :
+                    set_keys.add(str_key)
+                    try :
+                        stat_input = os.stat(str_input)
+                    except OSError :
+                        continue
+                    lst_signature = [stat_input.st_size, stat_input.st_mtime_ns]
+                    if str_key in set_busy or (
+                            str_key in dict_status and
+                            dict_status[str_key]['signature'] == lst_signature) :
+                        continue
+                    if dict_changed.get(str_key) != lst_signature :
+                        dict_changed[str_key] = lst_signature
+                        continue
+                    del dict_changed[str_key]
+                    deque_ready.append((str_key, lst_signature, str_input, str_output))
+                for str_key in set(dict_changed) - set_keys :
+                    del dict_changed[str_key]
+                set_removed = set(dict_status) - set_keys
+                if set_removed :
+                    for str_key in set_removed :
+                        del dict_status[str_key]
+                    store_json_file(file_name = status_file_name, data = dict_status)
+            broken_flag = False
+            while deque_ready and len(dict_futures) < int_max_pending :
+                (str_key, lst_signature, str_input, str_output) = deque_ready[0]
+                Path(str_output).parent.mkdir(parents = True, exist_ok = True)
+                try :
+                    future = executor.submit(func_task, (
+                        str_input, str_output, derive_random_seed(
+                            integer_random_seed = integer_random_seed,
+                            str_key = str_key)))
+                except BrokenProcessPool :
+                    broken_flag = True
+                    break
+                deque_ready.popleft()
+                dict_futures[future] = (str_key, lst_signature, str_input)
+            flt_timeout = max(0., flt_next_poll - time.monotonic())
+            if not dict_futures and not broken_flag :
+                time.sleep(flt_timeout)
+                continue
+            # The files in flight fail with a broken pool.
+            (set_done, set_not_done) = wait(
+                dict_futures, timeout = None if broken_flag else flt_timeout,
+                return_when = FIRST_COMPLETED)
+            for future in set_done :
+                (str_key, lst_signature, str_input) = dict_futures.pop(future)
+                if future.exception() is not None :
+                    if isinstance(future.exception(), BrokenProcessPool) :
+                        broken_flag = True
+                    dict_status[str_key] = {
+                        'status' : 'failed',
+                        'signature' : lst_signature,
+                        'error' : str(future.exception()),
+                        }
+                    print("Failed: %s: %s" % (str_input, future.exception()),
+                          flush = True)
+                else :
+                    dict_status[str_key] = {
+                        'status' : 'done',
+                        'signature' : lst_signature,
+                        }
+                    if verbosity_flag == 1 :
+                        print("Done: " + str_input, flush = True)
+            if broken_flag :
+                # The remaining futures of the old pool fail at the next
+                # iterations.
+                executor.shutdown(wait = False)
+                executor = func_create_executor()
+            if set_done :
+                store_json_file(file_name = status_file_name, data = dict_status)
+    finally :
+        executor.shutdown(cancel_futures = True)
+
+
+def format_codepoint(str_char) :
+    return 'U+%04X %r' % (ord(str_char), str_char) if str_char else 'end of text'
+
+
+def verify_file(
+        tpl_task,
+        obfuscator_type_index,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        engine = 'python',
+        chunk_size = 0,
+        mmap_flag = 0,
+        rng_scheme = 'sequential',
+        candidate_weights = None) :
+    # Obfuscate and recover a file in memory, streamed in chunks, and
+    # compare the recovered text with the input as it is read. Return the
+    # input file name, the number of characters verified and the first
+    # mismatch (None if the file recovers exactly) as a dictionary of the
+    # character offset, line number, and expected and actual characters.
+    (input_file_name, integer_random_seed) = tpl_task
+    lst_stages = create_pipeline(
+        dict_obfuscator = get_obfuscator(
+            obfuscator_type_index = obfuscator_type_index,
+            reverse_obfuscation_flag = 0,),
+        dict_random_generators = create_random_generators(
+            integer_random_seed = integer_random_seed,
+            rng_scheme = rng_scheme,),
+        gaps_insertion_flag = gaps_insertion_flag,
+        noise_insertion_percent = noise_insertion_percent,
+        engine = engine,
+        rng_scheme = rng_scheme,
+        candidate_weights = candidate_weights,)
+    lst_stages.extend(create_pipeline(
+        dict_obfuscator = get_obfuscator(
+            obfuscator_type_index = obfuscator_type_index,
+            reverse_obfuscation_flag = 1,),
+        dict_random_generators = None,
+        gaps_insertion_flag = gaps_insertion_flag,
+        reverse_obfuscation_flag = 1,))
+    # Input chunks are kept until they are compared, which is at most a
+    # few chunks behind (see "stream_with_lookahead").
+    deque_input = deque()
+
+    def iter_input() :
+        for str_chunk in read_chunks(
+                input_file_name = input_file_name,
+                chunk_size = (chunk_size if chunk_size > 0
+                              else INT_DEFAULT_CHUNK_SIZE),
+                mmap_flag = mmap_flag,) :
+            deque_input.append(str_chunk)
+            yield str_chunk
+
+    int_offset = 0
+    int_line = 1
+    str_expected = ''
+    for str_recovered in stream_pipeline(
+            iter_str_chunks = iter_input(),
+            lst_stages = lst_stages,) :
+        while len(str_expected) < len(str_recovered) and deque_input :
+            str_expected += deque_input.popleft()
+        if not str_expected.startswith(str_recovered) :
+            i = next((i for (i, (x, y)) in enumerate(zip(
+                str_expected, str_recovered)) if x != y),
+                min(len(str_expected), len(str_recovered)))
+            return (input_file_name, int_offset + i, {
+                'offset' : int_offset + i,
+                'line' : int_line + str_expected.count('\n', 0, i),
+                'expected' : format_codepoint(str_expected[i : i + 1]),
+                'actual' : format_codepoint(str_recovered[i]),
+                })
+        int_line += str_recovered.count('\n')
+        int_offset += len(str_recovered)
+        str_expected = str_expected[len(str_recovered):]
+    str_expected += ''.join(deque_input)
+    if str_expected :
+        return (input_file_name, int_offset, {
+            'offset' : int_offset,
+            'line' : int_line,
+            'expected' : format_codepoint(str_expected[0]),
+            'actual' : format_codepoint(''),
+            })
+    return (input_file_name, int_offset, None)
+
+
+def verify(
+        obfuscator_type_index,
+        integer_random_seed,
+        input_file_name,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        verbosity_flag = 0,
+        engine = 'python',
+        chunk_size = 0,
+        jobs = None,
+        mmap_flag = 0,
+        rng_scheme = 'sequential',
+        candidate_weights = None) :
+    # Verify that a file, or the files of a batch input (see
+    # "list_batch_files") on "jobs" worker processes, recover exactly after
+    # obfuscation with the given parameters. Ambiguous symbols of the
+    # obfuscator are reported first. Print every mismatch and a throughput
+    # summary, and return the mismatches by input file name.
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if not 1 <= obfuscator_type_index <= len(DICT_OBFUSCATOR_TYPES) :
+        raise ValueError("Obfuscator type index must be between 1 and %d." %
+                         len(DICT_OBFUSCATOR_TYPES))
+    if integer_random_seed is None :
+        integer_random_seed = datetime.now().timestamp()
+    for (str_symbol, str_originals) in sorted(find_ambiguous_symbols(
+            dict_obfuscator = get_obfuscator(
+                obfuscator_type_index = obfuscator_type_index,
+                reverse_obfuscation_flag = 0,)).items()) :
+        print("Ambiguous reverse symbol %s of: %s" % (
+            format_codepoint(str_symbol),
+            ", ".join(format_codepoint(x) for x in str_originals)))
+    if input_file_name != STR_STDIO and is_batch_input(
+            input_file_name = input_file_name) :
+        lst_tasks = [(str_input, derive_random_seed(
+                          integer_random_seed = integer_random_seed,
+                          str_key = str_key))
+                     for (str_input, str_output, str_key) in list_batch_files(
+                         input_file_name = input_file_name,
+                         output_dir_name = '.',)]
+    else :
+        lst_tasks = [(input_file_name, integer_random_seed)]
+
+    func_task = partial(
+        verify_file,
+        obfuscator_type_index = obfuscator_type_index,
+        gaps_insertion_flag = gaps_insertion_flag,
+        noise_insertion_percent = noise_insertion_percent,
+        engine = engine,
+        chunk_size = chunk_size,
+        mmap_flag = mmap_flag,
+        rng_scheme = rng_scheme,
+        candidate_weights = candidate_weights,)
+    flt_start = time.perf_counter()
+    int_chars = 0
+    dict_mismatches = {}
+    if len(lst_tasks) == 1 or jobs == 1 :
+        iter_results = map(func_task, lst_tasks)
+    else :
+        executor = ProcessPoolExecutor(
+            max_workers = jobs,
+            initializer = warm_worker,
+            initargs = (obfuscator_type_index, 0, engine, candidate_weights,))
+        iter_results = (future.result() for future in as_completed(
+            [executor.submit(func_task, tpl_task) for tpl_task in lst_tasks]))
+    try :
+        for (str_input, int_file_chars, dict_mismatch) in iter_results :
+            int_chars += int_file_chars
+            if dict_mismatch is not None :
+                dict_mismatches[str_input] = dict_mismatch
+                print("Mismatch: %s: offset %d (line %d): expected %s, got %s." % (
+                    str_input, dict_mismatch['offset'], dict_mismatch['line'],
+                    dict_mismatch['expected'], dict_mismatch['actual'],))
+            elif verbosity_flag == 1 :
+                print("Verified: " + str_input)
+    finally :
+        if len(lst_tasks) > 1 and jobs != 1 :
+            executor.shutdown(cancel_futures = True)
+    flt_seconds = time.perf_counter() - flt_start
+    print("Files verified: %d. Failed: %d. Characters: %d in %.3f s (%.1f M characters/s)." % (
+        len(lst_tasks), len(dict_mismatches), int_chars, flt_seconds,
+        int_chars / max(flt_seconds, 1e-9) / 1e6,))
+    return dict_mismatches
+
+
+@lru_cache(maxsize = None)
+def get_scan_tables() :
+    # Codepoint bitmap of "scan_file": the ASCII characters and every
+    # symbol of the obfuscator types, alternate spaces, gaps and noise have
+    # indices from 1 in the list of symbols, other codepoints have index 0.
+    # Other letters are counted by script, as the first letter of the script
+    # listed after the "int_symbols" symbols: they are evidence of genuine
+    # text (see "score_obfuscation").
+    load_numpy()
+    set_symbols = set(chr(x) for x in range(0x80))
+    for dict_obfuscator in LST_DICT_OBFUSCATORS :
+        for value in dict_obfuscator.values() :
+            set_symbols.update(value)
+    set_symbols.update(''.join(TPL_STR_ALT_SPACES))
+    set_symbols.update((STR_GAP, STR_NEWLINE_GAP,))
+    set_symbols.update(TPL_STR_NOISE)
+    lst_symbols = [''] + sorted(set_symbols)
+    # All codepoints are indexed directly: no bound check is needed.
+    arr_indices = np.zeros(sys.maxunicode + 1, dtype = np.uint16)
+    for (i, str_symbol) in enumerate(lst_symbols[1:], 1) :
+        arr_indices[ord(str_symbol)] = i
+    int_symbols = len(lst_symbols)
+    dict_script_indices = {}
+    for int_codepoint in range(0x80, sys.maxunicode + 1) :
+        str_char = chr(int_codepoint)
+        if str_char.isalpha() and str_char not in set_symbols :
+            str_script = get_script(str_char)
+            if str_script not in dict_script_indices :
+                dict_script_indices[str_script] = len(lst_symbols)
+                lst_symbols.append(str_char)
+            arr_indices[int_codepoint] = dict_script_indices[str_script]
+    return (lst_symbols, arr_indices, int_symbols)
+
+
+def scan_file(tpl_task, chunk_size = 0, mmap_flag = 0) :
+    # Count the symbols of a file (see "get_scan_tables") with NumPy, in
+    # blocks of bytes: ASCII blocks are counted without decoding. Return the
+    # input file name and its report: the number of characters, the number
+    # and density of obfuscation characters (non-ASCII symbols), the
+    # suspected obfuscator type, gaps and noise (see "score_obfuscation"),
+    # and for types replacing all their characters ("full" types), the
+    # number of characters left unreplaced ("ascii_residue").
+    (input_file_name,) = tpl_task
+    (lst_symbols, arr_indices, int_symbols) = get_scan_tables()
+    arr_ascii_indices = arr_indices[:0x80]
+    arr_counts = np.zeros(len(lst_symbols), dtype = np.int64)
+    int_chars = 0
+    decoder = codecs.getincrementaldecoder('utf-8')(errors = 'replace')
+    for bytes_block in read_blocks(
+            input_file_name = input_file_name,
+            chunk_size = chunk_size if chunk_size > 0 else INT_DEFAULT_CHUNK_SIZE,
+            mmap_flag = mmap_flag,) :
+        if bytes_block.isascii() and not decoder.getstate()[0] :
+            arr_counts[arr_ascii_indices] += np.bincount(
+                np.frombuffer(bytes_block, dtype = np.uint8), minlength = 0x80)
+            int_chars += len(bytes_block)
+        else :
+            arr_codepoints = np.frombuffer(decoder.decode(bytes_block).encode(
+                'utf-32-le'), dtype = np.uint32)
+            arr_counts += np.bincount(arr_indices[arr_codepoints],
+                                      minlength = len(lst_symbols))
+            int_chars += len(arr_codepoints)
+    counter_chars = Counter({lst_symbols[i] : int(x) for (i, x) in
+                             enumerate(arr_counts) if i and x})
+    int_obfuscation_chars = sum(int(x) for x in arr_counts[0x80 + 1:int_symbols])
+    dict_report = {
+        'chars' : int_chars,
+        'obfuscation_chars' : int_obfuscation_chars,
+        'density' : int_obfuscation_chars / int_chars if int_chars else 0.,
+        'obfuscator_type_index' : None,
+        'gaps_insertion_flag' : 0,
+        'noise_insertion_flag' : 0,
+        'ascii_residue' : None,
+        }
+    if int_obfuscation_chars :
+        dict_detection = score_obfuscation(counter_chars = counter_chars)
+        for str_key in ('obfuscator_type_index', 'gaps_insertion_flag',
+                        'noise_insertion_flag',) :
+            dict_report[str_key] = dict_detection[str_key]
+        if dict_report['obfuscator_type_index'] is None :
+            return (input_file_name, dict_report)
+        dict_obfuscator = LST_DICT_OBFUSCATORS[
+            dict_detection['obfuscator_type_index'] - 1]
+        if all(key[0] not in value for (key, value) in dict_obfuscator.items()) :
+            dict_report['ascii_residue'] = sum(
+                counter_chars[key[0]] for key in dict_obfuscator.keys()
+                if not (dict_detection['gaps_insertion_flag'] and
+                        key[0] == STR_ORIG_SPACE))
+    return (input_file_name, dict_report)
+
+
+def scan(input_file_name, chunk_size = 0, jobs = None, mmap_flag = 0) :
+    # Scan a file, or the files of a batch input (see "list_batch_files") on
+    # "jobs" worker processes, for obfuscation (see "scan_file"). Print a
+    # line per file and a throughput summary, and return the reports by
+    # input file name.
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if input_file_name != STR_STDIO and is_batch_input(
+            input_file_name = input_file_name) :
+        lst_tasks = [(str_input,) for (str_input, str_output, str_key) in
+                     list_batch_files(
+                         input_file_name = input_file_name,
+                         output_dir_name = '.',)]
+    else :
+        lst_tasks = [(input_file_name,)]
+
+    func_task = partial(scan_file, chunk_size = chunk_size, mmap_flag = mmap_flag,)
+    flt_start = time.perf_counter()
+    int_chars = 0
+    dict_reports = {}
+    if len(lst_tasks) == 1 or jobs == 1 :
+        iter_results = map(func_task, lst_tasks)
+    else :
+        executor = ProcessPoolExecutor(max_workers = jobs)
+        iter_results = (future.result() for future in as_completed(
+            [executor.submit(func_task, tpl_task) for tpl_task in lst_tasks]))
+    try :
+        for (str_input, dict_report) in iter_results :
+            int_chars += dict_report['chars']
+            dict_reports[str_input] = dict_report
+            print("Scanned: %s: density %.4f, type %s, gaps %d, noise %d, ASCII residue %s." % (
+                str_input, dict_report['density'],
+                dict_report['obfuscator_type_index'] or '-',
+                dict_report['gaps_insertion_flag'],
+                dict_report['noise_insertion_flag'],
+                '-' if dict_report['ascii_residue'] is None
+                else dict_report['ascii_residue'],))
+    finally :
+        if len(lst_tasks) > 1 and jobs != 1 :
+            executor.shutdown(cancel_futures = True)
+    flt_seconds = time.perf_counter() - flt_start
+    print("Files scanned: %d. Obfuscated: %d. Characters: %d in %.3f s (%.1f M characters/s)." % (
+        len(lst_tasks), sum(1 for x in dict_reports.values()
+                            if x['obfuscator_type_index'] is not None),
+        int_chars, flt_seconds, int_chars / max(flt_seconds, 1e-9) / 1e6,))
+    return dict_reports
+
+
+def transform_text(
+        str_input,
+        obfuscator_type_index,
+        integer_random_seed = None,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        reverse_obfuscation_flag = 0,
+        engine = 'python',
+        rng_scheme = 'sequential',
+        candidate_weights = None) :
+    # Obfuscate (or recover) a text in memory. The output is identical to
+    # the output file obfuscated with the same parameters.
+    if not 0 <= obfuscator_type_index <= len(DICT_OBFUSCATOR_TYPES) :
+        raise ValueError("Obfuscator type index must be between 0 and %d." %
+                         len(DICT_OBFUSCATOR_TYPES))
+    if engine not in TPL_ENGINES :
+        raise ValueError("Engine must be one of: " + ", ".join(TPL_ENGINES) + ".")
+    if rng_scheme not in TPL_RNG_SCHEMES :
+        raise ValueError("Random number scheme must be one of: " +
+                         ", ".join(TPL_RNG_SCHEMES) + ".")
+    if obfuscator_type_index == INT_UNIVERSAL_TYPE_INDEX and reverse_obfuscation_flag :
+        dict_detection = detect_obfuscation(str_input = str_input)
+        if dict_detection['gaps_insertion_flag'] :
+            gaps_insertion_flag = 1
+        dict_obfuscator = get_recovery_obfuscator(
+            tpl_type_indices = dict_detection['tpl_best_types'])
+    else :
+        dict_obfuscator = get_obfuscator(
+            obfuscator_type_index = obfuscator_type_index,
+            reverse_obfuscation_flag = reverse_obfuscation_flag,)
+    return apply_pipeline(
+        str_input = str_input,
+        lst_stages = create_pipeline(
+            dict_obfuscator = dict_obfuscator,
+            dict_random_generators = create_random_generators(
+                integer_random_seed = integer_random_seed,
+                rng_scheme = rng_scheme,),
+            gaps_insertion_flag = gaps_insertion_flag,
+            noise_insertion_percent = noise_insertion_percent,
+            reverse_obfuscation_flag = reverse_obfuscation_flag,
+            engine = engine,
+            rng_scheme = rng_scheme,
+            candidate_weights = candidate_weights,),)
+
+
+def warm_server_worker() :
+    # Validate and compile the tables of all obfuscator types.
+    for obfuscator_type_index in DICT_OBFUSCATOR_TYPES :
+        for reverse_obfuscation_flag in (0, 1,) :
+            warm_worker(
+                obfuscator_type_index = obfuscator_type_index,
+                reverse_obfuscation_flag = reverse_obfuscation_flag,
+                engine = 'python',)
+    get_compiled_table(
+        func_compile = compile_reverse_table,
+        dict_obfuscator = get_obfuscator(
+            obfuscator_type_index = INT_UNIVERSAL_TYPE_INDEX,
+            reverse_obfuscation_flag = 1,),
+        gaps_insertion_flag = 0,)
+
+
+def parse_request(dict_request) :
+    # Return the keyword arguments of "transform_text" of a request.
+    if not isinstance(dict_request, dict) :
+        raise ValueError("Request must be a JSON object.")
+    str_operation = dict_request.get('operation', 'obfuscate')
+    if str_operation not in TPL_SERVE_OPERATIONS :
+        raise ValueError("Operation must be one of: " +
+                         ", ".join(TPL_SERVE_OPERATIONS) + ".")
+    if not isinstance(dict_request.get('text'), str) :
+        raise ValueError("Request text must be a string.")
+    # JSON booleans are Python integers: they are rejected explicitly.
+    for str_parameter in ('obfuscator_type_index', 'integer_random_seed',
+                          'gaps_insertion_flag', 'noise_insertion_percent',) :
+        value = dict_request.get(str_parameter)
+        if value is not None and (isinstance(value, bool) or
+                                  not isinstance(value, int)) :
+            raise ValueError("Request %s must be an integer." % str_parameter)
+    for str_parameter in ('keep_original_percent', 'lookalike_decay',) :
+        value = dict_request.get(str_parameter)
+        if value is not None and (isinstance(value, bool) or
+                                  not isinstance(value, (int, float))) :
+            raise ValueError("Request %s must be a number." % str_parameter)
+    if dict_request.get('gaps_insertion_flag') not in (None, 0, 1,) :
+        raise ValueError("Request gaps_insertion_flag must be 0 or 1.")
+    if not 0 <= (dict_request.get('noise_insertion_percent') or 0) <= 100 :
+        raise ValueError(
+            "Request noise_insertion_percent must be between 0 and 100.")
+    for (str_parameter, tpl_values) in (('engine', TPL_ENGINES,),
+                                        ('rng_scheme', TPL_RNG_SCHEMES,),) :
+        if dict_request.get(str_parameter) not in (None,) + tpl_values :
+            raise ValueError("Request %s must be one of: %s." % (
+                str_parameter, ", ".join(tpl_values)))
+    dict_kwargs = {x : dict_request[x] for x in TPL_SERVE_PARAMETERS
+                   if dict_request.get(x) is not None}
+    dict_kwargs['str_input'] = dict_request['text']
+    dict_kwargs['candidate_weights'] = get_candidate_weights(
+        keep_original_percent = dict_request.get('keep_original_percent'),
+        lookalike_decay = dict_request.get('lookalike_decay'),)
+    dict_kwargs['reverse_obfuscation_flag'] = (
+        1 if str_operation == 'recover' else 0)
+    if 'obfuscator_type_index' not in dict_kwargs :
+        raise ValueError("Request must have an obfuscator type index.")
+    return dict_kwargs
+
+
+async def serve_connection(
+        reader, writer, executor, semaphore_workers, verbosity_flag = 0) :
+    # Answer the JSON requests of one connection, one per line. Up to
+    # INT_SERVE_MAX_PENDING requests of the connection are in flight; no
+    # more lines are read until one of them is answered, so a fast client
+    # is slowed down by the socket buffers (backpressure). Responses carry
+    # the request "id" and may be sent out of order.
+    loop = asyncio.get_running_loop()
+    semaphore_pending = asyncio.Semaphore(INT_SERVE_MAX_PENDING)
+    lock_write = asyncio.Lock()
+    set_tasks = set()
+
+    async def answer(bytes_line) :
+        request_id = None
+        try :
+            dict_request = json.loads(bytes_line)
+            if isinstance(dict_request, dict) :
+                request_id = dict_request.get('id')
+            dict_kwargs = parse_request(dict_request = dict_request)
+            if len(dict_kwargs['str_input']) <= INT_SERVE_INLINE_SIZE :
+                str_output = transform_text(**dict_kwargs)
+            else :
+                async with semaphore_workers :
+                    str_output = await loop.run_in_executor(
+                        executor, partial(transform_text, **dict_kwargs))
+            dict_response = {'id' : request_id, 'text' : str_output,}
+        except Exception as exception :
+            dict_response = {'id' : request_id, 'error' : str(exception),}
+            if verbosity_flag == 1 :
+                print("Failed request: " + str(exception))
+        try :
+            async with lock_write :
+                writer.write((json.dumps(dict_response, ensure_ascii = False) +
+                              '\n').encode('utf-8'))
+                await writer.drain()
+        finally :
+            semaphore_pending.release()
+
+    try :
+        while True :
+            await semaphore_pending.acquire()
+            try :
+                bytes_line = await reader.readline()
+            except ValueError :
+                # The request line is longer than INT_SERVE_MAX_REQUEST_SIZE.
+                bytes_line = b''
+            if not bytes_line.strip() :
+                semaphore_pending.release()
+                if not bytes_line :
+                    break
+                continue
+            task = asyncio.create_task(answer(bytes_line = bytes_line))
+            set_tasks.add(task)
+            task.add_done_callback(set_tasks.discard)
+        if set_tasks :
+            await asyncio.gather(*set_tasks, return_exceptions = True)
+    finally :
+        writer.close()
+        try :
+            await writer.wait_closed()
+        except OSError :
+            pass
+
+
+async def serve(listen_address, jobs = None, verbosity_flag = 0) :
+    # Serve obfuscate/recover requests on a Unix domain socket
+    # ("unix:PATH") or a TCP address ("[HOST:]PORT", localhost by default)
+    # until interrupted. Small requests are answered in the event loop and
+    # larger ones on a pool of warm worker processes.
+    from concurrent.futures import ProcessPoolExecutor
+
+    warm_server_worker()
+    jobs = jobs if jobs else (os.cpu_count() or 1)
+    with ProcessPoolExecutor(
+            max_workers = jobs,
+            initializer = warm_server_worker,) as executor :
+        semaphore_workers = asyncio.Semaphore(2 * jobs)
+        func_serve_connection = partial(
+            serve_connection,
+            executor = executor,
+            semaphore_workers = semaphore_workers,
+            verbosity_flag = verbosity_flag,)
+        if listen_address.startswith('unix:') :
+            str_socket_path = listen_address[len('unix:'):]
+            if os.path.lexists(str_socket_path) :
+                # Only a stale socket is replaced, never another file.
+                if not stat.S_ISSOCK(os.lstat(str_socket_path).st_mode) :
+                    raise FileExistsError(
+                        "Socket path exists and is not a socket: " + str_socket_path)
+                os.remove(str_socket_path)
+            server = await asyncio.start_unix_server(
+                func_serve_connection,
+                path = str_socket_path,
+                limit = INT_SERVE_MAX_REQUEST_SIZE,)
+        else :
+            (str_host, str_separator, str_port) = listen_address.rpartition(':')
+            server = await asyncio.start_server(
+                func_serve_connection,
+                host = str_host if str_host else '127.0.0.1',
+                port = int(str_port),
+                limit = INT_SERVE_MAX_REQUEST_SIZE,)
+        if verbosity_flag == 1 :
+            print("Listening on: " + ", ".join(
+                str(x.getsockname()) for x in server.sockets))
+        async with server :
+            await server.serve_forever()
+
+
+def get_dataset_format(input_file_name, dataset_format = None) :
+    # The record format given, or implied by the input file extension.
+    if dataset_format is None :
+        dataset_format = DICT_DATASET_FORMATS.get(
+            Path(input_file_name).suffix.lower(), 'jsonl')
+    if dataset_format not in TPL_DATASET_FORMATS :
+        raise ValueError("Dataset format must be one of: " +
+                         ", ".join(TPL_DATASET_FORMATS) + ".")
+    return dataset_format
+
+
+def obfuscate_records(
+        tpl_task,
+        dataset_format,
+        tpl_fields,
+        integer_random_seed,
+        **kwargs) :
+    # Transform the fields of a batch of records (JSON lines, or CSV rows as
+    # lists of cells) with "transform_text". Each value gets its own seed
+    # derived from the record index and the field name, so the output does
+    # not depend on the batching or the number of jobs. Values that are
+    # missing or are not strings are passed through, and so are malformed
+    # JSON lines (reported with their line number) and JSON lines with no
+    # value changed, as they are.
+    (int_first_record, lst_records) = tpl_task
+    lst_output = []
+    int_values = 0
+    for (int_record, record) in enumerate(lst_records, int_first_record) :
+        if dataset_format == 'jsonl' :
+            if not record.strip() :
+                lst_output.append(record)
+                continue
+            try :
+                obj_record = json.loads(record)
+            except ValueError as error :
+                print("Malformed JSON line %d passed through: %s" % (
+                    int_record + 1, error,), file = sys.stderr, flush = True)
+                lst_output.append(record)
+                continue
+        else :
+            obj_record = record
+        changed_flag = False
+        for (str_field, locator) in tpl_fields :
+            obj_parent = obj_record
+            if dataset_format == 'jsonl' :
+                # Dotted field names address nested objects.
+                for str_key in locator[:-1] :
+                    obj_parent = (obj_parent.get(str_key)
+                                  if isinstance(obj_parent, dict) else None)
+                key = locator[-1]
+                if not (isinstance(obj_parent, dict) and
+                        isinstance(obj_parent.get(key), str)) :
+                    continue
+            else :
+                key = locator
+                if key >= len(obj_parent) :
+                    continue
+            str_value = transform_text(
+                str_input = obj_parent[key],
+                integer_random_seed = derive_random_seed(
+                    integer_random_seed = integer_random_seed,
+                    str_key = '%d:%s' % (int_record, str_field)),
+                **kwargs)
+            changed_flag = changed_flag or str_value != obj_parent[key]
+            obj_parent[key] = str_value
+            int_values += 1
+        if dataset_format == 'jsonl' :
+            lst_output.append(json.dumps(obj_record, ensure_ascii = False)
+                              if changed_flag else record)
+        else :
+            lst_output.append(obj_record)
+    return (lst_output, int_values)
+
+
+def obfuscate_dataset(
+        obfuscator_type_index,
+        integer_random_seed,
+        input_file_name,
+        output_file_name,
+        lst_fields,
+        dataset_format = None,
+        gaps_insertion_flag = 0,
+        noise_insertion_percent = 0,
+        verbosity_flag = 0,
+        reverse_obfuscation_flag = 0,
+        engine = 'python',
+        jobs = None,
+        stats_flag = 0,
+        rng_scheme = 'sequential',
+        candidate_weights = None) :
+    # Stream the records of a JSON Lines or CSV dataset in batches of
+    # INT_DATASET_BATCH_SIZE, transforming the named fields (JSON keys, or
+    # CSV columns) and writing the records in their input order. With
+    # "jobs", at most two batches per worker are in flight, so memory does
+    # not depend on the dataset size. With the universal obfuscator type,
+    # every value is detected on its own.
+    # A field named twice is transformed once.
+    lst_fields = list(dict.fromkeys(lst_fields))
+    dataset_format = get_dataset_format(
+        input_file_name = input_file_name,
+        dataset_format = dataset_format,)
+    if integer_random_seed is None :
+        integer_random_seed = datetime.now().timestamp()
+    str_newline = '' if dataset_format == 'csv' else None
+    flt_start = time.perf_counter()
+    int_records = 0
+    int_values = 0
+    with open_input(input_file_name = input_file_name,
+                    newline = str_newline,) as file_input :
+        # The CSV header is checked before the output is opened (and an
+        # existing output file truncated).
+        if dataset_format == 'csv' :
+            iter_records = csv.reader(file_input)
+            lst_header = next(iter_records, None)
+            if lst_header is None :
+                # An empty dataset has no columns to check.
+                (lst_header, lst_fields) = ([], [])
+            lst_missing = [x for x in lst_fields if x not in lst_header]
+            if lst_missing :
+                raise ValueError("Dataset columns not found: " +
+                                 ", ".join(lst_missing) + ".")
+            tpl_fields = tuple((x, lst_header.index(x)) for x in lst_fields)
+        else :
+            iter_records = (x.rstrip('\n') for x in file_input)
+            tpl_fields = tuple((x, x.split('.')) for x in lst_fields)
+        with open_output(output_file_name = output_file_name,
+                         newline = str_newline,) as file_output :
+            if dataset_format == 'csv' :
+                writer = csv.writer(file_output)
+                if lst_header :
+                    writer.writerow(lst_header)
+                func_write = writer.writerows
+            else :
+                func_write = lambda lst_lines : file_output.write(
+                    ''.join(x + '\n' for x in lst_lines))
+
+            def iter_tasks() :
+                lst_batch = []
+                int_first_record = 0
+                for record in iter_records :
+                    lst_batch.append(record)
+                    if len(lst_batch) == INT_DATASET_BATCH_SIZE :
+                        yield (int_first_record, lst_batch)
+                        int_first_record += len(lst_batch)
+                        lst_batch = []
+                if lst_batch :
+                    yield (int_first_record, lst_batch)
+
+            func_task = partial(
+                obfuscate_records,
+                dataset_format = dataset_format,
+                tpl_fields = tpl_fields,
+                integer_random_seed = integer_random_seed,
+                obfuscator_type_index = obfuscator_type_index,
+                gaps_insertion_flag = gaps_insertion_flag,
+                noise_insertion_percent = noise_insertion_percent,
+                reverse_obfuscation_flag = reverse_obfuscation_flag,
+                engine = engine,
+                rng_scheme = rng_scheme,
+                candidate_weights = candidate_weights,)
+            if jobs is None :
+                iter_results = map(func_task, iter_tasks())
+            else :
+                iter_results = map_bounded(
+                    func_task = func_task,
+                    iter_tasks = iter_tasks(),
+                    jobs = jobs,
+                    initializer = warm_worker,
+                    initargs = (obfuscator_type_index, reverse_obfuscation_flag,
+                                engine, candidate_weights,),)
+            for (lst_output, int_batch_values) in iter_results :
+                func_write(lst_output)
+                if output_file_name == STR_STDIO :
+                    file_output.flush()
+                int_records += len(lst_output)
+                int_values += int_batch_values
+    if verbosity_flag == 1 :
+        print("Records processed: %d. Values transformed: %d." % (
+            int_records, int_values),
+            file = sys.stderr if output_file_name == STR_STDIO else sys.stdout)
+    if not stats_flag :
+        return None
+    return {
+        'records' : int_records,
+        'values' : int_values,
+        'seconds' : time.perf_counter() - flt_start,
+        }
+
+
+def map_bounded(func_task, iter_tasks, jobs, initializer = None, initargs = ()) :
+    # Yield the results of the tasks in order from a pool of "jobs" worker
+    # processes, with at most two tasks per worker in flight.
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+            max_workers = jobs,
+            initializer = initializer,
+            initargs = initargs) as executor :
+        deque_futures = deque()
+        for tpl_task in iter_tasks :
+            deque_futures.append(executor.submit(func_task, tpl_task))
+            if len(deque_futures) >= 2 * (jobs or os.cpu_count() or 1) :
+                yield deque_futures.popleft().result()
+        while deque_futures :
+            yield deque_futures.popleft().result()
+
+
 def main(
-         obfuscator_type_index : int,
-         input_file_name : str,
-         output_file_name : str,
+         obfuscator_type_index : int = None,
+         input_file_name : str = None,
+         output_file_name : str = None,
          integer_random_seed : int = None,
          gaps_insertion_flag : int = None,
          noise_insertion_percent : int = None,
          verbosity_flag : int = None,
          reverse_obfuscation_flag : int = None,
+         engine : str = None,
+         chunk_size : int = None,
+         jobs : int = None,
+         mmap_flag : int = None,
+         stats_flag : int = None,
+         listen_address : str = None,
+         rng_scheme : str = None,
+         fields : str = None,
+         dataset_format : str = None,
+         keep_original_percent : float = None,
+         lookalike_decay : float = None,
+         output_cache_dir_name : str = None,
+         output_cache_size : int = None,
+         verify_flag : int = None,
+         scan_flag : int = None,
+         incremental_flag : int = None,
+         watch_interval : float = None,
          ) :
     gaps_insertion_flag = 0 if gaps_insertion_flag is None else gaps_insertion_flag
     noise_insertion_percent = 0 if noise_insertion_percent is None else noise_insertion_percent
     verbosity_flag = 0 if verbosity_flag is None else verbosity_flag
     reverse_obfuscation_flag = 0 if reverse_obfuscation_flag is None else reverse_obfuscation_flag
-    if 1 <= obfuscator_type_index <= len(DICT_OBFUSCATOR_TYPES) :
-        if Path(input_file_name).is_file() :
-            if not Path(output_file_name).is_dir() :
-                if Path(output_file_name).is_file() :
+    engine = 'python' if engine is None else engine
+    chunk_size = 0 if chunk_size is None else chunk_size
+    mmap_flag = 0 if mmap_flag is None else mmap_flag
+    stats_flag = 0 if stats_flag is None else stats_flag
+    rng_scheme = 'sequential' if rng_scheme is None else rng_scheme
+    output_cache_size = (INT_DEFAULT_OUTPUT_CACHE_SIZE if output_cache_size is None
+                         else output_cache_size)
+    # Traces go to the standard error when the output is the standard output.
+    file_log = sys.stderr if output_file_name == STR_STDIO else sys.stdout
+    if engine not in TPL_ENGINES :
+        raise ValueError("Engine must be one of: " + ", ".join(TPL_ENGINES) + ".")
+    if rng_scheme not in TPL_RNG_SCHEMES :
+        raise ValueError("Random number scheme must be one of: " +
+                         ", ".join(TPL_RNG_SCHEMES) + ".")
+    candidate_weights = get_candidate_weights(
+        keep_original_percent = keep_original_percent,
+        lookalike_decay = lookalike_decay,)
+    if listen_address is not None :
+        try :
+            asyncio.run(serve(
+                listen_address = listen_address,
+                jobs = jobs,
+                verbosity_flag = verbosity_flag,))
+        except KeyboardInterrupt :
+            pass
+        return
+    if scan_flag :
+        if input_file_name != STR_STDIO and not (
+                Path(input_file_name).is_file() or
+                is_batch_input(input_file_name = input_file_name)) :
+            raise FileNotFoundError("Input text file does not exist.")
+        dict_reports = scan(
+            input_file_name = input_file_name,
+            chunk_size = chunk_size,
+            jobs = jobs,
+            mmap_flag = mmap_flag,)
+        if stats_flag :
+            print(json.dumps(dict_reports, indent = 1))
+        return
+    lst_missing = [str_name for (str_name, value) in (
+        ("obfuscator_type_index", obfuscator_type_index),
+        ("input_file_name", input_file_name),
+        ("output_file_name", output_file_name if not verify_flag else ''),)
+        if value is None]
+    if lst_missing :
+        raise ValueError("The following arguments are required: " +
+                         ", ".join(lst_missing) + ".")
+    if (obfuscator_type_index == INT_UNIVERSAL_TYPE_INDEX and
+            reverse_obfuscation_flag == 0) :
+        raise ValueError(
+            "Universal obfuscator type 0 requires reverse obfuscation (-r 1).")
+    if 0 <= obfuscator_type_index <= len(DICT_OBFUSCATOR_TYPES) :
+        if verify_flag :
+            if input_file_name != STR_STDIO and not (
+                    Path(input_file_name).is_file() or
+                    is_batch_input(input_file_name = input_file_name)) :
+                raise FileNotFoundError("Input text file does not exist.")
+            dict_mismatches = verify(
+                obfuscator_type_index = obfuscator_type_index,
+                integer_random_seed = integer_random_seed,
+                input_file_name = input_file_name,
+                gaps_insertion_flag = gaps_insertion_flag,
+                noise_insertion_percent = noise_insertion_percent,
+                verbosity_flag = verbosity_flag,
+                engine = engine,
+                chunk_size = chunk_size,
+                jobs = jobs,
+                mmap_flag = mmap_flag,
+                rng_scheme = rng_scheme,
+                candidate_weights = candidate_weights,)
+            if dict_mismatches :
+                raise RuntimeError("%d files do not recover exactly." %
+                                   len(dict_mismatches))
+            return
+        elif fields is not None :
+            if input_file_name != STR_STDIO and not Path(input_file_name).is_file() :
+                raise FileNotFoundError("Input dataset file does not exist.")
+            if output_file_name != STR_STDIO and Path(output_file_name).is_dir() :
+                raise FileExistsError(
+                    "Output dataset file name is the directory name.")
+            dict_stats = obfuscate_dataset(
+                obfuscator_type_index = obfuscator_type_index,
+                integer_random_seed = integer_random_seed,
+                input_file_name = input_file_name,
+                output_file_name = output_file_name,
+                lst_fields = [x.strip() for x in fields.split(',') if x.strip()],
+                dataset_format = dataset_format,
+                gaps_insertion_flag = gaps_insertion_flag,
+                noise_insertion_percent = noise_insertion_percent,
+                verbosity_flag = verbosity_flag,
+                reverse_obfuscation_flag = reverse_obfuscation_flag,
+                engine = engine,
+                jobs = jobs,
+                stats_flag = stats_flag,
+                rng_scheme = rng_scheme,
+                candidate_weights = candidate_weights,)
+        elif incremental_flag :
+            if obfuscator_type_index == INT_UNIVERSAL_TYPE_INDEX :
+                raise ValueError("Incremental obfuscation requires an "
+                                 "obfuscator type other than 0.")
+            if input_file_name != STR_STDIO and not Path(input_file_name).is_file() :
+                raise FileNotFoundError("Input text file does not exist.")
+            if output_file_name != STR_STDIO and Path(output_file_name).is_dir() :
+                raise FileExistsError(
+                    "Output text file name is the directory name.")
+            dict_stats = obfuscate_incremental(
+                dict_obfuscator = get_obfuscator(
+                    obfuscator_type_index = obfuscator_type_index,
+                    reverse_obfuscation_flag = reverse_obfuscation_flag,),
+                integer_random_seed = integer_random_seed,
+                input_file_name = input_file_name,
+                output_file_name = output_file_name,
+                gaps_insertion_flag = gaps_insertion_flag,
+                noise_insertion_percent = noise_insertion_percent,
+                verbosity_flag = verbosity_flag,
+                reverse_obfuscation_flag = reverse_obfuscation_flag,
+                engine = engine,
+                chunk_size = chunk_size,
+                rng_scheme = rng_scheme,
+                candidate_weights = candidate_weights,)
+        elif watch_interval is not None :
+            if not Path(input_file_name).is_dir() :
+                raise FileNotFoundError("Input directory does not exist.")
+            if Path(output_file_name).is_file() :
+                raise FileExistsError(
+                    "Output directory name is the text file name.")
+            if watch_interval <= 0 :
+                raise ValueError("Watch interval must be positive.")
+            try :
+                watch(
+                    obfuscator_type_index = obfuscator_type_index,
+                    integer_random_seed = integer_random_seed,
+                    input_dir_name = input_file_name,
+                    output_dir_name = output_file_name,
+                    watch_interval = watch_interval,
+                    gaps_insertion_flag = gaps_insertion_flag,
+                    noise_insertion_percent = noise_insertion_percent,
+                    verbosity_flag = verbosity_flag,
+                    reverse_obfuscation_flag = reverse_obfuscation_flag,
+                    engine = engine,
+                    chunk_size = chunk_size,
+                    jobs = jobs,
+                    mmap_flag = mmap_flag,
+                    rng_scheme = rng_scheme,
+                    candidate_weights = candidate_weights,
+                    output_cache_dir_name = output_cache_dir_name,
+                    output_cache_size = output_cache_size,)
+            except KeyboardInterrupt :
+                pass
+            return
+        elif is_batch_input(input_file_name = input_file_name) :
+            if not Path(output_file_name).is_file() :
+                dict_stats = obfuscate_batch(
+                    obfuscator_type_index = obfuscator_type_index,
+                    integer_random_seed = integer_random_seed,
+                    input_file_name = input_file_name,
+                    output_dir_name = output_file_name,
+                    gaps_insertion_flag = gaps_insertion_flag,
+                    noise_insertion_percent = noise_insertion_percent,
+                    verbosity_flag = verbosity_flag,
+                    reverse_obfuscation_flag = reverse_obfuscation_flag,
+                    engine = engine,
+                    chunk_size = chunk_size,
+                    jobs = jobs,
+                    mmap_flag = mmap_flag,
+                    stats_flag = stats_flag,
+                    rng_scheme = rng_scheme,
+                    candidate_weights = candidate_weights,
+                    output_cache_dir_name = output_cache_dir_name,
+                    output_cache_size = output_cache_size,)
+            else :
+                raise FileExistsError(
+                    "Output directory name is the text file name.")
+        elif input_file_name == STR_STDIO or Path(input_file_name).is_file() :
+            if output_file_name == STR_STDIO or not Path(output_file_name).is_dir() :
+                if output_file_name != STR_STDIO and Path(output_file_name).is_file() :
                     Path(output_file_name).unlink()
-                if not Path(output_file_name).is_file() :
+                if output_file_name == STR_STDIO or not Path(output_file_name).is_file() :
+                    dict_detection = None
+                    if obfuscator_type_index == INT_UNIVERSAL_TYPE_INDEX :
+                        # The standard input is sampled from its start only.
+                        dict_detection = detect_obfuscation(
+                            str_input = peek_stdin()
+                            if input_file_name == STR_STDIO
+                            else read_sample(input_file_name = input_file_name))
+                        if not dict_detection['tpl_best_types'] :
+                            print("No obfuscation detected: the text is passed "
+                                  "through unchanged.", file = file_log)
+                        elif len(dict_detection['tpl_best_types']) == 1 :
+                            print("Detected obfuscator type: " +
+                                  DICT_OBFUSCATOR_TYPES[
+                                      dict_detection['obfuscator_type_index']],
+                                  file = file_log)
+                        else :
+                            print("Inconclusive obfuscator types: " + ", ".join(
+                                str(x) for x in dict_detection['tpl_best_types']),
+                                file = file_log)
+                        print("Detected gaps: %d. Detected noise: %d." % (
+                            dict_detection['gaps_insertion_flag'],
+                            dict_detection['noise_insertion_flag'],),
+                            file = file_log)
+                        if verbosity_flag == 1 :
+                            print("Score %.1f: genuine text (no obfuscation)" % (
+                                dict_detection['flt_genuine_score']),
+                                file = file_log)
+                            for (i, flt_score) in sorted(
+                                    dict_detection['dict_scores'].items(),
+                                    key = lambda x : -x[1]) :
+                                print("Score %.1f: %s" % (
+                                    flt_score, DICT_OBFUSCATOR_TYPES[i]),
+                                    file = file_log)
+                        print(file = file_log)
+                        if dict_detection['gaps_insertion_flag'] :
+                            gaps_insertion_flag = 1
                     if verbosity_flag == 1 :
-                        print("Obfuscator type: " +
-                              DICT_OBFUSCATOR_TYPES[obfuscator_type_index])
-                        print("Input file name: " + input_file_name)
-                        print("Output file name: " + output_file_name)
-                        print()
-                    lst_dict_obfuscators = [
-                        DICT_OBFUSCATOR_DETER_FULL_SPACES,
-                        DICT_OBFUSCATOR_RANDOM_FULL_SPACES,
-                        DICT_OBFUSCATOR_RANDOM_PARTIAL_SPACES,
-                        #
-                        DICT_OBFUSCATOR_DETER_FULL,
-                        DICT_OBFUSCATOR_RANDOM_FULL,
-                        DICT_OBFUSCATOR_RANDOM_PARTIAL,
-                        DICT_OBFUSCATOR_RANDOM_ALL,
-                        #
-                        DICT_OBFUSCATOR_DETER_FULL_FONT_FULLWIDTH_FORM,
-                        DICT_OBFUSCATOR_DETER_FULL_FONT_MATH_SAN_SERIF,
-                        DICT_OBFUSCATOR_DETER_FULL_FONT_MATH_MONOSPACE,
-                        ]
-                    dict_obfuscator = lst_dict_obfuscators[
-                        obfuscator_type_index - 1]
-                    validate_obfuscator(dict_obfuscator = dict_obfuscator)
-                    if reverse_obfuscation_flag != 0 :
-                        dict_obfuscator = revert_obfuscator(
-                            dict_obfuscator = dict_obfuscator)
-                    obfuscate(
+                        print("Obfuscator type: " + (
+                            DICT_OBFUSCATOR_TYPES[obfuscator_type_index]
+                            if obfuscator_type_index in DICT_OBFUSCATOR_TYPES
+                            else STR_UNIVERSAL_TYPE), file = file_log)
+                        print("Input file name: " + input_file_name,
+                              file = file_log)
+                        print("Output file name: " + output_file_name,
+                              file = file_log)
+                        print(file = file_log)
+                    if dict_detection is not None :
+                        dict_obfuscator = get_recovery_obfuscator(
+                            tpl_type_indices = dict_detection['tpl_best_types'])
+                    else :
+                        dict_obfuscator = get_obfuscator(
+                            obfuscator_type_index = obfuscator_type_index,
+                            reverse_obfuscation_flag = reverse_obfuscation_flag,)
+                    dict_stats = obfuscate(
                         dict_obfuscator = dict_obfuscator,
                         integer_random_seed = integer_random_seed,
                         input_file_name = input_file_name,
@@ -1080,7 +4721,16 @@ def main(
                         gaps_insertion_flag = gaps_insertion_flag,
                         noise_insertion_percent = noise_insertion_percent,
                         verbosity_flag = verbosity_flag,
-                        reverse_obfuscation_flag = reverse_obfuscation_flag,)
+                        reverse_obfuscation_flag = reverse_obfuscation_flag,
+                        engine = engine,
+                        chunk_size = chunk_size,
+                        jobs = jobs,
+                        mmap_flag = mmap_flag,
+                        stats_flag = stats_flag,
+                        rng_scheme = rng_scheme,
+                        candidate_weights = candidate_weights,
+                        output_cache_dir_name = output_cache_dir_name,
+                        output_cache_size = output_cache_size,)
                 else :
                     raise FileExistsError(
                         "Output text file cannot be removed.")
@@ -1090,7 +4740,24 @@ def main(
         else :
             raise FileNotFoundError("Input text file does not exist.")
     else :
-        raise ValueError("Obfuscator type index must be between 1 and 8.")
+        raise ValueError(
+            "Obfuscator type index must be 0 (recovery only) or 1 to %d." %
+            len(DICT_OBFUSCATOR_TYPES))
+    if stats_flag :
+        print(json.dumps(dict_stats, indent = 1), file = file_log)
+        if output_cache_dir_name is not None and dict_stats is not None :
+            # Single file statistics, or statistics by input file name.
+            lst_file_stats = ([dict_stats] if 'output_cache' in dict_stats
+                              else list(dict_stats.values()))
+            counter_results = Counter(x.get('output_cache') for x in lst_file_stats
+                                      if isinstance(x, dict))
+            dict_report = get_output_cache_report(
+                output_cache_dir_name = output_cache_dir_name)
+            dict_report['size_limit'] = output_cache_size
+            for str_result in ('hit', 'miss', 'bypass',) :
+                dict_report[str_result] = counter_results[str_result]
+            print(json.dumps({'output_cache' : dict_report}, indent = 1),
+                  file = file_log)
 
 
 if __name__ == "__main__":
@@ -1098,7 +4765,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "-s",
         "--integer_random_seed",
-        help = "Optional. Default: current time. A non-negative integer seed for random choices during obfuscation.",
+        help = "Optional. Default: current time. A non-negative integer seed for random choices during obfuscation. Every random stage (gaps, noise, substitution) draws from its own generator seeded with the seed and the stage name (see -k), so outputs of random types, gaps and noise differ from those of earlier versions for the same seed, which drew all stages from one generator: earlier outputs are still recovered with -r 1, but cannot be reproduced.",
         type = int,
         required = False,
     )
@@ -1130,11 +4797,127 @@ if __name__ == "__main__":
         type = int,
         required = False,
     )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        help = "Optional. Default: python. Substitution engine for random obfuscators: python (per-character choice) or numpy (vectorized, requires NumPy).",
+        type = str,
+        choices = TPL_ENGINES,
+        required = False,
+    )
+    parser.add_argument(
+        "-c",
+        "--chunk_size",
+        help = "Optional. Default: 0. Stream the input in blocks of this many characters with bounded memory (0 reads the whole file). The output is identical for any block size.",
+        type = int,
+        required = False,
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help = "Optional. Default: number of CPUs for batch processing, no parallelism for a single file. The number of worker processes. A single file is split into chunks (see -c, default 1048576 characters) whose randomness derives from the seed and the chunk index, so the output is identical for any number of jobs.",
+        type = int,
+        required = False,
+    )
+    parser.add_argument(
+        "-m",
+        "--mmap_flag",
+        help = "Optional. Default: 0. Memory-map the input file (1) and decode it incrementally in blocks of -c bytes (default 1048576) instead of reading it whole (0). The output file is also written through a memory map, preallocated with an upper bound of its size and truncated to the size written, so neither the whole output text nor its encoding is held in memory.",
+        type = int,
+        required = False,
+    )
+    parser.add_argument(
+        "-k",
+        "--rng_scheme",
+        help = "Optional. Default: sequential. Random number scheme: sequential (one generator per stage in text order) or counter (every choice is a hash of the seed and the character position, so the output is identical for any chunk size and number of jobs, and for both engines).",
+        type = str,
+        choices = TPL_RNG_SCHEMES,
+        required = False,
+    )
+    parser.add_argument(
+        "-f",
+        "--fields",
+        help = "Optional. Process the input as a dataset of records and transform only these comma-separated fields (JSON keys, dotted for nested objects, or CSV columns). Other fields are passed through. Records are streamed in batches over -j worker processes, and every value gets a seed derived from the seed, the record index and the field name.",
+        type = str,
+        required = False,
+    )
+    parser.add_argument(
+        "-d",
+        "--dataset_format",
+        help = "Optional. Default: csv for the .csv extension, jsonl otherwise. The record format of the dataset (see -f): jsonl (one JSON object per line) or csv (with a header row).",
+        type = str,
+        choices = TPL_DATASET_FORMATS,
+        required = False,
+    )
+    parser.add_argument(
+        "-w",
+        "--keep_original_percent",
+        help = "Optional. Default: none. Range [0; 100]. Probability percent for original characters to be kept by the substitution (of any obfuscator type), the look-alike candidates sharing the rest. Choices are drawn from precomputed alias tables.",
+        type = float,
+        required = False,
+    )
+    parser.add_argument(
+        "-a",
+        "--lookalike_decay",
+        help = "Optional. Default: 1 (uniform). Range (0; 1]. Weight ratio of each look-alike candidate to the previous one, ranked closest first: fewer marks added to the letter, then letters named like the original (e.g. Cyrillic \"а\" before Greek \"α\" for \"a\"). Lower values favor the closest look-alikes. The probability of keeping the original character is unchanged (see -w).",
+        type = float,
+        required = False,
+    )
+    parser.add_argument(
+        "-u",
+        "--output_cache_dir_name",
+        help = "Optional. Cache outputs in this directory by the hash of the input contents, the obfuscator, the parameters and the program version. A cached output is copied to the output file without any processing. Only reproducible outputs are cached: deterministic and reverse obfuscation, or random obfuscation with -s. Not used with the standard input or output.",
+        type = str,
+        required = False,
+    )
+    parser.add_argument(
+        "-U",
+        "--output_cache_size",
+        help = "Optional. Default: 1073741824. The size limit of the output cache in bytes. The least recently used outputs are evicted beyond it.",
+        type = int,
+        required = False,
+    )
+    parser.add_argument(
+        "-V",
+        "--verify_flag",
+        help = "Optional. Default: 0. Verify that the input file, or the files of a batch input (on -j worker processes), recover exactly (1): obfuscate and recover in memory, streamed in blocks of -c characters, and compare with the input without writing any output (-o is not used). Print the first mismatching offset and character of every failed file, ambiguous reverse symbols of the obfuscator, and the throughput.",
+        type = int,
+        required = False,
+    )
+    parser.add_argument(
+        "-x",
+        "--scan_flag",
+        help = "Optional. Default: 0. Scan the input file, or the files of a batch input (on -j worker processes), for obfuscation (1): count the homoglyphs, alternate spaces, gaps and noise of all obfuscator types with NumPy, in blocks of -c bytes, without writing any output (-t and -o are not used). Print the obfuscation density, the suspected obfuscator type, gaps and noise, and the characters left unreplaced by a suspected \"full\" type of every file, and the throughput (as JSON with -S).",
+        type = int,
+        required = False,
+    )
+    parser.add_argument(
+        "-I",
+        "--incremental_flag",
+        help = "Optional. Default: 0. Obfuscate a growing input file incrementally (1): process only the input appended since the previous run and append its output, identical to the output of a full run with the same seed (stored for later runs if -s is not given). The state is kept in the output file name followed by .state; the output is rebuilt from the start when the parameters change or the input is truncated or rewritten before the processed offset (only its last 4096 processed bytes are compared). Not with -j, -m and the universal type 0; random obfuscation with -e numpy requires -k counter.",
+        type = int,
+        required = False,
+    )
+    parser.add_argument(
+        "-W",
+        "--watch_interval",
+        help = "Optional. Watch the input directory (-i) as a daemon until interrupted: poll it every W seconds and obfuscate new and changed files, once unchanged over a poll, into the mirrored output directory (-o) on -j warm worker processes. Output files are renamed into place when complete. The done/failed status of every file is kept in the file .txt_obf_status.json of the output directory, so processed files are skipped after a restart and failed files are retried when they change.",
+        type = float,
+        required = False,
+    )
+    parser.add_argument(
+        "-S",
+        "--stats_flag",
+        help = "Optional. Default: 0. Print per-stage wall times (read, gaps/noise/substitution or recovery, write) and counters of characters as JSON (1), by input file in batch mode, with estimates of the substitutions, noise and gaps derived from the characters of the input and the output.",
+        type = int,
+        required = False,
+    )
     parser.add_argument(
         "-t",
         "--obfuscator_type_index",
         help = '\n'.join((
-            "Mandatory. The index of the obfuscator type in range from 1 to 6:",
+            "Mandatory (except with -l and -x). The index of the obfuscator type: 0 (recovery only) or 1 to %d:" % len(DICT_OBFUSCATOR_TYPES),
+            STR_UNIVERSAL_TYPE,
             DICT_OBFUSCATOR_TYPES[1],
             DICT_OBFUSCATOR_TYPES[2],
             DICT_OBFUSCATOR_TYPES[3],
@@ -1147,21 +4930,40 @@ if __name__ == "__main__":
             DICT_OBFUSCATOR_TYPES[10],
             "\n")),
         type = int,
-        required = True,
+        required = False,
     )
     parser.add_argument(
         "-i",
         "--input_file_name",
-        help = "Mandatory. The name of the input text file.",
+        help = "Mandatory (except with -l). The name of the input text file (- for the standard input, streamed in blocks of up to -c bytes), or a directory, a glob pattern or a manifest file prefixed with @ (one input path per line, optionally followed by a tab and an output path) for batch processing.",
         type = str,
-        required = True,
+        required = False,
     )
     parser.add_argument(
         "-o",
         "--output_file_name",
-        help = "Mandatory. The name of the output text file.",
+        help = "Mandatory (except with -l). The name of the output text file (- for the standard output, flushed after every block), or the output directory for batch processing.",
         type = str,
-        required = True,
+        required = False,
+    )
+    parser.add_argument(
+        "-l",
+        "--listen_address",
+        help = "Optional. Serve obfuscate/recover requests on a Unix domain socket (unix:PATH) or a TCP address ([HOST:]PORT, default host 127.0.0.1) instead of processing files, with -j worker processes. Requests and responses are JSON objects, one per line: {\"id\": any, \"operation\": \"obfuscate\" or \"recover\", \"text\": string, \"obfuscator_type_index\": int, optional \"integer_random_seed\", \"gaps_insertion_flag\", \"noise_insertion_percent\", \"engine\", \"rng_scheme\", \"keep_original_percent\", \"lookalike_decay\"} -> {\"id\": any, \"text\": string} or {\"id\": any, \"error\": string}.",
+        type = str,
+        required = False,
     )
     args = parser.parse_args()
+    if args.listen_address is None :
+        lst_missing = [str_name for (str_name, value) in (
+            ("-t/--obfuscator_type_index",
+             args.obfuscator_type_index if not args.scan_flag else 0),
+            ("-i/--input_file_name", args.input_file_name),
+            ("-o/--output_file_name",
+             args.output_file_name if not (args.verify_flag or args.scan_flag)
+             else ''),)
+            if value is None]
+        if lst_missing :
+            parser.error("the following arguments are required: " +
+                         ", ".join(lst_missing))
     main(**vars(args))
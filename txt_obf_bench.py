@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2025 James James Johnson. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+###############################################################################
+# Throughput and latency benchmark of the obfuscator "txt_obf.py".
+#
+# Synthetic corpora of the given sizes are generated in a temporary directory
+# and every combination of obfuscator type, noise percent and gaps flag is
+# timed with "obfuscate" (forward and reverse, file to file). The helper
+# functions "add_noise", "add_gaps", "remove_noise" and "remove_gaps" are
+# timed in memory. Results are written as JSON and can be compared against a
+# baseline JSON file of an earlier run to detect slowdowns.
+###############################################################################
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from random import Random
+from statistics import median
+
+import txt_obf
+
+
+# Version of the JSON result format.
+INT_BENCHMARK_FORMAT_VERSION = 1
+
+# Synthetic corpora:
+#   "text" - words, punctuation, spaces and newlines;
+#   "letters" - letters only (pathological for noise and gaps);
+#   "no_newlines" - words, punctuation and spaces on a single line.
+TPL_CORPORA = ('text', 'letters', 'no_newlines',)
+
+# Size suffixes (binary units) of the corpus sizes.
+DICT_SIZE_UNITS = {'K' : 1 << 10, 'M' : 1 << 20, 'G' : 1 << 30,}
+
+# Size (characters) of the random block repeated to fill a corpus.
+INT_CORPUS_BLOCK_SIZE = 1 << 20
+
+# Corpora above this size (bytes) are obfuscated in chunks, and the
+# in-memory helper functions are not timed on them.
+INT_MAX_IN_MEMORY_SIZE = 1 << 26
+
+# Letters weighted by their relative frequency in English (see "txt_obf.py").
+STR_LETTERS = 'etaoinshrdlcumwfgypbvkjxqz'
+TPL_LETTER_WEIGHTS = (
+    12.7, 9.1, 8.2, 7.5, 7.0, 6.7, 6.3, 6.1, 6.0, 4.3, 4.0, 2.8, 2.8,
+    2.4, 2.4, 2.2, 2.0, 2.0, 1.9, 1.5, 0.98, 0.77, 0.15, 0.15, 0.095, 0.074,)
+STR_PUNCTUATION = '.,;:!?\'"-()'
+
+
+def parse_size(str_size) :
+    # "1K", "64K", "1M", "1G" or a number of bytes.
+    str_size = str_size.strip().upper()
+    if str_size and str_size[-1] in DICT_SIZE_UNITS :
+        return int(str_size[:-1]) * DICT_SIZE_UNITS[str_size[-1]]
+    return int(str_size)
+
+
+def parse_list(str_list, func_item = int) :
+    return [func_item(x) for x in str_list.split(',') if x.strip()]
+
+
+def generate_block(str_corpus, int_size, integer_random_seed = 0) :
+    # Generate "int_size" ASCII characters of the corpus.
+    random_generator = Random('%s:%s' % (integer_random_seed, str_corpus))
+    lst_chars = []
+    int_length = 0
+    int_words_in_line = 0
+    while int_length < int_size :
+        str_word = ''.join(random_generator.choices(
+            STR_LETTERS, weights = TPL_LETTER_WEIGHTS,
+            k = random_generator.randint(1, 10)))
+        if random_generator.random() < 0.1 :
+            str_word = str_word.capitalize()
+        if str_corpus == 'letters' :
+            str_separator = ''
+        else :
+            if random_generator.random() < 0.1 :
+                str_word += random_generator.choice(STR_PUNCTUATION)
+            int_words_in_line += 1
+            if str_corpus == 'text' and int_words_in_line >= 12 :
+                str_separator = '\n'
+                int_words_in_line = 0
+            else :
+                str_separator = ' '
+        lst_chars.append(str_word + str_separator)
+        int_length += len(str_word) + len(str_separator)
+    return ''.join(lst_chars)[:int_size]
+
+
+def write_corpus(str_corpus, int_size, output_file_name) :
+    # Repeat a random block up to "int_size" bytes without holding the
+    # whole corpus in memory.
+    str_block = generate_block(
+        str_corpus = str_corpus,
+        int_size = min(int_size, INT_CORPUS_BLOCK_SIZE),)
+    with open(output_file_name, 'w', encoding='utf-8', newline='\n') as file :
+        int_remaining = int_size
+        while int_remaining > 0 :
+            file.write(str_block[:int_remaining])
+            int_remaining -= min(int_remaining, len(str_block))
+
+
+def time_call(func_call, repeats) :
+    # Return the durations (seconds) of "repeats" calls.
+    lst_seconds = []
+    for i in range(repeats) :
+        flt_start = time.perf_counter()
+        func_call()
+        lst_seconds.append(time.perf_counter() - flt_start)
+    return lst_seconds
+
+
+def make_result(
+        str_name, str_corpus, int_size, lst_seconds,
+        obfuscator_type_index = None,
+        noise_insertion_percent = None,
+        gaps_insertion_flag = None) :
+    flt_median = median(lst_seconds)
+    return {
+        'name' : str_name,
+        'corpus' : str_corpus,
+        'size' : int_size,
+        'obfuscator_type_index' : obfuscator_type_index,
+        'noise_insertion_percent' : noise_insertion_percent,
+        'gaps_insertion_flag' : gaps_insertion_flag,
+        'repeats' : len(lst_seconds),
+        'seconds_min' : min(lst_seconds),
+        'seconds_median' : flt_median,
+        'mb_per_s' : (int_size / (1 << 20) / flt_median
+                      if flt_median > 0 else None),
+        }
+
+
+def get_result_key(dict_result) :
+    return (dict_result['name'], dict_result['corpus'], dict_result['size'],
+            dict_result['obfuscator_type_index'],
+            dict_result['noise_insertion_percent'],
+            dict_result['gaps_insertion_flag'],)
+
+
+def benchmark_functions(str_corpus, int_size, input_file_name,
+                        lst_noise_percents, repeats) :
+    # Time the in-memory helper functions on the corpus.
+    lst_results = []
+    with open(input_file_name, 'r', encoding='utf-8') as file :
+        str_input = file.read()
+    for noise_insertion_percent in lst_noise_percents :
+        if noise_insertion_percent <= 0 :
+            continue
+        random_generator = Random(0)
+        lst_results.append(make_result(
+            str_name = 'add_noise',
+            str_corpus = str_corpus,
+            int_size = int_size,
+            lst_seconds = time_call(lambda : txt_obf.add_noise(
+                str_input = str_input,
+                noise_insertion_percent = noise_insertion_percent,
+                random_generator = random_generator,), repeats),
+            noise_insertion_percent = noise_insertion_percent,))
+        str_noisy = txt_obf.add_noise(
+            str_input = str_input,
+            noise_insertion_percent = noise_insertion_percent,
+            random_generator = random_generator,)
+        lst_results.append(make_result(
+            str_name = 'remove_noise',
+            str_corpus = str_corpus,
+            int_size = int_size,
+            lst_seconds = time_call(lambda : txt_obf.remove_noise(
+                str_input = str_noisy,), repeats),
+            noise_insertion_percent = noise_insertion_percent,))
+    random_generator = Random(0)
+    lst_results.append(make_result(
+        str_name = 'add_gaps',
+        str_corpus = str_corpus,
+        int_size = int_size,
+        lst_seconds = time_call(lambda : txt_obf.add_gaps(
+            str_input = str_input,
+            random_generator = random_generator,), repeats),
+        gaps_insertion_flag = 1,))
+    str_gapped = txt_obf.add_gaps(
+        str_input = str_input,
+        random_generator = random_generator,)
+    lst_results.append(make_result(
+        str_name = 'remove_gaps',
+        str_corpus = str_corpus,
+        int_size = int_size,
+        lst_seconds = time_call(lambda : txt_obf.remove_gaps(
+            str_input = str_gapped,), repeats),
+        gaps_insertion_flag = 1,))
+    return lst_results
+
+
+def benchmark_obfuscate(
+        str_corpus, int_size, input_file_name, dir_name,
+        lst_obfuscator_type_indices, lst_noise_percents, lst_gaps_flags,
+        repeats, engine = 'python', chunk_size = 0, verbosity_flag = 0) :
+    # Time forward and reverse obfuscation of the corpus file.
+    lst_results = []
+    if chunk_size <= 0 and int_size > INT_MAX_IN_MEMORY_SIZE :
+        chunk_size = txt_obf.INT_DEFAULT_CHUNK_SIZE
+    str_output = str(Path(dir_name) / 'output.txt')
+    str_recovered = str(Path(dir_name) / 'recovered.txt')
+    for obfuscator_type_index in lst_obfuscator_type_indices :
+        dict_obfuscator = txt_obf.get_obfuscator(
+            obfuscator_type_index = obfuscator_type_index,
+            reverse_obfuscation_flag = 0,)
+        dict_reverse_obfuscator = txt_obf.get_obfuscator(
+            obfuscator_type_index = obfuscator_type_index,
+            reverse_obfuscation_flag = 1,)
+        for noise_insertion_percent in lst_noise_percents :
+            for gaps_insertion_flag in lst_gaps_flags :
+                dict_parameters = dict(
+                    obfuscator_type_index = obfuscator_type_index,
+                    noise_insertion_percent = noise_insertion_percent,
+                    gaps_insertion_flag = gaps_insertion_flag,)
+                lst_results.append(make_result(
+                    str_name = 'obfuscate',
+                    str_corpus = str_corpus,
+                    int_size = int_size,
+                    lst_seconds = time_call(lambda : txt_obf.obfuscate(
+                        dict_obfuscator = dict_obfuscator,
+                        integer_random_seed = 0,
+                        input_file_name = input_file_name,
+                        output_file_name = str_output,
+                        gaps_insertion_flag = gaps_insertion_flag,
+                        noise_insertion_percent = noise_insertion_percent,
+                        engine = engine,
+                        chunk_size = chunk_size,), repeats),
+                    **dict_parameters))
+                lst_results.append(make_result(
+                    str_name = 'recover',
+                    str_corpus = str_corpus,
+                    int_size = int_size,
+                    lst_seconds = time_call(lambda : txt_obf.obfuscate(
+                        dict_obfuscator = dict_reverse_obfuscator,
+                        integer_random_seed = 0,
+                        input_file_name = str_output,
+                        output_file_name = str_recovered,
+                        gaps_insertion_flag = gaps_insertion_flag,
+                        reverse_obfuscation_flag = 1,
+                        chunk_size = chunk_size,), repeats),
+                    **dict_parameters))
+                if verbosity_flag == 1 :
+                    for dict_result in lst_results[-2:] :
+                        print_result(dict_result = dict_result)
+    return lst_results
+
+
+def print_result(dict_result, file = sys.stderr) :
+    print("%s %s %d t=%s n=%s g=%s: %.6f s, %.2f MB/s" % (
+        dict_result['name'], dict_result['corpus'], dict_result['size'],
+        dict_result['obfuscator_type_index'],
+        dict_result['noise_insertion_percent'],
+        dict_result['gaps_insertion_flag'],
+        dict_result['seconds_median'],
+        dict_result['mb_per_s'] or 0.), file = file)
+
+
+def compare_results(lst_results, lst_baseline_results, tolerance_percent) :
+    # Compare median durations with the baseline. A result is a regression
+    # when it is slower than the baseline by more than "tolerance_percent".
+    dict_baseline = {get_result_key(x) : x for x in lst_baseline_results}
+    lst_comparison = []
+    for dict_result in lst_results :
+        dict_baseline_result = dict_baseline.get(get_result_key(dict_result))
+        if dict_baseline_result is None :
+            continue
+        flt_baseline_seconds = dict_baseline_result['seconds_median']
+        flt_change_percent = (
+            100. * (dict_result['seconds_median'] - flt_baseline_seconds) /
+            flt_baseline_seconds if flt_baseline_seconds > 0 else 0.)
+        lst_comparison.append(dict(
+            zip(('name', 'corpus', 'size', 'obfuscator_type_index',
+                 'noise_insertion_percent', 'gaps_insertion_flag',),
+                get_result_key(dict_result)),
+            baseline_seconds_median = flt_baseline_seconds,
+            seconds_median = dict_result['seconds_median'],
+            change_percent = flt_change_percent,
+            regression = flt_change_percent > tolerance_percent,))
+    return lst_comparison
+
+
+def main(
+         sizes : str = None,
+         corpora : str = None,
+         obfuscator_type_indices : str = None,
+         noise_insertion_percents : str = None,
+         gaps_insertion_flags : str = None,
+         repeats : int = None,
+         engine : str = None,
+         chunk_size : int = None,
+         temp_dir_name : str = None,
+         output_file_name : str = None,
+         baseline_file_name : str = None,
+         tolerance_percent : float = None,
+         verbosity_flag : int = None,
+         ) :
+    lst_sizes = parse_list('1K,64K' if sizes is None else sizes, parse_size)
+    lst_corpora = parse_list(
+        ','.join(TPL_CORPORA) if corpora is None else corpora, str)
+    lst_obfuscator_type_indices = parse_list(
+        ','.join(str(x) for x in txt_obf.DICT_OBFUSCATOR_TYPES)
+        if obfuscator_type_indices is None else obfuscator_type_indices)
+    lst_noise_percents = parse_list(
+        '0,25' if noise_insertion_percents is None else noise_insertion_percents)
+    lst_gaps_flags = parse_list(
+        '0,1' if gaps_insertion_flags is None else gaps_insertion_flags)
+    repeats = 3 if repeats is None else repeats
+    engine = 'python' if engine is None else engine
+    chunk_size = 0 if chunk_size is None else chunk_size
+    tolerance_percent = 10. if tolerance_percent is None else tolerance_percent
+    verbosity_flag = 0 if verbosity_flag is None else verbosity_flag
+    for str_corpus in lst_corpora :
+        if str_corpus not in TPL_CORPORA :
+            raise ValueError("Corpus must be one of: " + ", ".join(TPL_CORPORA) + ".")
+    for obfuscator_type_index in lst_obfuscator_type_indices :
+        if not 1 <= obfuscator_type_index <= len(txt_obf.DICT_OBFUSCATOR_TYPES) :
+            raise ValueError("Obfuscator type index must be between 1 and %d." %
+                             len(txt_obf.DICT_OBFUSCATOR_TYPES))
+    if repeats < 1 :
+        raise ValueError("Number of repeats must be positive.")
+
+    lst_results = []
+    with tempfile.TemporaryDirectory(dir = temp_dir_name) as dir_name :
+        str_input = str(Path(dir_name) / 'input.txt')
+        for str_corpus in lst_corpora :
+            for int_size in lst_sizes :
+                write_corpus(
+                    str_corpus = str_corpus,
+                    int_size = int_size,
+                    output_file_name = str_input,)
+                if int_size <= INT_MAX_IN_MEMORY_SIZE :
+                    lst_results.extend(benchmark_functions(
+                        str_corpus = str_corpus,
+                        int_size = int_size,
+                        input_file_name = str_input,
+                        lst_noise_percents = lst_noise_percents,
+                        repeats = repeats,))
+                lst_results.extend(benchmark_obfuscate(
+                    str_corpus = str_corpus,
+                    int_size = int_size,
+                    input_file_name = str_input,
+                    dir_name = dir_name,
+                    lst_obfuscator_type_indices = lst_obfuscator_type_indices,
+                    lst_noise_percents = lst_noise_percents,
+                    lst_gaps_flags = lst_gaps_flags,
+                    repeats = repeats,
+                    engine = engine,
+                    chunk_size = chunk_size,
+                    verbosity_flag = verbosity_flag,))
+
+    dict_report = {
+        'format_version' : INT_BENCHMARK_FORMAT_VERSION,
+        'python' : platform.python_version(),
+        'platform' : platform.platform(),
+        'engine' : engine,
+        'chunk_size' : chunk_size,
+        'results' : lst_results,
+        }
+    int_regressions = 0
+    if baseline_file_name is not None :
+        with open(baseline_file_name, 'r', encoding='utf-8') as file :
+            dict_baseline = json.load(file)
+        if dict_baseline.get('format_version') != INT_BENCHMARK_FORMAT_VERSION :
+            raise ValueError("Unsupported baseline format version.")
+        lst_comparison = compare_results(
+            lst_results = lst_results,
+            lst_baseline_results = dict_baseline['results'],
+            tolerance_percent = tolerance_percent,)
+        int_regressions = sum(1 for x in lst_comparison if x['regression'])
+        dict_report['baseline_file_name'] = baseline_file_name
+        dict_report['tolerance_percent'] = tolerance_percent
+        dict_report['comparison'] = lst_comparison
+        for dict_comparison in lst_comparison :
+            if dict_comparison['regression'] or verbosity_flag == 1 :
+                print("%s%s %s %d t=%s n=%s g=%s: %.6f s -> %.6f s (%+.1f%%)" % (
+                    "REGRESSION " if dict_comparison['regression'] else "",
+                    dict_comparison['name'], dict_comparison['corpus'],
+                    dict_comparison['size'],
+                    dict_comparison['obfuscator_type_index'],
+                    dict_comparison['noise_insertion_percent'],
+                    dict_comparison['gaps_insertion_flag'],
+                    dict_comparison['baseline_seconds_median'],
+                    dict_comparison['seconds_median'],
+                    dict_comparison['change_percent'],), file = sys.stderr)
+        print("Compared: %d. Regressions: %d." % (
+            len(lst_comparison), int_regressions), file = sys.stderr)
+
+    str_report = json.dumps(dict_report, indent = 1)
+    if output_file_name is None :
+        print(str_report)
+    else :
+        with open(output_file_name, 'w', encoding='utf-8') as file :
+            file.write(str_report + '\n')
+    return 1 if int_regressions > 0 else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-z",
+        "--sizes",
+        help = "Optional. Default: 1K,64K. Comma-separated corpus sizes in bytes with optional K, M or G suffix (up to e.g. 1G).",
+        type = str,
+        required = False,
+    )
+    parser.add_argument(
+        "-k",
+        "--corpora",
+        help = "Optional. Default: all. Comma-separated synthetic corpora: " + ", ".join(TPL_CORPORA) + ".",
+        type = str,
+        required = False,
+    )
+    parser.add_argument(
+        "-t",
+        "--obfuscator_type_indices",
+        help = "Optional. Default: all. Comma-separated obfuscator type indices.",
+        type = str,
+        required = False,
+    )
+    parser.add_argument(
+        "-n",
+        "--noise_insertion_percents",
+        help = "Optional. Default: 0,25. Comma-separated noise insertion percents.",
+        type = str,
+        required = False,
+    )
+    parser.add_argument(
+        "-g",
+        "--gaps_insertion_flags",
+        help = "Optional. Default: 0,1. Comma-separated gaps insertion flags.",
+        type = str,
+        required = False,
+    )
+    parser.add_argument(
+        "-R",
+        "--repeats",
+        help = "Optional. Default: 3. Number of timed calls per measurement; the median is reported.",
+        type = int,
+        required = False,
+    )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        help = "Optional. Default: python. Substitution engine of txt_obf.py.",
+        type = str,
+        choices = txt_obf.TPL_ENGINES,
+        required = False,
+    )
+    parser.add_argument(
+        "-c",
+        "--chunk_size",
+        help = "Optional. Default: 0 (streaming for corpora above 64M). Chunk size of txt_obf.py.",
+        type = int,
+        required = False,
+    )
+    parser.add_argument(
+        "-d",
+        "--temp_dir_name",
+        help = "Optional. Default: system temporary directory. Directory for the generated corpora.",
+        type = str,
+        required = False,
+    )
+    parser.add_argument(
+        "-o",
+        "--output_file_name",
+        help = "Optional. Default: standard output. The name of the JSON results file.",
+        type = str,
+        required = False,
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline_file_name",
+        help = "Optional. The name of a JSON results file of an earlier run to compare against. The exit status is 1 if any measurement regressed.",
+        type = str,
+        required = False,
+    )
+    parser.add_argument(
+        "-x",
+        "--tolerance_percent",
+        help = "Optional. Default: 10. Slowdown percent of the median duration tolerated before reporting a regression.",
+        type = float,
+        required = False,
+    )
+    parser.add_argument(
+        "-v",
+        "--verbosity_flag",
+        help = "Optional. Default: 0. Print each measurement (1) or not (0).",
+        type = int,
+        required = False,
+    )
+    args = parser.parse_args()
+    sys.exit(main(**vars(args)))